@@ -1,50 +1,76 @@
 import sys
 import asyncio
 sys.path.append('../')
-from typing import List
-from constants.constants import PINECONE_NAMESPACE, PINECONE_CLIENT, PINECONE_INDEX_NAME
+from typing import Dict, List
+from constants.constants import FILES_OUTPUT_DIR, DELETE_BATCH_SIZE
 from text_and_embeddings.textsplitter import filter_filename
+from text_and_embeddings.manifest import load_manifest, forget_files
+from vector_store.main import get_vector_store, get_bm25_index, bump_corpus_generation
 
 
-index_name = PINECONE_INDEX_NAME
-pc = PINECONE_CLIENT,
-pc = pc[0]
-namespace = PINECONE_NAMESPACE
-
-async def delete_records(file_names: List[str], id: bool = False, deleteall: bool = False) -> None:
+async def delete_records(file_names: List[str], id: bool = False, deleteall: bool = False) -> Dict[str, int]:
     """
-    Asynchronously deletes all records associated with the given list of file names from Pinecone.
+    Asynchronously deletes all records associated with the given list of file names from the vector store.
+
+    Chunk ids are taken from the ingestion manifest; files that are not in it fall back to listing
+    the ids that start with the file's chunk prefix, following every page of results.
 
     Args:
         file_names (List[str]): List of file names whose chunks should be deleted.
         id (bool): If True, keep special characters in filenames; otherwise, remove them.
         deleteall (bool): If True, delete all records in the namespace.
+
+    Returns:
+        Dict[str, int]: The number of ids removed per file name (empty when deleteall is True).
     """
-    # Initialize Pinecone index
-    index = pc.Index(index_name)
+    vector_store = get_vector_store()
+    bm25_index = await asyncio.to_thread(get_bm25_index)
 
+    # The manifest, BM25 and generation files are read and written in worker threads and the
+    # vector store calls run on its I/O executor, so deletes never block the event loop
     if deleteall:
         # Delete all records from the namespace
-        index.delete(namespace=namespace, delete_all=True)
+        await vector_store.adelete_all()
+        await asyncio.to_thread(bm25_index.clear)
+        await asyncio.to_thread(bm25_index.save)
+        await asyncio.to_thread(bump_corpus_generation)
+        await asyncio.to_thread(forget_files, FILES_OUTPUT_DIR)
         print('All records deleted successfully')
-        return
+        return {}
     
-    # Extract existing IDs from Pinecone
-    existing_ids = list(index.list(namespace=namespace))[0]
+    manifest = await asyncio.to_thread(load_manifest, FILES_OUTPUT_DIR)
 
-    ids_to_delete = set()
-    
-    for file_name in file_names:
-        formatted_file_name = filter_filename(file_name, id)
-        ids_to_delete.update({existing_id for existing_id in existing_ids if formatted_file_name in existing_id})
+    async def chunk_ids(file_name: str) -> List[str]:
+        if file_name in manifest:
+            return manifest[file_name]['chunk_ids']
+        # Chunk ids look like '<filtered file name>#chunk_<n>', so the prefix matches this file only
+        return await vector_store.alist_ids(prefix=f"{filter_filename(file_name, id)}#")
+
+    # Files missing from the manifest are listed concurrently
+    ids_per_file = await asyncio.gather(*(chunk_ids(file_name) for file_name in file_names))
+    deleted_counts = {}
+
+    for file_name, ids_to_delete in zip(file_names, ids_per_file):
+        # Delete records from the vector store in bounded batches
+        for i in range(0, len(ids_to_delete), DELETE_BATCH_SIZE):
+            await vector_store.adelete(ids_to_delete[i:i + DELETE_BATCH_SIZE])
+        await asyncio.to_thread(bm25_index.remove, ids_to_delete)
+
+        deleted_counts[file_name] = len(ids_to_delete)
     
-    if not ids_to_delete:
+    if not any(deleted_counts.values()):
         print("No records found for the specified files.")
-        return
-    
-    # Delete records from Pinecone
-    index.delete(ids=list(ids_to_delete), namespace=namespace)
-    print(f"Records associated with the specified files have been deleted from Pinecone index '{index_name}'.")
+    else:
+        await asyncio.to_thread(bm25_index.save)
+
+        # Cached answers may be based on the deleted chunks
+        await asyncio.to_thread(bump_corpus_generation)
+        print(f"Records associated with the specified files have been deleted from the '{vector_store.name}' vector store: {deleted_counts}.")
+
+    # Forget the deleted files so the next ingestion picks them up again if they still exist
+    await asyncio.to_thread(forget_files, FILES_OUTPUT_DIR, file_names)
+
+    return deleted_counts
 
 # Example usage
 if __name__ == "__main__":
@@ -1,86 +1,90 @@
 import os
 import sys
-import json
-import aiofiles
 import asyncio
+from typing import Any, Callable, Dict, Optional
 sys.path.append('../')
-from constants.constants import DIRECTORY_PATH, PINECONE_NAMESPACE, PINECONE_CLIENT, PINECONE_INDEX_NAME, FILES_OUTPUT_DIR
-from text_and_embeddings.main import Generate_TextAndEmbeddings
-from pinecone import ServerlessSpec
+from constants.constants import (FILES_OUTPUT_DIR, EMBEDDING_DIMENSION,
+                       UPSERT_BATCH_SIZE, UPSERT_MAX_BATCH_BYTES, UPSERT_CONCURRENCY, UPSERT_MAX_RETRIES,
+                       DELETE_BATCH_SIZE, INGEST_QUEUE_SIZE, INGEST_EMBED_BATCH_SIZE)
+from text_and_embeddings.pipeline import IngestionPipeline, format_stage_report
+from text_and_embeddings.manifest import plan_ingestion, stale_chunk_ids, save_manifest
+from text_and_embeddings.chunk_store import METADATA_FILE_NAME, ChunkStagingWriter
+from vector_store.main import get_vector_store, get_bm25_index, bump_corpus_generation
 
-index_name = PINECONE_INDEX_NAME
-pc = PINECONE_CLIENT
-namespace = PINECONE_NAMESPACE
 
+metadata_path = os.path.join(FILES_OUTPUT_DIR, METADATA_FILE_NAME)
 
-json_path = os.path.join(DIRECTORY_PATH, 'extracted_output', 'metadata.json')
-
-async def upsert_data() -> None:
+async def upsert_data(on_stage: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """
-    Asynchronously upserts data into a Pinecone index and removes these records from the metadata file.
+    Asynchronously splits, embeds and upserts new or changed files into the configured vector store.
+
+    Only files that are new or changed since the last run are processed; chunks of removed files
+    (and leftover chunks of shrunk files) are deleted. The files are streamed through the
+    split, embed and upsert stages, which run concurrently. The chunks and embeddings of the run
+    are also staged in metadata.jsonl and its .npy sidecar, replacing those of the previous run.
 
     Args:
-        json_path (str): The path to the JSON file containing the embeddings.
-        index_name (str): The name of the Pinecone index.
-        namespace (str): The namespace for the Pinecone index.
+        on_stage (Optional[Callable[[str], None]]): Called with the name of each stage as it starts
+            ('pipeline', 'cleanup'), e.g. to report job progress.
+
+    Returns:
+        Dict[str, Any]: The upsert summary: vectors written, batches, retries, elapsed seconds,
+            throughput, embedding cache hits and misses, the throughput of every pipeline stage and
+            the number of stale chunks deleted.
     """
 
-    # await Generate_TextAndEmbeddings(os.path.join(DIRECTORY_PATH, 'extracted_output'), json_path)
-
-    # Initialize Pinecone client
-    if index_name not in pc.list_indexes().names():
-        pc.create_index(
-            name=index_name,
-            dimension=384,
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud='aws',
-                region='us-east-1'
-            )
-        )
-        print("INDEX CREATED SUCCESSFULLY")
-    else:
-        print("INDEX ALREADY EXISTS")
-    
-    index = pc.Index(index_name)
-    await Generate_TextAndEmbeddings(FILES_OUTPUT_DIR, json_path)
+    # Create the index if the backend needs one
+    vector_store = get_vector_store()
+    await vector_store.aensure_index()
 
-    # Asynchronously load the data from JSON
-    async with aiofiles.open(json_path, 'r', encoding='utf-8') as file:
-        data = json.loads(await file.read())
-    
-    # Prepare vectors for upsertion
-    vectors = [
-        {
-            "id": entry["id"],
-            "values": entry["values"],
-            "metadata": {
-                "text": entry["metadata"]["text"],
-                "creation_date": entry["metadata"]["creation_date"],
-                "file_name": entry["metadata"]["file_name"],
-                "file_path": entry["metadata"]["file_path"],
-                "file_size": entry["metadata"]["file_size"],
-                "last_modified_date": entry["metadata"]["last_modified_date"]
-            }
-        }
-        for entry in data
-    ]
-    
-    # Extract IDs for the records to be upserted
-    ids_to_upsert = [entry["id"] for entry in data]
-    
-    # Asynchronously upsert vectors into Pinecone
-    index.upsert(vectors=vectors, namespace=namespace)
-    print(f"Data has been upserted into the Pinecone index '{index_name}'.")
-    
-    # Remove records from metadata that were upserted
-    updated_metadata = [entry for entry in data if entry["id"] not in ids_to_upsert]
-    
-    # Asynchronously write the updated metadata back to the JSON file
-    async with aiofiles.open(json_path, 'w', encoding='utf-8') as file:
-        await file.write(json.dumps(updated_metadata, indent=4))
-    
-    print("Records that were upserted have been removed from the metadata file.")
+    plan = await asyncio.to_thread(plan_ingestion, FILES_OUTPUT_DIR)
+    bm25_index = await asyncio.to_thread(get_bm25_index)
+
+    if on_stage is not None:
+        on_stage('pipeline')
+
+    pipeline = IngestionPipeline(
+        vector_store,
+        bm25_index,
+        queue_size=INGEST_QUEUE_SIZE,
+        embed_batch_size=INGEST_EMBED_BATCH_SIZE,
+        upsert_batch_size=UPSERT_BATCH_SIZE,
+        upsert_max_batch_bytes=UPSERT_MAX_BATCH_BYTES,
+        upsert_concurrency=UPSERT_CONCURRENCY,
+        upsert_max_retries=UPSERT_MAX_RETRIES,
+        staging=ChunkStagingWriter(metadata_path, EMBEDDING_DIMENSION) if plan is not None else None
+    )
+    changed_files = plan['changed_files'] if plan is not None else []
+    summary = await pipeline.run(FILES_OUTPUT_DIR, changed_files, plan['manifest'] if plan is not None else {})
+    summary['stale_deleted'] = 0
+    print(f"Data has been upserted into the '{vector_store.name}' vector store: {summary['vectors_written']} vectors "
+          f"in {summary['elapsed_seconds']}s ({summary['vectors_per_second']}/s).")
+    print(f"Pipeline stages: {format_stage_report(summary['stages'])}.")
+    print(f"Embedding cache: {summary['embedding_cache']['hits']} hits, {summary['embedding_cache']['misses']} misses.")
+
+    if on_stage is not None:
+        on_stage('cleanup')
+
+    if plan is not None:
+        # Delete chunks that no longer exist, then record what the vector store now holds
+        stale_ids = stale_chunk_ids(plan)
+        if stale_ids:
+            for i in range(0, len(stale_ids), DELETE_BATCH_SIZE):
+                await vector_store.adelete(stale_ids[i:i + DELETE_BATCH_SIZE])
+            await asyncio.to_thread(bm25_index.remove, stale_ids)
+            summary['stale_deleted'] = len(stale_ids)
+            print(f"Deleted {len(stale_ids)} stale chunks of {len(plan['removed_files'])} removed and "
+                  f"{len(plan['changed_files'])} changed files.")
+
+        await asyncio.to_thread(save_manifest, FILES_OUTPUT_DIR, plan['manifest'])
+
+    await asyncio.to_thread(bm25_index.save)
+
+    if summary['vectors_written'] or summary['stale_deleted']:
+        # Cached answers may be based on the old corpus
+        await asyncio.to_thread(bump_corpus_generation)
+
+    return summary
 
 
 async def main() -> None:
@@ -1,17 +1,52 @@
 import sys
+import math
+import asyncio
+from typing import Dict, List, Optional, Tuple
 sys.path.append('../')
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field, field_validator
-from fastapi.responses import JSONResponse, StreamingResponse  # noqa: F401
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from llama_index.core.llms import ChatMessage
+from constants.constants import CHAT_HISTORY_TURNS
 from functions.chat_history import read_chat_history, format_chat_history_llamaindex
-from query_database.main import llamaindex_chatbot
-from apis.routers import crud_router, loader_router
+from query_database.main import (llamaindex_chatbot, llamaindex_chatbot_stream, build_chat_pipeline, get_retrieval_cache,
+                                 get_summary_memory)
+from query_database.admission import Overloaded
+from vector_store.main import reset_vector_store
+from jobs.main import get_job_queue
+from apis.warmup import run_warmup
+from apis.routers import crud_router, loader_router, metrics_router, jobs_router, health_router
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the embedding model, vector store, chat pipeline and tokenizers in the background;
+    # /healthz answers right away and /readyz reports ready once this has finished
+    warmup_task = asyncio.create_task(run_warmup())
+
+    # Resume ingestion jobs that were queued or running when the server stopped
+    job_queue = get_job_queue()
+    await job_queue.start()
+    yield
+
+    await job_queue.stop()
+    warmup_task.cancel()
+
+    # Keep cached retrieval results for the next start, if persistence is configured
+    retrieval_cache = get_retrieval_cache()
+    if retrieval_cache is not None:
+        await asyncio.to_thread(retrieval_cache.save)
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(crud_router.router)
 app.include_router(loader_router.router)
+app.include_router(metrics_router.router)
+app.include_router(jobs_router.router)
+app.include_router(health_router.router)
 
 class api_response(BaseModel):
     system_prompt: str = Field(..., min_length=1, description="System prompt cannot be empty and must be a non-null string.")
@@ -28,6 +63,30 @@ class InputModel(BaseModel):
     input: str
 
 
+async def load_chat_history() -> Tuple[List[Dict[str, str]], List[ChatMessage]]:
+    """
+    Read the latest turns of the chat log and build the chat history sent with the request.
+
+    Returns:
+        Tuple[List[Dict[str, str]], List[ChatMessage]]: The turns as read from the log, and the
+            history for the chat engine (a summary plus the recent turns in 'summary' mode).
+    """
+    chat_history = await read_chat_history(limit=CHAT_HISTORY_TURNS)
+
+    summary_memory = get_summary_memory()
+    if summary_memory is None:
+        return chat_history, await format_chat_history_llamaindex(chat_history)
+
+    return chat_history, summary_memory.build_history(chat_history)
+
+def update_summary(chat_history: List[Dict[str, str]]) -> Optional[BackgroundTask]:
+    # The summary is updated after the response has been sent, off the request's critical path
+    summary_memory = get_summary_memory()
+    if summary_memory is None:
+        return None
+    return BackgroundTask(summary_memory.update, chat_history)
+
+
 @app.get('/', response_model=str)
 async def root():
     return JSONResponse(status_code=200, content="Welcome to Groq API ChatBot API's")
@@ -36,15 +95,41 @@ async def root():
 @app.post('/groq_api_generator_response_llamaindex')
 async def get_groq_api_response_llamaindex(input: InputModel):
     try:
-        chat_history = await read_chat_history(limit=5)
-        format_history = await format_chat_history_llamaindex(chat_history)
+        chat_history, format_history = await load_chat_history()
 
 
         response_stream = await llamaindex_chatbot(input.input, format_history)
 
 
-        return JSONResponse(response_stream, status_code=200)
+        return JSONResponse(response_stream, status_code=200, background=update_summary(chat_history))
+    except Overloaded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post('/groq_api_generator_response_llamaindex/stream')
+async def get_groq_api_response_llamaindex_stream(input: InputModel):
+    try:
+        chat_history, format_history = await load_chat_history()
+
+        # Tokens are forwarded as plain text chunks as soon as Groq produces them
+        token_stream = await llamaindex_chatbot_stream(input.input, format_history)
+
+        return StreamingResponse(token_stream, media_type="text/plain", background=update_summary(chat_history))
+    except Overloaded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post('/rebuild_pipeline')
+async def rebuild_pipeline():
+    try:
+        # Recreate the vector store client and the chat pipeline on top of it
+        reset_vector_store()
+        await asyncio.to_thread(build_chat_pipeline)
+        return JSONResponse(status_code=200, content="Chat pipeline rebuilt successfully.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
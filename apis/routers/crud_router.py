@@ -19,8 +19,8 @@ router = APIRouter(
 @router.post("/insert-documents")
 async def InsertDocuments():
     try:
-        await upsert_data()
-        return JSONResponse(status_code=200, content = "Document upserted successfully.")
+        summary = await upsert_data()
+        return JSONResponse(status_code=200, content = {"message": "Document upserted successfully.", **summary})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -32,7 +32,7 @@ async def DeleteDocuments(
 ):
     try:
         # Call the async delete_records function
-        await delete_records(file_names, id=id, deleteall=deleteall)
-        return JSONResponse(status_code=200, content="Records deleted successfully.")
+        deleted_counts = await delete_records(file_names, id=id, deleteall=deleteall)
+        return JSONResponse(status_code=200, content={"message": "Records deleted successfully.", "deleted": deleted_counts})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,23 @@
+import time
+from fastapi.responses import JSONResponse
+from fastapi import APIRouter
+from apis.warmup import warmup_state
+
+router = APIRouter(
+    tags=["Health"],
+    responses={
+        503: {"description": "Service not ready"}
+    }
+)
+
+
+@router.get("/healthz")
+async def Liveness():
+    # The process is up and the event loop answers; says nothing about the dependencies
+    return JSONResponse(status_code=200, content={"status": "ok", "uptime_seconds": round(time.time() - warmup_state.started_at, 3)})
+
+
+@router.get("/readyz")
+async def Readiness():
+    report = warmup_state.report()
+    return JSONResponse(status_code=200 if report['ready'] else 503, content=report)
@@ -0,0 +1,55 @@
+import sys
+sys.path.append('../')
+from typing import List, Optional
+from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from loaders.main import save_files_to_directory
+from jobs.main import get_job_queue
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"],
+    responses={
+        404: {"description": "Not found"},
+        400: {"description": "Bad request"},
+        500: {"description": "Internal server error"}
+    }
+)
+
+
+@router.post('/loading-files')
+async def LoadingFilesJob(
+    files: List[UploadFile] = File(...),
+    insert: bool = Query(True, description="Also insert the extracted documents into the database if True")
+):
+    # Only the upload happens inside the request; extraction (and insertion) run as a job
+    try:
+        await save_files_to_directory(files)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving files: {e}")
+
+    job = await get_job_queue().submit('ingest' if insert else 'extract', {'files': [file.filename for file in files]})
+    return JSONResponse(status_code=202, content={"message": "Files queued for processing.", "job_id": job['id'], "job": job})
+
+
+@router.post('/insert-documents')
+async def InsertDocumentsJob():
+    job = await get_job_queue().submit('insert')
+    return JSONResponse(status_code=202, content={"message": "Documents queued for insertion.", "job_id": job['id'], "job": job})
+
+
+@router.get('/')
+async def ListJobs(
+    status: Optional[str] = Query(None, description="Only return jobs with this status"),
+    limit: int = Query(50, ge=1, le=500, description="The maximum number of jobs to return")
+):
+    return JSONResponse(status_code=200, content={"jobs": get_job_queue().store.list(status=status, limit=limit)})
+
+
+@router.get('/{job_id}')
+async def GetJob(job_id: str):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    return JSONResponse(status_code=200, content=job)
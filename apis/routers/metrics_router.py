@@ -0,0 +1,58 @@
+from fastapi.responses import JSONResponse
+from fastapi import APIRouter
+from query_database.main import peek_answer_cache, get_retrieval_cache, peek_query_embedder, get_context_packer, get_single_flight, get_llm_admission, get_summary_memory
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    responses={
+        404: {"description": "Not found"},
+        500: {"description": "Internal server error"}
+    }
+)
+
+
+@router.get("/cache")
+async def CacheMetrics():
+    # Reading the metrics should not load the embedding model, so the answer cache and the
+    # question embedder are only reported once a request has created them
+    answer_cache = peek_answer_cache()
+    retrieval_cache = get_retrieval_cache()
+    query_embedder = peek_query_embedder()
+    return JSONResponse(status_code=200, content={
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "retrieval_cache": retrieval_cache.stats() if retrieval_cache is not None else None,
+        "query_embeddings": query_embedder.stats() if query_embedder is not None else None
+    })
+
+
+@router.get("/context")
+async def ContextMetrics():
+    context_packer = get_context_packer()
+    return JSONResponse(status_code=200, content={
+        "context_packer": context_packer.stats() if context_packer is not None else None
+    })
+
+
+@router.get("/coalescing")
+async def CoalescingMetrics():
+    single_flight = get_single_flight()
+    return JSONResponse(status_code=200, content={
+        "single_flight": single_flight.stats() if single_flight is not None else None
+    })
+
+
+@router.get("/llm")
+async def LLMMetrics():
+    llm_admission = get_llm_admission()
+    return JSONResponse(status_code=200, content={
+        "admission": llm_admission.stats() if llm_admission is not None else None
+    })
+
+
+@router.get("/memory")
+async def MemoryMetrics():
+    summary_memory = get_summary_memory()
+    return JSONResponse(status_code=200, content={
+        "summary_memory": summary_memory.stats() if summary_memory is not None else None
+    })
@@ -0,0 +1,97 @@
+import sys
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+sys.path.append('../')
+from constants.constants import get_embedding_model, WARMUP_BATCH_SIZE
+from query_database.main import build_chat_pipeline, get_answer_cache, get_context_packer
+from vector_store.main import get_vector_store, get_bm25_index
+
+
+class WarmupState:
+    """
+    Tracks the warmup of every component the chat path depends on.
+
+    The service is live as soon as the process answers; it is ready once every component
+    has warmed up successfully.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None and all(component['status'] == 'ok' for component in self.components.values())
+
+    async def run_step(self, name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        self.components[name] = {'status': 'warming', 'seconds': None}
+        start = time.perf_counter()
+        try:
+            details = await step()
+        except Exception as e:
+            self.components[name] = {'status': 'failed', 'seconds': round(time.perf_counter() - start, 3), 'error': str(e)}
+            print(f"Warmup of {name} failed: {e}")
+            return
+
+        self.components[name] = {'status': 'ok', 'seconds': round(time.perf_counter() - start, 3)}
+        if details:
+            self.components[name]['details'] = details
+        print(f"Warmed up {name} in {self.components[name]['seconds']}s.")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'ready': self.ready,
+            'warmup_seconds': round(self.finished_at - self.started_at, 3) if self.finished_at is not None else None,
+            'components': self.components
+        }
+
+
+async def warm_embedding_model() -> None:
+    # Creates the ONNX session and runs one batch through it, for documents and for queries
+    model = await asyncio.to_thread(get_embedding_model)
+    await asyncio.to_thread(model.embed_documents, ["warmup"] * WARMUP_BATCH_SIZE)
+    await asyncio.to_thread(model.embed_query, "warmup")
+
+async def warm_vector_store() -> Dict[str, Any]:
+    # Opens the gRPC channel and checks that the index exists and answers
+    # Creating the backend opens the Pinecone client or loads the local store from disk
+    vector_store = await asyncio.to_thread(get_vector_store)
+    await vector_store.aensure_index()
+    return await vector_store.aping()
+
+async def warm_chat_pipeline() -> None:
+    # Builds the retriever and postprocessors once, before the first request
+    await asyncio.to_thread(build_chat_pipeline)
+    get_answer_cache()
+
+async def warm_tokenizers() -> Dict[str, Any]:
+    context_packer = get_context_packer()
+    if context_packer is not None:
+        await asyncio.to_thread(context_packer.count_tokens, "warmup")
+
+    bm25_index = await asyncio.to_thread(get_bm25_index)
+    return {'bm25_documents': len(bm25_index)}
+
+
+WARMUP_STEPS = [
+    ('embedding_model', warm_embedding_model),
+    ('vector_store', warm_vector_store),
+    ('chat_pipeline', warm_chat_pipeline),
+    ('tokenizers', warm_tokenizers)
+]
+
+warmup_state = WarmupState()
+
+async def run_warmup() -> WarmupState:
+    """
+    Warm up every component in order and record the timings in `warmup_state`.
+    """
+    warmup_state.started_at = time.time()
+    for name, step in WARMUP_STEPS:
+        await warmup_state.run_step(name, step)
+
+    warmup_state.finished_at = time.time()
+    print(f"Warmup finished, ready: {warmup_state.ready}.")
+    return warmup_state
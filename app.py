@@ -4,41 +4,25 @@ import asyncio
 import streamlit as st
 from typing import List, Tuple, IO
 from streamlit_extras.bottom_container import bottom
-from functions.save_data_to_json import save_to_json
-from functions.chat_history import display_chat_history, read_chat_history
-from streamlit_api_calls.main import response_from_model, insert_documents_to_database, delete_documents_from_database, load_files_with_images
-from constants.constants import DIRECTORY_PATH
+from functions.chat_history import display_chat_history, load_history_window, load_older_turns, record_turn
+from streamlit_api_calls.main import response_from_model_stream, delete_documents_from_database, submit_loading_job, submit_insert_job, get_job
+from constants.constants import DIRECTORY_PATH, CHAT_HISTORY_PAGE_SIZE
+from text_and_embeddings.chunk_store import METADATA_FILE_NAME, iter_chunk_metadata, embeddings_path_for
 
 extracted_output_folder = os.path.join(DIRECTORY_PATH, 'extracted_output')
 documents_folder = os.path.join(DIRECTORY_PATH, 'documents')
 
 def load_metadata_excluded_files() -> set:
-    metadata_path = os.path.join(DIRECTORY_PATH, 'extracted_output', 'metadata.json')
+    metadata_path = os.path.join(DIRECTORY_PATH, 'extracted_output', METADATA_FILE_NAME)
     excluded_files = set()
     
     if os.path.exists(metadata_path):
         try:
-            # Try reading with UTF-8 encoding first
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-                if isinstance(metadata, list):
-                    for entry in metadata:
-                        if 'metadata' in entry and 'file_name' in entry['metadata']:
-                            # Add the file names to the excluded set
-                            excluded_files.add(entry['metadata']['file_name'])
-                else:
-                    st.warning("Metadata JSON is not a list.")
-        except UnicodeDecodeError:
-            # Fallback to another encoding if UTF-8 fails
-            with open(metadata_path, 'r', encoding='latin-1') as f:
-                metadata = json.load(f)
-                if isinstance(metadata, list):
-                    for entry in metadata:
-                        if 'metadata' in entry and 'file_name' in entry['metadata']:
-                            # Add the file names to the excluded set
-                            excluded_files.add(entry['metadata']['file_name'])
-                else:
-                    st.sidebar.warning("Metadata JSON is not a list.")
+            # Only the metadata is read; the embeddings sidecar is never touched here
+            for entry in iter_chunk_metadata(metadata_path):
+                if 'metadata' in entry and 'file_name' in entry['metadata']:
+                    # Add the file names to the excluded set
+                    excluded_files.add(entry['metadata']['file_name'])
         except json.JSONDecodeError:
             st.sidebar.warning("Error decoding JSON from metadata file.")
     else:
@@ -50,7 +34,7 @@ def delete_local_files(file_names: List[str]):
     """Delete specified files from both 'extracted_output' and 'documents' directories."""
 
     for file_name in file_names:
-        if file_name == 'metadata.json':
+        if file_name in ('metadata.json', METADATA_FILE_NAME, embeddings_path_for(METADATA_FILE_NAME)):
             continue
 
         file_path_extracted = os.path.join(extracted_output_folder, file_name)
@@ -76,24 +60,29 @@ def sidebar():
                 for uploaded_file in uploaded_files
             ]
 
-            # HITTING LOADING FILES API
-            response = load_files_with_images(files)
+            # HITTING LOADING FILES API; extraction runs as a background job
+            response = submit_loading_job(files)
 
             if response:
-                if response.status_code == 200:
-                    st.sidebar.success("Files uploaded successfully")
+                if response.status_code == 202:
+                    st.sidebar.success("Files uploaded, extraction queued")
                     # Store the uploaded files in the session state
                     st.session_state.uploaded_files = files
+                    st.session_state.setdefault('job_ids', []).append(response.json()['job_id'])
                 else:
-                    st.sidebar.error('Error:', response.text)
+                    st.sidebar.error(f"Error: {response.text}")
             else:
                 st.sidebar.error('Failed to upload files.')
 
         # Show Insert Documents to Database button if files are uploaded
         if 'uploaded_files' in st.session_state:
             if st.sidebar.button("Insert Documents to Database"):
-                insert_documents_to_database()
-                st.sidebar.success("Documents inserted into the database successfully.")
+                response = submit_insert_job()
+                if response and response.status_code == 202:
+                    st.session_state.setdefault('job_ids', []).append(response.json()['job_id'])
+                    st.sidebar.success("Insertion queued.")
+                else:
+                    st.sidebar.error(f"Error queueing the insertion: {response.text if response else 'Unknown error'}")
 
             if os.path.exists(extracted_output_folder):
                 # Load metadata to exclude certain files
@@ -148,6 +137,28 @@ def sidebar():
         else:
             st.sidebar.error("The folder 'extracted_output' does not exist.")
 
+def job_status():
+    """Show the status of the jobs submitted in this session; refreshed on every rerun."""
+    job_ids = st.session_state.get('job_ids', [])
+    if not job_ids:
+        return
+
+    st.sidebar.subheader("Jobs")
+    st.sidebar.button("Refresh job status")
+
+    for job_id in reversed(job_ids[-5:]):
+        job = get_job(job_id)
+        if job is None:
+            continue
+
+        stages = ", ".join(
+            f"{stage['name']} ({stage['elapsed_seconds']}s)" if stage['elapsed_seconds'] is not None else f"{stage['name']}..."
+            for stage in job['stages']
+        )
+        st.sidebar.caption(f"{job['kind']}: {job['status']} {stages}")
+        if job['error']:
+            st.sidebar.error(job['error'])
+
 def bottom_container():
     with bottom():      
         user_prompt = st.chat_input("Write a question")
@@ -155,22 +166,17 @@ def bottom_container():
             return user_prompt
 
 def generate_answer(user_prompt):
-    response = response_from_model(user_prompt)
+    response = response_from_model_stream(user_prompt)
 
     if response.status_code == 200:
-        # Process streaming response
-        answer = response.text  # Remove extra whitespace/newlines
-        if answer.startswith('"') and answer.endswith('"'):
-            answer = answer[1:-1]  # Remove the leading and trailing quotes
-
-        answer = answer.replace('\\n', '\n')
+        # Yield tokens as the server streams them
         final_response = ''
-        for i in answer.split(' '):
-            text = i + " "
+        for text in response.iter_content(chunk_size=None, decode_unicode=True):
             yield text
             final_response += text
         
-        save_to_json(user_prompt, final_response)
+        # Saved to the log and appended to the cached history, which is not re-read
+        record_turn(user_prompt, final_response)
 
     else:
         st.error(f"Error: {response.status_code}")
@@ -178,13 +184,18 @@ def generate_answer(user_prompt):
 async def main():
     st.header("GROQ API CHATBOT")
     sidebar()
+    job_status()
     user_prompt = bottom_container()
-    if user_prompt is not None and user_prompt != '':
-        answer = generate_answer(user_prompt)
-        with st.container(border=True, height=500):
-            chat_history = await read_chat_history()
-            display_chat_history(chat_history)
-            
+    # Only the latest turns are rendered; the parsed history is cached in the session
+    history = load_history_window(CHAT_HISTORY_PAGE_SIZE)
+    with st.container(border=True, height=500):
+        if history['has_older'] and st.button("Load older messages"):
+            load_older_turns(CHAT_HISTORY_PAGE_SIZE)
+        display_chat_history(history['turns'])
+
+        if user_prompt is not None and user_prompt != '':
+            answer = generate_answer(user_prompt)
+
             with st.chat_message("HUMAN", avatar='./assets/user.png'):
                 st.markdown(user_prompt)
                 
@@ -0,0 +1,67 @@
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, List
+
+# Modules loaded by the API server (uvicorn apis.main:app) and by the Streamlit UI (app.py
+# imports these before rendering anything)
+TARGETS = {
+    'api': ['apis.main'],
+    'ui': ['constants.constants', 'streamlit_api_calls.main', 'functions.chat_history', 'text_and_embeddings.chunk_store']
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_import(tree: str, modules: List[str]) -> float:
+    """
+    Import `modules` in a fresh interpreter with `tree` as the working directory and return the seconds it took.
+    """
+    code = (
+        "import sys, time; sys.path.insert(0, '.'); start = time.perf_counter(); "
+        + "; ".join(f"import {module}" for module in modules)
+        + "; print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=tree, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {modules} in {tree} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    return float(result.stdout.strip().splitlines()[-1])
+
+def benchmark(tree: str, repeat: int) -> Dict[str, float]:
+    timings = {}
+    for target, modules in TARGETS.items():
+        try:
+            timings[target] = statistics.median(time_import(tree, modules) for _ in range(repeat))
+        except RuntimeError as e:
+            print(e)
+            timings[target] = float('nan')
+    return timings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the import time of the API server and the Streamlit UI.")
+    parser.add_argument('--baseline', help="A git revision to compare against, e.g. HEAD~1")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per target; the median is reported")
+    args = parser.parse_args()
+
+    results = {'current': benchmark(REPO_ROOT, args.repeat)}
+
+    if args.baseline:
+        # Check the baseline out into a temporary worktree so the working tree is left alone
+        worktree = tempfile.mkdtemp(prefix='import-baseline-')
+        try:
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.baseline], cwd=REPO_ROOT, check=True, capture_output=True)
+            results['baseline'] = benchmark(worktree, args.repeat)
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=REPO_ROOT, capture_output=True)
+            shutil.rmtree(worktree, ignore_errors=True)
+
+    print(f"{'target':<8}" + "".join(f"{name:>12}" for name in results))
+    for target in TARGETS:
+        print(f"{target:<8}" + "".join(f"{timings[target]:>11.3f}s" for timings in results.values()))
+
+if __name__ == "__main__":
+    main()
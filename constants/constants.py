@@ -1,27 +1,173 @@
 import os
+import threading
 from dotenv import load_dotenv
-from pinecone.grpc import PineconeGRPC as Pinecone
-from llama_index.llms.groq import Groq
-from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 
 load_dotenv()
 
-PINECONE_CLIENT = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
 PINECONE_INDEX_NAME = 'groqappchatbot'
 PINECONE_NAMESPACE = 'vedant'
-GROQ_CLIENT_LLAMAINDEX = Groq(model="llama-3.3-70b-versatile", api_key=os.environ.get("GROQ_API_KEY"),)
-EMBEDDING_MODEL = FastEmbedEmbeddings()
+GROQ_MODEL_NAME = "llama-3.3-70b-versatile"
+EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+# The Pinecone client, the Groq LLM and the embedding model (which loads an ONNX session) are
+# created on first use through the accessors below, so importing this module stays cheap for
+# the Streamlit app and scripts that never need them.
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _get_client(name: str, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+def _create_pinecone_client():
+    from pinecone.grpc import PineconeGRPC as Pinecone
+
+    return Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+
+def _create_groq_llm():
+    from llama_index.llms.groq import Groq
+
+    return Groq(model=GROQ_MODEL_NAME, api_key=os.environ.get("GROQ_API_KEY"),)
+
+def _create_embedding_model():
+    from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+
+    return FastEmbedEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+def get_pinecone_client():
+    return _get_client('pinecone', _create_pinecone_client)
+
+def get_groq_llm():
+    return _get_client('groq', _create_groq_llm)
+
+def get_embedding_model():
+    return _get_client('embedding', _create_embedding_model)
 
 SIMILARITY_TOP_K = 10
 SIMILARITY_CUTOFF = 0.0
 
+# Answers are cached per normalised question plus the history the LLM sees: the last
+# ANSWER_CACHE_HISTORY_TURNS turns and the rolling summary, so a follow-up like "explain that
+# more" is never answered from another conversation. The semantic tier reuses the answer of a
+# question whose embedding is at least this similar (under the same history); None disables it.
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MAX_ENTRIES = 1000
+ANSWER_CACHE_TTL_SECONDS = 3600
+ANSWER_CACHE_HISTORY_TURNS = 1
+ANSWER_CACHE_SEMANTIC_THRESHOLD = 0.95
+
+# Dense results are fused with BM25 keyword results by reciprocal rank fusion; the fused list is
+# cut to HYBRID_TOP_K, so exact identifiers are found without pulling SIMILARITY_TOP_K chunks
+HYBRID_SEARCH_ENABLED = True
+BM25_TOP_K = 10
+HYBRID_TOP_K = 5
+RRF_K = 60
+
+# Retrieved chunks are merged (consecutive chunks lose their overlap), deduplicated and packed
+# into at most CONTEXT_TOKEN_BUDGET tokens before they are pasted into the prompt
+CONTEXT_PACKER_ENABLED = True
+CONTEXT_TOKEN_BUDGET = 2000
+CONTEXT_DUPLICATE_THRESHOLD = 0.9
+
+# Admission control for Groq calls: at most LLM_MAX_CONCURRENCY run at once, LLM_MAX_QUEUE wait
+# (up to LLM_QUEUE_TIMEOUT_SECONDS) and the rest get a 503. Calls also draw from request and
+# token buckets matched to the Groq plan; a call is estimated as its prompt plus the context
+# budget plus LLM_EXPECTED_OUTPUT_TOKENS. Provider 429s are retried with jittered backoff.
+LLM_ADMISSION_ENABLED = True
+LLM_MAX_CONCURRENCY = 8
+LLM_MAX_QUEUE = 32
+LLM_QUEUE_TIMEOUT_SECONDS = 30
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", 12000))
+LLM_EXPECTED_OUTPUT_TOKENS = 1000
+LLM_MAX_RETRIES = 3
+LLM_RETRY_BACKOFF_SECONDS = 1.0
+
+# Concurrent identical chat requests (same question and history) share one LLM call
+SINGLE_FLIGHT_ENABLED = True
+
+# Top-k results per query embedding; set RETRIEVAL_CACHE_PATH to a file to keep them across restarts
+RETRIEVAL_CACHE_ENABLED = True
+RETRIEVAL_CACHE_MAX_ENTRIES = 2048
+RETRIEVAL_CACHE_PATH = None
+# Question embeddings are shared by the answer cache's semantic tier and the retriever
+QUERY_EMBEDDING_CACHE_SIZE = 256
+
 FILES_INPUT_DIR = 'E:\Codes\Data Sciene\AI\RAG-with-Groq-and-Fastapi\documents'
 FILES_OUTPUT_DIR = 'E:\Codes\Data Sciene\AI\RAG-with-Groq-and-Fastapi\extracted_output'
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 DIRECTORY_PATH = os.path.dirname(current_dir)
 
+# 'pinecone' or 'local' (memory-mapped store under LOCAL_VECTOR_STORE_DIR, no network needed)
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", 'pinecone')
+LOCAL_VECTOR_STORE_DIR = os.path.join(DIRECTORY_PATH, 'vector_store_data')
+EMBEDDING_DIMENSION = 384
+CORPUS_GENERATION_FILE = os.path.join(DIRECTORY_PATH, 'corpus_generation.json')
+BM25_INDEX_PATH = os.path.join(DIRECTORY_PATH, 'bm25_index', f'{PINECONE_NAMESPACE}.json')
+
+# Upserts are sent in batches bounded by count and by payload size (Pinecone caps requests at 2 MB)
+UPSERT_BATCH_SIZE = 100
+UPSERT_MAX_BATCH_BYTES = 2 * 1024 * 1024
+UPSERT_CONCURRENCY = 4
+UPSERT_MAX_RETRIES = 3
+# Pinecone accepts at most 1000 ids per delete call
+DELETE_BATCH_SIZE = 1000
+# Ingestion streams chunks from the split stage to the embed and upsert stages, which run
+# concurrently; at most INGEST_QUEUE_SIZE chunks wait between two stages
+INGEST_QUEUE_SIZE = 512
+INGEST_EMBED_BATCH_SIZE = 64
+# Blocking vector store calls run on their own thread pool, never on the event loop
+VECTOR_STORE_IO_WORKERS = 8
+
+# PDF text extraction runs in a process pool; large PDFs are split into page ranges
+PDF_WORKERS = os.cpu_count() or 1
+PDF_PAGES_PER_TASK = 25
+
+# Uploads are streamed to disk in chunks; this many files are saved and extracted at once
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_PARALLEL_FILES = 4
+
+# Ingestion jobs run in the background and are kept in JOBS_STATE_FILE across restarts
+JOBS_STATE_FILE = os.path.join(DIRECTORY_PATH, 'jobs.json')
+JOB_WORKERS = 1
+JOB_HISTORY_LIMIT = 200
+
+# Chat memory: the last CHAT_HISTORY_TURNS turns are read from the log. In 'summary' mode older
+# turns are folded into a running summary (kept in CHAT_SUMMARY_FILE) and only the turns not in it
+# yet plus the last CHAT_MEMORY_RECENT_TURNS are sent verbatim; 'buffer' sends all of them as they are.
+# The summary is updated after a response once CHAT_SUMMARY_FOLD_AFTER_TURNS turns (fewer than
+# CHAT_HISTORY_TURNS, so none scroll out unfolded) or CHAT_SUMMARY_FOLD_AFTER_TOKENS tokens are
+# not in it, so summarising costs one LLM call every few turns instead of one per turn
+CHAT_MEMORY_MODE = os.environ.get("CHAT_MEMORY_MODE", 'summary')
+CHAT_HISTORY_TURNS = 5
+CHAT_MEMORY_TOKEN_LIMIT = 5000
+CHAT_MEMORY_RECENT_TURNS = 1
+CHAT_SUMMARY_TOKEN_BUDGET = 400
+CHAT_SUMMARY_FOLD_AFTER_TURNS = CHAT_HISTORY_TURNS - 1
+CHAT_SUMMARY_FOLD_AFTER_TOKENS = 1500
+CHAT_SUMMARY_FILE = os.path.join(DIRECTORY_PATH, 'chat_summary.json')
+
+# Embeddings of unchanged chunks are reused across ingestion runs
+EMBEDDING_CACHE_DIR = os.path.join(DIRECTORY_PATH, 'embedding_cache')
+EMBEDDING_CACHE_MAX_ENTRIES = 100000
+
+
+# Texts embedded at startup to create and warm the ONNX session before /readyz reports ready
+WARMUP_BATCH_SIZE = 8
 
 FASTAPI_URL = "http://127.0.0.1:8000"
+# The Streamlit app shows the latest CHAT_HISTORY_PAGE_SIZE turns and loads older ones on demand
+CHAT_HISTORY_PAGE_SIZE = 20
+# The Streamlit client keeps up to HTTP_POOL_SIZE keep-alive connections to FASTAPI_URL;
+# the read timeout is the longest wait for the next bytes of a (streamed) response
+HTTP_POOL_SIZE = 10
+HTTP_CONNECT_TIMEOUT_SECONDS = 5
+HTTP_READ_TIMEOUT_SECONDS = 300
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
\ No newline at end of file
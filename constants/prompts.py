@@ -38,4 +38,18 @@ If multiple images are provided or if only a single image is provided, always us
 Ensure that each description is organized, covering the most important information first, while also including minor details that contribute to a full understanding of the image.
 
 Even if only one image is provided, it should still be described as item 1.
-'''
\ No newline at end of file
+'''
+
+CHAT_SUMMARY_PROMPT = '''You maintain a running summary of a conversation between a user and an assistant that answers questions from a set of documents.
+
+Update the summary below with the new turns. Keep the user's questions, the facts the assistant gave (names, numbers, dates and document references) and anything later questions may refer back to. Drop greetings, repetition and formatting. Write plain prose, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:'''
+
+CHAT_SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
@@ -1,21 +1,78 @@
-import json
-import os
+import asyncio
 from typing import List, Dict
 import streamlit as st
 from llama_index.core.llms import ChatMessage
-
-DATABASE_FILE = os.path.join(os.path.dirname(__file__), '..', 'database.json')
+from functions.chat_store import read_last_turns, chat_log_version
+from functions.save_data_to_json import save_to_json
 
 async def read_chat_history(limit: int = 999999) -> List[Dict[str, str]]:
     try:
-        with open(DATABASE_FILE, 'r') as file:
-            data = json.load(file)
-            # Return the last `limit` entries
-            return data[-limit:]
+        # Return the last `limit` entries, read from the end of the log
+        return await asyncio.to_thread(read_last_turns, limit)
     except FileNotFoundError:
         return []
-    except json.JSONDecodeError:
-        return []
+
+def _history_state() -> Dict:
+    return st.session_state.setdefault('chat_history', {'turns': [], 'version': None, 'has_older': False})
+
+def load_history_window(page_size: int) -> Dict:
+    """
+    Return the cached window of recent turns, re-reading the log only if it changed since the last rerun.
+
+    The window keeps its size when it is reloaded, so turns loaded with `load_older_turns` stay visible.
+
+    Args:
+        page_size (int): How many turns to show initially.
+
+    Returns:
+        Dict: The session's history state: 'turns' in chronological order, the log 'version' and
+            whether older turns exist ('has_older').
+    """
+    state = _history_state()
+
+    try:
+        version = chat_log_version()
+    except FileNotFoundError:
+        return state
+
+    if state['version'] != version:
+        window = max(len(state['turns']), page_size)
+        # One extra turn tells whether there is anything older to load
+        turns = read_last_turns(window + 1)
+        state['has_older'] = len(turns) > window
+        state['turns'] = turns[-window:]
+        state['version'] = version
+
+    return state
+
+def load_older_turns(page_size: int) -> None:
+    """
+    Prepend the `page_size` turns before the current window to the cached history.
+    """
+    state = _history_state()
+
+    older = read_last_turns(page_size + 1, skip=len(state['turns']))
+    state['has_older'] = len(older) > page_size
+    state['turns'] = older[-page_size:] + state['turns']
+
+def record_turn(question: str, answer: str) -> None:
+    """
+    Save a new turn to the chat log and append it to the cached history instead of re-reading the log.
+    """
+    state = _history_state()
+    try:
+        up_to_date = state['version'] is not None and state['version'] == chat_log_version()
+    except FileNotFoundError:
+        up_to_date = False
+
+    save_to_json(question, answer)
+
+    if up_to_date:
+        state['turns'].append({"user": question, "assistant": answer})
+        state['version'] = chat_log_version()
+    else:
+        # Someone else wrote to the log as well; reload the window on the next rerun
+        state['version'] = None
 
 def display_chat_history(chat_history: List[Dict[str, str]]):
     for entry in chat_history:
@@ -0,0 +1,133 @@
+import os
+import json
+import threading
+from typing import List, Dict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAT_LOG_FILE = os.path.join(BASE_DIR, 'database.jsonl')
+LEGACY_DATABASE_FILE = os.path.join(BASE_DIR, 'database.json')
+
+TAIL_BLOCK_SIZE = 8192
+
+_migration_lock = threading.Lock()
+
+
+def migrate_legacy_database() -> None:
+    """
+    One-time migration of the old `database.json` array into the append-only `database.jsonl` log.
+
+    Runs only while the log does not exist yet; the legacy file is left untouched.
+    """
+    if os.path.exists(CHAT_LOG_FILE):
+        return
+
+    with _migration_lock:
+        if os.path.exists(CHAT_LOG_FILE):
+            return
+
+        entries = []
+        if os.path.exists(LEGACY_DATABASE_FILE):
+            try:
+                with open(LEGACY_DATABASE_FILE, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                    if isinstance(data, list):
+                        entries = data
+            except json.JSONDecodeError:
+                entries = []
+
+        # Write to a temporary file first so a crash never leaves a half-migrated log
+        tmp_path = CHAT_LOG_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, CHAT_LOG_FILE)
+
+        if entries:
+            print(f"Migrated {len(entries)} chat turns from {LEGACY_DATABASE_FILE} to {CHAT_LOG_FILE}.")
+
+
+def append_turn(question: str, answer: str) -> None:
+    """
+    Append one question/answer turn to the chat log.
+
+    The line is written with a single O_APPEND write, so concurrent writers never interleave
+    or truncate each other's records.
+
+    Args:
+        question (str): The user's message.
+        answer (str): The assistant's reply.
+    """
+    migrate_legacy_database()
+
+    line = json.dumps({"user": question, "assistant": answer}, ensure_ascii=False) + '\n'
+
+    fd = os.open(CHAT_LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def chat_log_version() -> tuple:
+    """
+    Return a cheap fingerprint of the chat log (size and modification time) that changes with every appended turn.
+    """
+    migrate_legacy_database()
+
+    stat = os.stat(CHAT_LOG_FILE)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def read_last_turns(limit: int, skip: int = 0) -> List[Dict[str, str]]:
+    """
+    Read the last `limit` turns of the chat log without loading the whole file.
+
+    The file is read backwards in blocks until enough complete lines have been seen.
+
+    Args:
+        limit (int): The maximum number of turns to return.
+        skip (int): The number of most recent turns to leave out, for paging further back.
+
+    Returns:
+        List[Dict[str, str]]: The turns in chronological order.
+    """
+    migrate_legacy_database()
+
+    wanted = limit + skip
+    if limit <= 0:
+        return []
+
+    with open(CHAT_LOG_FILE, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        blocks = []
+        newlines = 0
+
+        # One extra newline is needed so the first kept line is known to be complete
+        while position > 0 and newlines <= wanted:
+            read_size = min(TAIL_BLOCK_SIZE, position)
+            position -= read_size
+            file.seek(position)
+            block = file.read(read_size)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+
+    lines = b''.join(reversed(blocks)).splitlines()
+    if position > 0:
+        # The first line may start before the block we read
+        lines = lines[1:]
+
+    lines = lines[-wanted:]
+    if skip:
+        lines = lines[:-skip]
+
+    turns = []
+    for line in lines:
+        try:
+            turns.append(json.loads(line))
+        except json.JSONDecodeError:
+            # Skip a torn line rather than losing the whole history
+            continue
+
+    return turns
+
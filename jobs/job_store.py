@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import uuid
+import threading
+from typing import Any, Dict, List, Optional
+
+# A job moves from queued to running to succeeded or failed; jobs found running after a
+# restart are queued again.
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobStore:
+    """
+    Job records kept in memory and persisted to a JSON file after every change.
+
+    Args:
+        path (str): The JSON file the jobs are stored in.
+        history_limit (int): How many finished jobs are kept; older ones are dropped.
+    """
+
+    def __init__(self, path: str, history_limit: int):
+        self.path = path
+        self.history_limit = history_limit
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    self._jobs = {job['id']: job for job in json.load(file)}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable job state {path}: {e}")
+
+    def create(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'params': params,
+            'status': QUEUED,
+            'attempts': 0,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'stages': [],
+            'result': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+
+        return dict(job)
+
+    def update(self, job_id: str, **fields: Any) -> Dict[str, Any]:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            return dict(job)
+
+    def start_stage(self, job_id: str, name: str) -> None:
+        """
+        Finish the running stage of a job, if any, and start the next one.
+        """
+        now = time.time()
+        with self._lock:
+            stages = self._jobs[job_id]['stages']
+            if stages and stages[-1]['status'] == RUNNING:
+                stages[-1].update(status=SUCCEEDED, finished_at=now, elapsed_seconds=round(now - stages[-1]['started_at'], 3))
+            stages.append({'name': name, 'status': RUNNING, 'started_at': now, 'finished_at': None, 'elapsed_seconds': None})
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Mark a job and its running stage as succeeded or failed.
+        """
+        now = time.time()
+        with self._lock:
+            job = self._jobs[job_id]
+            stages = job['stages']
+            if stages and stages[-1]['status'] == RUNNING:
+                stages[-1].update(status=status, finished_at=now, elapsed_seconds=round(now - stages[-1]['started_at'], 3))
+
+            job.update(status=status, finished_at=now, result=result, error=error)
+            if job['started_at'] is not None:
+                job['elapsed_seconds'] = round(now - job['started_at'], 3)
+
+            self._prune()
+            return dict(job)
+
+    def _prune(self) -> None:
+        finished = sorted((job for job in self._jobs.values() if job['status'] in FINISHED), key=lambda job: job['finished_at'])
+        for job in finished[:max(0, len(finished) - self.history_limit)]:
+            del self._jobs[job['id']]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Return the most recent jobs first, optionally only those with the given status.
+        """
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if status is None or job['status'] == status]
+            jobs.sort(key=lambda job: job['created_at'], reverse=True)
+            return json.loads(json.dumps(jobs[:limit]))
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """
+        Return the queued and running jobs, oldest first.
+        """
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values() if job['status'] not in FINISHED]
+            return sorted(jobs, key=lambda job: job['created_at'])
+
+    def save(self) -> None:
+        # The snapshot is taken while holding the save lock, so concurrent saves can never
+        # write an older state over a newer one
+        with self._save_lock:
+            with self._lock:
+                data = json.dumps(list(self._jobs.values()), ensure_ascii=False)
+
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(data)
+            os.replace(tmp_path, self.path)
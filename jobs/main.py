@@ -0,0 +1,160 @@
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+sys.path.append('../')
+from jobs.job_store import JobStore, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+# A runner executes one kind of job; it reports each stage it starts through `on_stage`
+Runner = Callable[[Dict[str, Any], Callable[[str], None]], Awaitable[Any]]
+
+
+async def run_extract(job: Dict[str, Any], on_stage: Callable[[str], None]) -> Dict[str, Any]:
+    from loaders.main import process_files
+
+    on_stage('extract')
+    await process_files()
+    return {'message': 'Files processed successfully'}
+
+async def run_insert(job: Dict[str, Any], on_stage: Callable[[str], None]) -> Dict[str, Any]:
+    from CRUD.insert_records import upsert_data
+
+    return await upsert_data(on_stage=on_stage)
+
+async def run_ingest(job: Dict[str, Any], on_stage: Callable[[str], None]) -> Dict[str, Any]:
+    await run_extract(job, on_stage)
+    return await run_insert(job, on_stage)
+
+RUNNERS: Dict[str, Runner] = {
+    'extract': run_extract,
+    'insert': run_insert,
+    'ingest': run_ingest
+}
+
+
+class JobQueue:
+    """
+    Runs ingestion jobs in the background on a pool of asyncio workers.
+
+    Jobs are persisted in a JobStore, so a restart picks up the jobs that were queued or
+    interrupted while running. Every job runs the stages of its runner in order and records
+    the timing of each one.
+
+    Args:
+        store (JobStore): Where the jobs are kept.
+        workers (int): How many jobs run at the same time.
+        runners (Dict[str, Runner]): The runner of every job kind.
+    """
+
+    def __init__(self, store: JobStore, workers: int, runners: Dict[str, Runner]):
+        self.store = store
+        self.workers = workers
+        self.runners = runners
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # All runners work on the shared documents/extracted_output folders and chunk metadata
+        # file, so their pipelines never overlap; extra workers only pick up the next job sooner
+        self._pipeline_lock: Optional[asyncio.Lock] = None
+        self._saves: Set[asyncio.Task] = set()
+
+    async def _persist(self) -> None:
+        await asyncio.to_thread(self.store.save)
+
+    async def start(self) -> None:
+        """
+        Start the workers and queue the jobs left over from the previous run.
+        """
+        self._queue = asyncio.Queue()
+        self._pipeline_lock = asyncio.Lock()
+
+        for job in self.store.unfinished():
+            if job['status'] == RUNNING:
+                print(f"Job {job['id']} was interrupted by a restart, queueing it again.")
+                self.store.update(job['id'], status=QUEUED, stages=[])
+            self._queue.put_nowait(job['id'])
+        await self._persist()
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Cancel the workers; running jobs stay marked as running and are resumed on the next start.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Queue a job and return its record right away.
+
+        Raises:
+            ValueError: If there is no runner for `kind`.
+        """
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of {sorted(self.runners)}")
+
+        job = self.store.create(kind, params or {})
+        await self._persist()
+        self._queue.put_nowait(job['id'])
+        return job
+
+    async def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None or job['status'] != QUEUED:
+            return
+
+        def on_stage(name: str) -> None:
+            self.store.start_stage(job_id, name)
+            print(f"Job {job_id} ({job['kind']}): {name}")
+
+            # Persist the transition in the background; runners report stages synchronously
+            save = asyncio.get_running_loop().create_task(self._persist())
+            self._saves.add(save)
+            save.add_done_callback(self._saves.discard)
+
+        async with self._pipeline_lock:
+            job = self.store.update(job_id, status=RUNNING, attempts=job['attempts'] + 1, started_at=time.time())
+            await self._persist()
+
+            try:
+                result = await self.runners[job['kind']](job, on_stage)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                self.store.finish(job_id, FAILED, error=str(e))
+            else:
+                self.store.finish(job_id, SUCCEEDED, result=result)
+
+        await self._persist()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """
+    Return the shared job queue, creating it on first use. Call `start()` on it from the API lifespan.
+    """
+    global _job_queue
+
+    from constants.constants import JOBS_STATE_FILE, JOB_WORKERS, JOB_HISTORY_LIMIT
+
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(JobStore(JOBS_STATE_FILE, JOB_HISTORY_LIMIT), JOB_WORKERS, RUNNERS)
+
+        return _job_queue
@@ -1,54 +1,57 @@
 import os
-import fitz
+import sys
+import asyncio
+import aiofiles
 from fastapi import UploadFile
-from typing import List
-import io
+from typing import List, Optional
+sys.path.append('../')
+from constants.constants import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_PARALLEL_FILES
+from loaders.pdf_loader import extract_pdf_to_text
 
 # Define the paths for the two different folders
 base_path = os.path.dirname(os.path.dirname(__file__))
 extracted_output_path = os.path.join(base_path, 'extracted_output')
 documents_folder = os.path.join(base_path, 'documents')
 
-async def process_and_save_files(files: List[UploadFile]):
-    saved_text_files = []
+async def save_and_extract(file: UploadFile, semaphore: asyncio.Semaphore) -> Optional[str]:
+    """
+    Stream one upload to the documents folder and, for PDFs, extract its text.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        semaphore (asyncio.Semaphore): Limits how many files are processed at once.
+
+    Returns:
+        Optional[str]: The path of the extracted text file, or None if the file is not a PDF.
+    """
+    async with semaphore:
+        # Save the uploaded file to the documents folder chunk by chunk
+        document_file_path = os.path.join(documents_folder, file.filename)
+        async with aiofiles.open(document_file_path, 'wb') as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+
+        # Process only PDF files for text extraction
+        if not file.filename.lower().endswith('.pdf'):
+            return None
+
+        # Create a text file with the same name as the PDF, saved to extracted_output_path;
+        # pages are written to it one by one in the PDF worker pool
+        txt_filename = os.path.join(extracted_output_path, file.filename.rsplit('.', 1)[0] + '.txt')
+        await extract_pdf_to_text(document_file_path, txt_filename)
 
+        return txt_filename
+
+async def process_and_save_files(files: List[UploadFile]):
     # Create the folders if they do not exist
     os.makedirs(extracted_output_path, exist_ok=True)
     os.makedirs(documents_folder, exist_ok=True)
 
-    
-    for file in files:
-        # Save the uploaded file to the documents folder
-        document_file_path = os.path.join(documents_folder, file.filename)
-        with open(document_file_path, 'wb') as f:
-            file_content = await file.read()
-            f.write(file_content)
-        
-        # Process only PDF files for text extraction
-        if file.filename.lower().endswith('.pdf'):
-            # Create an in-memory file object
-            pdf_file = io.BytesIO(file_content)
-            
-            # Open the PDF with PyMuPDF
-            doc = fitz.open(stream=pdf_file, filetype="pdf")
-            
-            # Initialize an empty string to accumulate text
-            full_text = ""
-            
-            # Extract text from each page
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                full_text += page.get_text()
-            
-            # Create a text file with the same name as the PDF, saved to extracted_output_path
-            txt_filename = os.path.join(extracted_output_path, file.filename.rsplit('.', 1)[0] + '.txt')
-            with open(txt_filename, 'w', encoding='utf-8') as txt_file:
-                txt_file.write(full_text)
-            
-            # Track the path of the saved text file
-            saved_text_files.append(txt_filename)
-            
-            # Close the document
-            doc.close()
-    
-    return saved_text_files
\ No newline at end of file
+    # Files are handled concurrently, at most UPLOAD_MAX_PARALLEL_FILES at a time
+    semaphore = asyncio.Semaphore(UPLOAD_MAX_PARALLEL_FILES)
+    results = await asyncio.gather(*(save_and_extract(file, semaphore) for file in files))
+
+    # Track the paths of the saved text files
+    saved_text_files = [txt_filename for txt_filename in results if txt_filename is not None]
+
+    return saved_text_files
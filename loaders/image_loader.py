@@ -85,7 +85,7 @@ async def generate_descriptions_for_images(input_directory, output_directory):
             print(f"Description saved to {output_file_path}")
 
     except Exception as e:
-        print(f"An error occurred: {e}")
+        raise RuntimeError(f"Failed to describe images in {input_directory}: {e}") from e
 
 # Example usage of the async function
 # async def main():
@@ -46,42 +46,48 @@ async def process_files():
     Args:
         input_dir (str): The directory containing files to process.
         output_dir (str): The directory to save the output files.
+
+    Raises:
+        RuntimeError: If any of the loaders failed; the message names each failed loader and its
+            error. The other loaders still run to completion.
     """
     # Ensure the output directory exists
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    try:
-        # List all files in the input directory
-        files = os.listdir(input_dir)
-        pdf_files = [f for f in files if f.lower().endswith('.pdf')]
-        text_files = [f for f in files if f.lower().endswith('.txt') or f.lower().endswith('.doc')]
-        image_files = [f for f in files if f.lower().endswith('.png') or f.lower().endswith('.jpeg')]
-
-        # Create a list of tasks for processing
-        tasks = []
-
-        # Process PDF files
-        if image_files:
-            print("Processing image files...")
-            tasks.append(generate_descriptions_for_images(input_dir, output_dir))
-            
-        if pdf_files:
-            print("Processing PDF files...")
-            tasks.append(pdfLoader(input_dir=input_dir, output_dir=output_dir))
-
-        # Process .txt and .doc files
-        if text_files:
-            print("Processing text and doc files...")
-            tasks.append(llamaparser(input_dir=input_dir, output_dir=output_dir))
-        
-        # Await all tasks
-        await asyncio.gather(*tasks)
-
-        print(f"Processing complete. Output files are located in '{output_dir}'.")
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    # List all files in the input directory
+    files = os.listdir(input_dir)
+    pdf_files = [f for f in files if f.lower().endswith('.pdf')]
+    text_files = [f for f in files if f.lower().endswith('.txt') or f.lower().endswith('.doc')]
+    image_files = [f for f in files if f.lower().endswith('.png') or f.lower().endswith('.jpeg')]
+
+    # Create the processing tasks, keyed by the kind of file they handle
+    tasks = {}
+
+    # Process image files
+    if image_files:
+        print("Processing image files...")
+        tasks['images'] = generate_descriptions_for_images(input_dir, output_dir)
+
+    # Process PDF files
+    if pdf_files:
+        print("Processing PDF files...")
+        tasks['pdf'] = pdfLoader(input_dir=input_dir, output_dir=output_dir)
+
+    # Process .txt and .doc files
+    if text_files:
+        print("Processing text and doc files...")
+        tasks['text'] = llamaparser(input_dir=input_dir, output_dir=output_dir)
+
+    # Await all tasks; one failing loader does not stop the others
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    failures = [(name, result) for name, result in zip(tasks, results) if isinstance(result, BaseException)]
+    if failures:
+        details = "; ".join(f"{name}: {error}" for name, error in failures)
+        raise RuntimeError(f"Processing failed for {len(failures)} of {len(tasks)} loaders: {details}") from failures[0][1]
+
+    print(f"Processing complete. Output files are located in '{output_dir}'.")
 
 if __name__ == "__main__":
     asyncio.run(process_files())
@@ -1,30 +1,129 @@
 import asyncio
 import os
+import sys
+import time
+import shutil
+import threading
+import multiprocessing
 import fitz
+from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append('../')
+from constants.constants import PDF_WORKERS, PDF_PAGES_PER_TASK
 
-async def process_page(doc: fitz.Document, page_num: int) -> str:
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """
+    Return the process pool used for PDF extraction, creating it on first use.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool with PDF_WORKERS processes.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers start from a fresh interpreter instead of forking the server with its
+            # threads, event loop and open connections; they only import this module, and constants.py
+            # creates its clients lazily, so a worker starts cheaply
+            _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+        return _executor
+
+def count_pages(pdf_path: str) -> int:
+    """
+    Return the number of pages of a PDF.
+    """
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+def extract_page_range(pdf_path: str, start: int, stop: int, output_path: str) -> int:
     """
-    Process a single page of the PDF to extract text.
+    Extract the text of pages [start, stop) of a PDF and write it page by page to `output_path`.
+
+    Runs in a worker process. Pages are separated by a newline, so concatenating the outputs
+    of consecutive ranges gives the text of the whole document.
 
     Args:
-        doc (fitz.Document): The PDF document object.
-        page_num (int): The page number to be processed.
+        pdf_path (str): The path to the PDF file.
+        start (int): The first page number to extract.
+        stop (int): The page number after the last one to extract.
+        output_path (str): The file the text is written to.
 
     Returns:
-        str: The extracted text of the page.
+        int: The number of pages extracted.
 
     Raises:
         RuntimeError: If there is an error during the page processing.
     """
-    try:
-        page = doc.load_page(page_num)
-        text = page.get_text()
-        return text
+    with fitz.open(pdf_path) as doc, open(output_path, "w", encoding="utf-8") as output_file:
+        for page_num in range(start, stop):
+            try:
+                text = doc.load_page(page_num).get_text()
+            except (ValueError, TypeError, AttributeError, IndexError) as e:
+                raise RuntimeError(f"Error processing page {page_num + 1}: {e}") from e
+
+            if page_num > 0:
+                output_file.write("\n")
+            output_file.write(text)
+
+    return stop - start
+
+def page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+def concatenate_parts(part_paths: List[str], output_path: str) -> None:
+    """
+    Stream the part files into `output_path` in order and remove them.
+    """
+    with open(output_path, "wb") as output_file:
+        for part_path in part_paths:
+            with open(part_path, "rb") as part_file:
+                shutil.copyfileobj(part_file, output_file)
+            os.remove(part_path)
 
-    except (ValueError, TypeError, AttributeError, IndexError) as e:
-        raise RuntimeError(f"Error processing page {page_num + 1}: {e}") from e
+async def extract_pdf_to_text(pdf_path: str, output_path: str) -> int:
+    """
+    Extract the text of a PDF into `output_path` using the process pool.
+
+    The document is split into ranges of PDF_PAGES_PER_TASK pages that are extracted in parallel,
+    each streamed to its own part file, then concatenated without holding the text in memory.
+
+    Args:
+        pdf_path (str): The path to the PDF file.
+        output_path (str): The text file to write.
+
+    Returns:
+        int: The number of pages extracted.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+
+    page_count = await loop.run_in_executor(executor, count_pages, pdf_path)
+    ranges = page_ranges(page_count, PDF_PAGES_PER_TASK)
+
+    if len(ranges) <= 1:
+        # Small documents go straight to the output file
+        start, stop = ranges[0] if ranges else (0, 0)
+        return await loop.run_in_executor(executor, extract_page_range, pdf_path, start, stop, output_path)
 
-async def process_pdf(pdf_path: str, output_dir: str) -> str:
+    part_paths = [f"{output_path}.part{i}" for i in range(len(ranges))]
+    try:
+        pages = await asyncio.gather(*(
+            loop.run_in_executor(executor, extract_page_range, pdf_path, start, stop, part_path)
+            for (start, stop), part_path in zip(ranges, part_paths)
+        ))
+        await asyncio.to_thread(concatenate_parts, part_paths, output_path)
+    finally:
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    return sum(pages)
+
+async def process_pdf(pdf_path: str, output_dir: str) -> Tuple[str, int]:
     """
     Extract text from a PDF and save it to a .txt file in the specified output directory.
 
@@ -33,43 +132,28 @@ async def process_pdf(pdf_path: str, output_dir: str) -> str:
         output_dir (str): The directory to save the output text file.
 
     Returns:
-        str: The path to the output text file with the extracted text.
+        Tuple[str, int]: The path to the output text file with the extracted text, and the number of pages.
 
     Raises:
         RuntimeError: If there is an error during the PDF processing.
     """
-    try:
-        doc = fitz.open(pdf_path)
-        tasks = [process_page(doc, page_num) for page_num in range(len(doc))]
-        modified_content = []
-
-        # Process pages in batches to manage async tasks efficiently
-        for i in range(0, len(tasks), 5):
-            batch = tasks[i:i + 5]
-            page_texts = await asyncio.gather(*batch)
-            modified_content.extend(page_texts)
-
-        final_text = "\n".join(modified_content)
-        file_name = os.path.basename(pdf_path).replace(".pdf", ".txt")
-        output_path = os.path.join(output_dir, file_name)
-
-        try:
-            # Write the final text to an output file
-            with open(output_path, "w", encoding="utf-8") as output_file:
-                output_file.write(final_text)
+    file_name = os.path.basename(pdf_path).replace(".pdf", ".txt")
+    output_path = os.path.join(output_dir, file_name)
 
-        except IOError as e:
-            raise IOError(f"Error writing to output file: {e}") from e
-
-        return output_path
+    try:
+        pages = await extract_pdf_to_text(pdf_path, output_path)
+        return output_path, pages
 
-    except (ValueError, IOError, TypeError) as e:
+    except (ValueError, IOError, TypeError, RuntimeError) as e:
         raise RuntimeError(f"Failed to process PDF {pdf_path}: {e}") from e
 
 async def process_directory(input_dir: str, output_dir: str):
     """
     Process all PDF files in the input directory and save the output text files in the output directory.
 
+    All documents are submitted to the process pool at once, so pages of different PDFs are
+    extracted in parallel.
+
     Args:
         input_dir (str): The directory containing PDF files to process.
         output_dir (str): The directory to save the output text files.
@@ -79,12 +163,19 @@ async def process_directory(input_dir: str, output_dir: str):
         os.makedirs(output_dir)
 
     pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
+
+    start = time.perf_counter()
     tasks = [process_pdf(os.path.join(input_dir, pdf_file), output_dir) for pdf_file in pdf_files]
 
     # Process all PDF files
-    output_paths = await asyncio.gather(*tasks)
+    results = await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - start
+    total_pages = sum(pages for _, pages in results)
+    pages_per_second = total_pages / elapsed if elapsed > 0 else 0.0
 
-    print(f"Processed {len(output_paths)} PDFs. Output files are located in '{output_dir}'.")
+    print(f"Processed {len(results)} PDFs ({total_pages} pages) in {elapsed:.2f}s, "
+          f"{pages_per_second:.1f} pages/s with {PDF_WORKERS} workers. Output files are located in '{output_dir}'.")
 
 async def pdfLoader(input_dir: str, output_dir: str):
     """
@@ -0,0 +1,210 @@
+import time
+import random
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional
+
+
+class Overloaded(Exception):
+    """
+    Raised when an LLM call is not admitted; maps to an HTTP error with a Retry-After header.
+
+    Args:
+        message (str): The reason the call was rejected.
+        retry_after (float): Seconds after which the client may retry.
+        status_code (int): 503 when the wait queue is full, 429 when the rate limit is exhausted.
+    """
+
+    def __init__(self, message: str, retry_after: float, status_code: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Tell whether an exception from the LLM client is a provider 429.
+    """
+    if getattr(error, 'status_code', None) == 429:
+        return True
+    return type(error).__name__ == 'RateLimitError'
+
+
+def retry_after_from(error: Exception) -> Optional[float]:
+    """
+    Read the Retry-After header of a provider 429, if the client exposes the response.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at `per_minute` units per minute.
+
+    Args:
+        per_minute (float): The refill rate, e.g. the provider's requests or tokens per minute.
+        capacity (Optional[float]): The burst size; defaults to one minute worth of units.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float, max_wait: float) -> None:
+        """
+        Take `amount` units, sleeping until they are available.
+
+        Raises:
+            Overloaded: If the units would not be available within `max_wait` seconds.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            wait = max(0.0, (amount - self.available) / self.rate)
+            if wait > max_wait:
+                raise Overloaded("LLM rate limit reached, try again later.", retry_after=wait, status_code=429)
+
+            # Reserve the units now; the balance goes negative until the refill catches up
+            self.available -= amount
+
+        if wait:
+            await asyncio.sleep(wait)
+
+    def refund(self, amount: float) -> None:
+        """
+        Give back units taken by `acquire` for a call that was rejected before it was made.
+        """
+        self._refill()
+        self.available = min(self.capacity, self.available + min(amount, self.capacity))
+
+
+class LLMAdmission:
+    """
+    Admission control for outbound LLM calls.
+
+    At most `max_concurrency` calls run at once and at most `max_queue` wait for a slot; callers
+    beyond that are rejected right away (503). Admitted calls also draw from request and token
+    buckets matched to the provider's per-minute limits, and provider 429s are retried with
+    jittered exponential backoff before being passed on to the client as a 429.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_retries: int,
+        backoff_seconds: float = 1.0
+    ):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+
+        self.waiting = 0
+        self.running = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_rate_limited = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncGenerator[None, None]:
+        """
+        Hold a concurrency slot and the rate budget of one LLM call.
+
+        Raises:
+            Overloaded: If the queue is full, no slot frees up within `queue_timeout`, or the rate limit is exhausted.
+        """
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise Overloaded("Too many requests are waiting for the LLM, try again later.",
+                                 retry_after=self.queue_timeout, status_code=503)
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_queue_full += 1
+                raise Overloaded("Timed out waiting for the LLM, try again later.",
+                                 retry_after=self.queue_timeout, status_code=503)
+            finally:
+                self.waiting -= 1
+
+        self.running += 1
+        try:
+            try:
+                await self._requests.acquire(1, max_wait=self.queue_timeout)
+            except Overloaded:
+                self.rejected_rate_limited += 1
+                raise
+            try:
+                await self._tokens.acquire(estimated_tokens, max_wait=self.queue_timeout)
+            except Overloaded:
+                # The call is not made, so it must not count against the request budget
+                self._requests.refund(1)
+                self.rejected_rate_limited += 1
+                raise
+
+            self.admitted += 1
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    async def with_retries(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await `fn()`, retrying provider 429s with jittered exponential backoff.
+
+        Raises:
+            Overloaded: If the provider still answers 429 after `max_retries` retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+
+                delay = retry_after_from(e) or self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5)
+                if attempt == self.max_retries:
+                    self.rejected_rate_limited += 1
+                    raise Overloaded("The LLM provider is rate limiting requests, try again later.",
+                                     retry_after=delay, status_code=429) from e
+
+                self.retries += 1
+                print(f"LLM rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}).")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'waiting': self.waiting,
+            'running': self.running,
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_rate_limited': self.rejected_rate_limited,
+            'retries': self.retries
+        }
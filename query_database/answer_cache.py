@@ -0,0 +1,172 @@
+import re
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from vector_store.main import get_corpus_generation
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalise a question for cache lookups: lowercase, collapsed whitespace, no trailing punctuation.
+    """
+    return re.sub(r'\s+', ' ', query).strip().lower().rstrip('?!. ')
+
+
+def history_fingerprint(chat_history: List, turns: int) -> str:
+    """
+    Hash the last `turns` question/answer turns of a ChatMessage history, plus any system
+    messages in it (the rolling summary of older turns).
+
+    Args:
+        chat_history (List): The ChatMessage history passed to the chat engine.
+        turns (int): How many trailing turns make an answer history-dependent; 0 ignores history.
+    """
+    if turns <= 0:
+        return ''
+
+    summary = [message for message in chat_history if message.role == 'system']
+    recent = [message for message in chat_history if message.role != 'system'][-2 * turns:]
+
+    sha256 = hashlib.sha256()
+    for message in summary + recent:
+        sha256.update(f"{message.role}\0{message.content}\0".encode('utf-8'))
+    return sha256.hexdigest()
+
+
+class AnswerCache:
+    """
+    An in-process cache of chat answers with an exact and an optional semantic tier.
+
+    The exact tier is keyed on the normalised question plus a fingerprint of the recent history.
+    The semantic tier reuses an answer whose question embedding is within a cosine threshold of the
+    new one (and has the same history fingerprint). Entries expire after a TTL, the least recently
+    used are evicted past `max_entries`, and everything is dropped when the corpus generation changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        history_turns: int,
+        semantic_threshold: Optional[float] = None,
+        embed_query: Optional[Callable[[str], Awaitable[List[float]]]] = None
+    ):
+        """
+        Args:
+            max_entries (int): The maximum number of cached answers.
+            ttl_seconds (float): How long an answer stays valid.
+            history_turns (int): How many trailing history turns are part of the key.
+            semantic_threshold (Optional[float]): The minimum cosine similarity for a semantic hit; None disables the tier.
+            embed_query (Optional[Callable[[str], Awaitable[List[float]]]]): Embeds a question for the semantic tier.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.history_turns = history_turns
+        self.semantic_threshold = semantic_threshold if embed_query is not None else None
+        self.embed_query = embed_query
+
+        # key -> {'answer', 'embedding', 'history', 'created'}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._generation = get_corpus_generation()
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_generation(self) -> None:
+        generation = get_corpus_generation()
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+            self.invalidations += 1
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.monotonic() - entry['created'] > self.ttl_seconds
+
+    async def lookup(self, query: str, chat_history: List) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Look up a cached answer.
+
+        Returns:
+            Tuple[Optional[str], Dict[str, Any]]: The cached answer (or None), and the lookup state to
+                pass to `store` once the answer has been generated.
+        """
+        history = history_fingerprint(chat_history, self.history_turns)
+        key = hashlib.sha256(f"{normalize_query(query)}\0{history}".encode('utf-8')).hexdigest()
+        state = {'key': key, 'history': history, 'embedding': None, 'generation': get_corpus_generation()}
+
+        with self._lock:
+            self._check_generation()
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry['answer'], state
+
+        if self.semantic_threshold is not None:
+            embedding = np.asarray(await self.embed_query(query), dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            state['embedding'] = embedding / norm if norm else embedding
+
+            with self._lock:
+                self._check_generation()
+                candidates = [
+                    (candidate_key, candidate) for candidate_key, candidate in self._entries.items()
+                    if candidate['embedding'] is not None and candidate['history'] == history and not self._expired(candidate)
+                ]
+                if candidates:
+                    similarities = np.stack([candidate['embedding'] for _, candidate in candidates]) @ state['embedding']
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.semantic_threshold:
+                        best_key, best_entry = candidates[best]
+                        self._entries.move_to_end(best_key)
+                        self.semantic_hits += 1
+                        return best_entry['answer'], state
+
+        with self._lock:
+            self.misses += 1
+
+        return None, state
+
+    def store(self, state: Dict[str, Any], answer: str) -> None:
+        """
+        Cache a generated answer under the key computed by `lookup`.
+
+        Answers generated while the corpus changed are not cached.
+        """
+        with self._lock:
+            self._check_generation()
+            if state['generation'] != self._generation:
+                return
+
+            self._entries[state['key']] = {
+                'answer': answer,
+                'embedding': state['embedding'],
+                'history': state['history'],
+                'created': time.monotonic()
+            }
+            self._entries.move_to_end(state['key'])
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,155 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from llama_index.core.utils import get_tokenizer
+from vector_store.bm25 import tokenize
+
+CHUNK_ID_PATTERN = re.compile(r'^(.*)#chunk_(\d+)$')
+
+
+def split_chunk_id(node_id: str) -> Tuple[str, Optional[int]]:
+    """
+    Split a chunk id like 'Report.txt#chunk_3' into its file part and chunk number.
+
+    Ids that do not follow the TextSplitter scheme return (node_id, None).
+    """
+    match = CHUNK_ID_PATTERN.match(node_id)
+    if match is None:
+        return node_id, None
+    return match.group(1), int(match.group(2))
+
+
+def join_overlapping(first: str, second: str, max_overlap: int) -> str:
+    """
+    Join two consecutive chunks, dropping the text the second one repeats from the end of the first.
+    """
+    for size in range(min(len(first), len(second), max_overlap), 0, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + "\n" + second
+
+
+def containment(terms: Set[str], kept: Set[str]) -> float:
+    """
+    Return the share of `terms` that also occur in `kept`, so a chunk repeated inside a longer one counts as a duplicate.
+    """
+    if not terms:
+        return 1.0
+    return len(terms & kept) / len(terms)
+
+
+class ContextPacker(BaseNodePostprocessor):
+    """
+    Assemble the retrieved chunks into the context that is sent to the LLM.
+
+    Consecutive chunks of the same file are merged and their overlap removed, near-duplicate
+    chunks are dropped, and the rest is ordered by score and packed greedily until the token
+    budget is reached. Token counts before and after packing are kept for the metrics endpoint.
+    """
+
+    token_budget: int
+    max_overlap: int = 200
+    duplicate_threshold: float = 0.9
+
+    _tokenizer: Callable[[str], List] = PrivateAttr()
+    _lock: Any = PrivateAttr()
+    _stats: Dict[str, int] = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._tokenizer = get_tokenizer()
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'tokens_in': 0, 'tokens_out': 0, 'chunks_in': 0, 'chunks_out': 0}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ContextPacker"
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._tokenizer(text))
+
+    def _merge_adjacent(self, nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+        groups: Dict[str, List[Tuple[int, NodeWithScore]]] = {}
+        merged = []
+        for result in nodes:
+            file_part, chunk_number = split_chunk_id(result.node.node_id)
+            if chunk_number is None:
+                merged.append(result)
+            else:
+                groups.setdefault(file_part, []).append((chunk_number, result))
+
+        for file_part, chunks in groups.items():
+            chunks.sort(key=lambda item: item[0])
+
+            run_start, run = chunks[0][0], [chunks[0][1]]
+            previous = chunks[0][0]
+            for chunk_number, result in chunks[1:] + [(None, None)]:
+                if chunk_number is not None and chunk_number == previous + 1:
+                    run.append(result)
+                    previous = chunk_number
+                    continue
+
+                if len(run) == 1:
+                    merged.append(run[0])
+                else:
+                    text = run[0].node.get_content()
+                    for part in run[1:]:
+                        text = join_overlapping(text, part.node.get_content(), self.max_overlap)
+                    node = TextNode(
+                        id_=f"{file_part}#chunk_{run_start}-{previous}",
+                        text=text,
+                        metadata=run[0].node.metadata
+                    )
+                    merged.append(NodeWithScore(node=node, score=max(part.score or 0.0 for part in run)))
+
+                if chunk_number is not None:
+                    run_start, run, previous = chunk_number, [result], chunk_number
+
+        return merged
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None
+    ) -> List[NodeWithScore]:
+        tokens_in = sum(self.count_tokens(result.node.get_content()) for result in nodes)
+
+        candidates = sorted(self._merge_adjacent(nodes), key=lambda result: result.score or 0.0, reverse=True)
+
+        packed, packed_terms = [], []
+        tokens_out = 0
+        for result in candidates:
+            text = result.node.get_content()
+
+            terms = set(tokenize(text))
+            if any(containment(terms, kept) >= self.duplicate_threshold for kept in packed_terms):
+                continue
+
+            # The best chunk is always kept, even if it alone exceeds the budget
+            tokens = self.count_tokens(text)
+            if packed and tokens_out + tokens > self.token_budget:
+                continue
+
+            packed.append(result)
+            packed_terms.append(terms)
+            tokens_out += tokens
+
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['tokens_in'] += tokens_in
+            self._stats['tokens_out'] += tokens_out
+            self._stats['chunks_in'] += len(nodes)
+            self._stats['chunks_out'] += len(packed)
+
+        return packed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats['tokens_saved'] = stats['tokens_in'] - stats['tokens_out']
+        stats['avg_tokens_saved'] = round(stats['tokens_saved'] / stats['requests'], 1) if stats['requests'] else 0.0
+        return stats
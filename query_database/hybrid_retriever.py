@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from vector_store.bm25 import BM25Index, reciprocal_rank_fusion
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Combines a dense retriever with BM25 keyword search using reciprocal rank fusion.
+
+    Dense search finds paraphrases, BM25 finds exact names, codes and numbers; fusing both
+    ranks lets a small top_k cover both kinds of questions. Node scores are the normalised
+    fused scores, so SimilarityPostprocessor still applies to the fused list.
+    """
+
+    def __init__(
+        self,
+        dense_retriever: BaseRetriever,
+        bm25_index: BM25Index,
+        sparse_top_k: int,
+        top_k: int,
+        rrf_k: int = 60
+    ):
+        super().__init__()
+        self._dense_retriever = dense_retriever
+        self._bm25_index = bm25_index
+        self._sparse_top_k = sparse_top_k
+        self._top_k = top_k
+        self._rrf_k = rrf_k
+
+    def _fuse(self, dense_nodes: List[NodeWithScore], sparse_results: List[Tuple[str, float, Dict[str, Any]]]) -> List[NodeWithScore]:
+        nodes: Dict[str, TextNode] = {result.node.node_id: result.node for result in dense_nodes}
+        for doc_id, _, metadata in sparse_results:
+            if doc_id not in nodes:
+                node_metadata = {key: value for key, value in metadata.items() if key != 'text'}
+                nodes[doc_id] = TextNode(id_=doc_id, text=metadata.get('text', ''), metadata=node_metadata)
+
+        fused = reciprocal_rank_fusion(
+            [[result.node.node_id for result in dense_nodes], [doc_id for doc_id, _, _ in sparse_results]],
+            k=self._rrf_k
+        )
+        return [NodeWithScore(node=nodes[doc_id], score=score) for doc_id, score in fused[:self._top_k]]
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        sparse_results = self._bm25_index.search(query_bundle.query_str, self._sparse_top_k)
+        return self._fuse(self._dense_retriever.retrieve(query_bundle), sparse_results)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        # The keyword search takes the index lock and may reload it from disk, so it runs on a
+        # worker thread, next to the dense search instead of after it
+        dense_nodes, sparse_results = await asyncio.gather(
+            self._dense_retriever.aretrieve(query_bundle),
+            asyncio.to_thread(self._bm25_index.search, query_bundle.query_str, self._sparse_top_k))
+        return self._fuse(dense_nodes, sparse_results)
@@ -1,59 +1,459 @@
 import sys
-from typing import List
+from typing import List, AsyncGenerator, Optional, Tuple
 sys.path.append('../')
-from constants.constants import (GROQ_CLIENT_LLAMAINDEX, 
-                       PINECONE_CLIENT, PINECONE_INDEX_NAME, PINECONE_NAMESPACE, 
+from constants.constants import (get_groq_llm,
+                       PINECONE_NAMESPACE, 
                        SIMILARITY_TOP_K, SIMILARITY_CUTOFF,
-                       EMBEDDING_MODEL)
+                       get_embedding_model,
+                       ANSWER_CACHE_ENABLED, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+                       ANSWER_CACHE_HISTORY_TURNS, ANSWER_CACHE_SEMANTIC_THRESHOLD,
+                       RETRIEVAL_CACHE_ENABLED, RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_PATH, QUERY_EMBEDDING_CACHE_SIZE,
+                       HYBRID_SEARCH_ENABLED, BM25_TOP_K, HYBRID_TOP_K, RRF_K,
+                       CONTEXT_PACKER_ENABLED, CONTEXT_TOKEN_BUDGET, CONTEXT_DUPLICATE_THRESHOLD,
+                       SINGLE_FLIGHT_ENABLED,
+                       LLM_ADMISSION_ENABLED, LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS,
+                       LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_EXPECTED_OUTPUT_TOKENS,
+                       LLM_MAX_RETRIES, LLM_RETRY_BACKOFF_SECONDS,
+                       CHAT_MEMORY_MODE, CHAT_MEMORY_TOKEN_LIMIT, CHAT_MEMORY_RECENT_TURNS,
+                       CHAT_SUMMARY_TOKEN_BUDGET, CHAT_SUMMARY_FILE, CHAT_SUMMARY_FOLD_AFTER_TURNS, CHAT_SUMMARY_FOLD_AFTER_TOKENS)
 from constants.prompts import SYSTEM_PROMPT
 from llama_index.core import Settings, VectorStoreIndex, get_response_synthesizer  # noqa: F401
 from llama_index.core.retrievers import VectorIndexRetriever
 # from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.postprocessor import SimilarityPostprocessor
-from llama_index.vector_stores.pinecone import PineconeVectorStore
 from llama_index.core.chat_engine.context import ContextChatEngine
 from llama_index.core.llms import ChatMessage
 from llama_index.core.memory import ChatMemoryBuffer
+from vector_store.main import get_vector_store, get_index_version, get_bm25_index
+from query_database.answer_cache import AnswerCache
+from query_database.retrieval_cache import RetrievalCache, CachedRetriever, QueryEmbedder
+from query_database.hybrid_retriever import HybridRetriever
+from query_database.context_packer import ContextPacker
+from query_database.single_flight import SingleFlight, request_key
+from query_database.admission import LLMAdmission
+from query_database.summary_memory import SummaryMemory
+from contextlib import AsyncExitStack
 import asyncio
+import threading
 
 
-pinecone_client = PINECONE_CLIENT
-pc_indexname = PINECONE_INDEX_NAME
 pc_namespace = PINECONE_NAMESPACE
 
-Settings.embed_model=EMBEDDING_MODEL
-Settings.llm = GROQ_CLIENT_LLAMAINDEX
+_settings_configured = False
+_settings_lock = threading.Lock()
 
-def pinecone_vectorstore():
-    index = pinecone_client.Index(pc_indexname)
-    pinecone_vector_store = PineconeVectorStore(pinecone_index=index, namespace=pc_namespace,)
+def configure_settings() -> None:
+    """
+    Point the LlamaIndex Settings at our embedding model and Groq LLM, creating them on first use.
+    """
+    global _settings_configured
 
-    return VectorStoreIndex.from_vector_store(vector_store=pinecone_vector_store)
+    with _settings_lock:
+        if not _settings_configured:
+            Settings.embed_model = get_embedding_model()
+            Settings.llm = get_groq_llm()
+            _settings_configured = True
+
+def vectorstore_index():
+    vector_store = get_vector_store().llamaindex_vector_store()
+
+    return VectorStoreIndex.from_vector_store(vector_store=vector_store)
+
+_retrieval_cache = None
+_retrieval_cache_lock = threading.Lock()
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    """
+    Return the shared retrieval cache, or None if RETRIEVAL_CACHE_ENABLED is off.
+
+    It outlives chat pipeline rebuilds; entries are invalidated by the corpus generation instead.
+    """
+    global _retrieval_cache
+
+    if not RETRIEVAL_CACHE_ENABLED:
+        return None
+
+    with _retrieval_cache_lock:
+        if _retrieval_cache is None:
+            _retrieval_cache = RetrievalCache(RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_PATH)
+
+        return _retrieval_cache
+
+_query_embedder = None
+_query_embedder_lock = threading.Lock()
+
+def get_query_embedder() -> QueryEmbedder:
+    """
+    Return the shared question embedder used by the answer cache and the retriever.
+    """
+    global _query_embedder
+
+    configure_settings()
+
+    with _query_embedder_lock:
+        if _query_embedder is None:
+            _query_embedder = QueryEmbedder(Settings.embed_model, QUERY_EMBEDDING_CACHE_SIZE)
+
+        return _query_embedder
+
+def peek_query_embedder() -> Optional[QueryEmbedder]:
+    """
+    Return the shared question embedder if it was created already, without creating it (or loading the embedding model).
+    """
+    return _query_embedder
+
+_context_packer = None
+_context_packer_lock = threading.Lock()
+
+def get_context_packer() -> Optional[ContextPacker]:
+    """
+    Return the shared context packer, or None if CONTEXT_PACKER_ENABLED is off.
+    """
+    global _context_packer
+
+    if not CONTEXT_PACKER_ENABLED:
+        return None
+
+    with _context_packer_lock:
+        if _context_packer is None:
+            _context_packer = ContextPacker(
+                token_budget=CONTEXT_TOKEN_BUDGET,
+                duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD)
+
+        return _context_packer
+
+class ChatPipeline:
+    """
+    The long-lived part of the chat stack: the vector store index, retriever and postprocessors.
+
+    It is built once per process; only the chat memory is created per request.
+    """
+
+    def __init__(self):
+        configure_settings()
+        self.index_version = get_index_version()
+        self.index = vectorstore_index()
+        self.retriever = VectorIndexRetriever(
+            index=self.index,
+            namespace=pc_namespace,
+            similarity_top_k=SIMILARITY_TOP_K)
+        retrieval_cache = get_retrieval_cache()
+        if retrieval_cache is not None:
+            self.retriever = CachedRetriever(
+                self.retriever,
+                retrieval_cache,
+                query_embedder=get_query_embedder(),
+                top_k=SIMILARITY_TOP_K,
+                namespace=pc_namespace,
+                cutoff=SIMILARITY_CUTOFF)
+        if HYBRID_SEARCH_ENABLED:
+            self.retriever = HybridRetriever(
+                self.retriever,
+                get_bm25_index(),
+                sparse_top_k=BM25_TOP_K,
+                top_k=HYBRID_TOP_K,
+                rrf_k=RRF_K)
+        # response_synthesizer = get_response_synthesizer(response_mode='refine', )
+        self.postprocessors = [SimilarityPostprocessor(similarity_cutoff=SIMILARITY_CUTOFF)]
+        context_packer = get_context_packer()
+        if context_packer is not None:
+            self.postprocessors.append(context_packer)
+        self.prefix_messages = [ChatMessage(role="system", content=SYSTEM_PROMPT)]
+
+    def chat_engine(self, chat_history: List) -> ContextChatEngine:
+        """
+        Create a chat engine over the shared retriever with this request's chat history.
+
+        Args:
+            chat_history (List): The ChatMessage history for this request.
+        """
+        # query_engine = RetrieverQueryEngine(
+        #     retriever=self.retriever,
+        #     response_synthesizer=response_synthesizer,
+        #     node_postprocessors=self.postprocessors,
+        # )
+        return ContextChatEngine(
+            retriever=self.retriever,
+            node_postprocessors=self.postprocessors,
+            prefix_messages=self.prefix_messages,
+            llm=Settings.llm,
+            memory=ChatMemoryBuffer.from_defaults(chat_history=chat_history, token_limit=CHAT_MEMORY_TOKEN_LIMIT))
+
+
+_chat_pipeline = None
+_chat_pipeline_lock = threading.Lock()
+
+def build_chat_pipeline() -> ChatPipeline:
+    """
+    Build a fresh ChatPipeline and make it the one used by llamaindex_chatbot.
+
+    Call it again whenever the configuration or the index changes.
+    """
+    global _chat_pipeline
+
+    pipeline = ChatPipeline()
+    with _chat_pipeline_lock:
+        _chat_pipeline = pipeline
+
+    return pipeline
+
+def get_chat_pipeline() -> ChatPipeline:
+    """
+    Return the shared ChatPipeline, building it on first use or when the vector store index has changed.
+    """
+    with _chat_pipeline_lock:
+        pipeline = _chat_pipeline
+
+    if pipeline is None or pipeline.index_version != get_index_version():
+        pipeline = build_chat_pipeline()
+
+    return pipeline
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """
+    Return the shared answer cache, or None if ANSWER_CACHE_ENABLED is off.
+    """
+    global _answer_cache
+
+    if not ANSWER_CACHE_ENABLED:
+        return None
+
+    configure_settings()
+
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache(
+                max_entries=ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+                history_turns=ANSWER_CACHE_HISTORY_TURNS,
+                semantic_threshold=ANSWER_CACHE_SEMANTIC_THRESHOLD,
+                embed_query=get_query_embedder().aembed)
+
+        return _answer_cache
+
+def peek_answer_cache() -> Optional[AnswerCache]:
+    """
+    Return the shared answer cache if it was created already, without creating it (or loading the embedding model).
+    """
+    return _answer_cache
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """
+    Return the shared request coalescer, or None if SINGLE_FLIGHT_ENABLED is off.
+    """
+    global _single_flight
+
+    if not SINGLE_FLIGHT_ENABLED:
+        return None
+
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+
+        return _single_flight
+
+_llm_admission = None
+_llm_admission_lock = threading.Lock()
+
+def get_llm_admission() -> Optional[LLMAdmission]:
+    """
+    Return the shared admission controller for LLM calls, or None if LLM_ADMISSION_ENABLED is off.
+    """
+    global _llm_admission
+
+    if not LLM_ADMISSION_ENABLED:
+        return None
+
+    with _llm_admission_lock:
+        if _llm_admission is None:
+            _llm_admission = LLMAdmission(
+                max_concurrency=LLM_MAX_CONCURRENCY,
+                max_queue=LLM_MAX_QUEUE,
+                queue_timeout=LLM_QUEUE_TIMEOUT_SECONDS,
+                requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                max_retries=LLM_MAX_RETRIES,
+                backoff_seconds=LLM_RETRY_BACKOFF_SECONDS)
+
+        return _llm_admission
+
+async def summarize_conversation(prompt: str) -> str:
+    """
+    Complete a chat summary prompt with the Groq LLM, under the same admission control as chat calls.
+    """
+    configure_settings()
+    llm = Settings.llm
+
+    admission = get_llm_admission()
+    if admission is not None:
+        async with admission.slot(len(prompt) // 4 + CHAT_SUMMARY_TOKEN_BUDGET):
+            response = await admission.with_retries(lambda: llm.acomplete(prompt))
+    else:
+        response = await llm.acomplete(prompt)
+
+    return response.text
+
+_summary_memory = None
+_summary_memory_lock = threading.Lock()
+
+def get_summary_memory() -> Optional[SummaryMemory]:
+    """
+    Return the shared summarizing chat memory, or None unless CHAT_MEMORY_MODE is 'summary'.
+    """
+    global _summary_memory
+
+    if CHAT_MEMORY_MODE != 'summary':
+        return None
+
+    with _summary_memory_lock:
+        if _summary_memory is None:
+            _summary_memory = SummaryMemory(
+                path=CHAT_SUMMARY_FILE,
+                token_budget=CHAT_SUMMARY_TOKEN_BUDGET,
+                recent_turns=CHAT_MEMORY_RECENT_TURNS,
+                summarize=summarize_conversation,
+                fold_after_turns=CHAT_SUMMARY_FOLD_AFTER_TURNS,
+                fold_after_tokens=CHAT_SUMMARY_FOLD_AFTER_TOKENS)
+
+        return _summary_memory
+
+def estimate_tokens(query: str, chat_history: List) -> int:
+    """
+    Estimate the tokens one chat call uses: prompt and history (about 4 characters per token),
+    the packed context and the expected answer.
+    """
+    characters = len(SYSTEM_PROMPT) + len(query) + sum(len(str(message.content)) for message in chat_history)
+    return characters // 4 + CONTEXT_TOKEN_BUDGET + LLM_EXPECTED_OUTPUT_TOKENS
+
+async def _generate_answer(query: str, chat_history: List, answer_cache: Optional[AnswerCache], cache_state: Optional[dict]) -> str:
+    chatengine = get_chat_pipeline().chat_engine(chat_history)
+
+    admission = get_llm_admission()
+    if admission is not None:
+        async with admission.slot(estimate_tokens(query, chat_history)):
+            chat_response = await admission.with_retries(lambda: chatengine.achat(query))
+    else:
+        chat_response = await chatengine.achat(query)
+    answer = str(chat_response)
+
+    if answer_cache is not None:
+        answer_cache.store(cache_state, answer)
+
+    return answer
 
 async def llamaindex_chatbot(query: str, chat_history: List):
+    answer_cache = get_answer_cache()
+    cache_state = None
+    if answer_cache is not None:
+        cached_answer, cache_state = await answer_cache.lookup(query, chat_history)
+        if cached_answer is not None:
+            return cached_answer
+
+    # Identical questions asked at the same time share one retrieval and LLM call
+    single_flight = get_single_flight()
+    if single_flight is not None:
+        return await single_flight.do(
+            request_key(query, chat_history),
+            lambda: _generate_answer(query, chat_history, answer_cache, cache_state))
+
+    return await _generate_answer(query, chat_history, answer_cache, cache_state)
+
+async def _replay_answer(answer: str) -> AsyncGenerator[str, None]:
+    yield answer
+
+async def _store_when_complete(tokens: AsyncGenerator[str, None], answer_cache: AnswerCache, cache_state: dict) -> AsyncGenerator[str, None]:
+    # Only a stream that ran to the end is cached; a dropped client closes the generator first
+    parts = []
+    async for token in tokens:
+        parts.append(token)
+        yield token
+
+    answer_cache.store(cache_state, ''.join(parts))
+
+async def _release_when_complete(tokens: AsyncGenerator[str, None], slot: AsyncExitStack) -> AsyncGenerator[str, None]:
+    # The LLM slot is held until the last token has been received
+    try:
+        async for token in tokens:
+            yield token
+    finally:
+        await slot.aclose()
+
+async def _open_stream(chatengine: ContextChatEngine, query: str) -> Tuple[Optional[str], AsyncGenerator[str, None]]:
+    # The Groq request is only sent when the stream is first iterated, so the first token is
+    # pulled here; a rate limit or connection error then surfaces (and is retried) before any
+    # response headers are sent
+    streaming_response = await chatengine.astream_chat(query)
+    tokens = streaming_response.async_response_gen()
+    try:
+        first_token = await tokens.__anext__()
+    except StopAsyncIteration:
+        first_token = None
+    except BaseException:
+        await tokens.aclose()
+        raise
+    return first_token, tokens
+
+async def _prepend(first_token: Optional[str], tokens: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    try:
+        if first_token is not None:
+            yield first_token
+        async for token in tokens:
+            yield token
+    finally:
+        await tokens.aclose()
+
+async def _start_stream(query: str, chat_history: List, answer_cache: Optional[AnswerCache], cache_state: Optional[dict]) -> AsyncGenerator[str, None]:
+    chatengine = get_chat_pipeline().chat_engine(chat_history)
+
+    admission = get_llm_admission()
+    if admission is not None:
+        slot = AsyncExitStack()
+        await slot.enter_async_context(admission.slot(estimate_tokens(query, chat_history)))
+        try:
+            first_token, tokens = await admission.with_retries(lambda: _open_stream(chatengine, query))
+        except BaseException:
+            await slot.aclose()
+            raise
+        tokens = _release_when_complete(_prepend(first_token, tokens), slot)
+    else:
+        first_token, tokens = await _open_stream(chatengine, query)
+        tokens = _prepend(first_token, tokens)
+
+    if answer_cache is not None:
+        return _store_when_complete(tokens, answer_cache, cache_state)
+
+    return tokens
+
+async def llamaindex_chatbot_stream(query: str, chat_history: List) -> AsyncGenerator[str, None]:
+    """
+    Start a streamed chat completion and return a generator over its tokens.
+
+    Retrieval, the LLM request and the wait for the first token happen before this returns, so
+    errors from starting the completion (including provider rate limits) surface to the caller
+    instead of in the middle of the stream; errors after the first token still end the stream.
+    Cached answers are replayed as a single chunk, and concurrent identical requests subscribe
+    to the same stream.
+    """
+    answer_cache = get_answer_cache()
+    cache_state = None
+    if answer_cache is not None:
+        cached_answer, cache_state = await answer_cache.lookup(query, chat_history)
+        if cached_answer is not None:
+            return _replay_answer(cached_answer)
+
+    single_flight = get_single_flight()
+    if single_flight is not None:
+        return await single_flight.stream(
+            request_key(query, chat_history),
+            lambda: _start_stream(query, chat_history, answer_cache, cache_state))
 
-    vector_index_retriever = VectorIndexRetriever(
-    index=pinecone_vectorstore(),
-    namespace=pc_namespace,
-    similarity_top_k=SIMILARITY_TOP_K)
-    # response_synthesizer = get_response_synthesizer(response_mode='refine', )
-    postprocessors = [SimilarityPostprocessor(similarity_cutoff=SIMILARITY_CUTOFF)]
-
-    # query_engine = RetrieverQueryEngine(
-    #     retriever=vector_index_retriever,
-    #     response_synthesizer=response_synthesizer,
-    #     node_postprocessors=postprocessors,
-    # )
-    chatengine = ContextChatEngine(
-        retriever=vector_index_retriever,
-        node_postprocessors=postprocessors,
-        prefix_messages = [ChatMessage(role="system", content=SYSTEM_PROMPT)],
-        llm = Settings.llm,
-        memory=ChatMemoryBuffer.from_defaults(chat_history = chat_history, token_limit=5000))
-    
-    chat_response = await chatengine.achat(query)
-
-    return str(chat_response)
+    return await _start_stream(query, chat_history, answer_cache, cache_state)
 
 if __name__ == "__main__":
     asyncio.run(llamaindex_chatbot("What was my previous question", []))
\ No newline at end of file
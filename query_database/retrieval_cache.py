@@ -0,0 +1,209 @@
+import os
+import pickle
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from vector_store.main import get_corpus_generation
+
+
+class RetrievalCache:
+    """
+    An LRU cache of retrieval results keyed by (query embedding hash, top_k, namespace, cutoff).
+
+    Every entry remembers the corpus generation it was computed under and is ignored once the
+    generation moves on. The cache can optionally be persisted to a pickle file.
+    """
+
+    def __init__(self, max_entries: int, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        if persist_path and os.path.exists(persist_path):
+            try:
+                with open(persist_path, 'rb') as file:
+                    entries = pickle.load(file)
+                generation = get_corpus_generation()
+                self._entries = OrderedDict(
+                    (key, entry) for key, entry in entries.items() if entry['generation'] == generation
+                )
+            except (OSError, pickle.UnpicklingError, EOFError, KeyError) as e:
+                print(f"Ignoring unreadable retrieval cache {persist_path}: {e}")
+
+    @staticmethod
+    def key(embedding: List[float], top_k: int, namespace: str, cutoff: float) -> str:
+        sha256 = hashlib.sha256(np.asarray(embedding, dtype=np.float32).tobytes())
+        sha256.update(f"\0{top_k}\0{namespace}\0{cutoff}".encode('utf-8'))
+        return sha256.hexdigest()
+
+    def get(self, key: str) -> Optional[List[NodeWithScore]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['generation'] != get_corpus_generation():
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            # Fresh wrappers so callers can re-score without touching the cached list
+            return [NodeWithScore(node=result.node, score=result.score) for result in entry['nodes']]
+
+    def put(self, key: str, nodes: List[NodeWithScore], generation: int) -> None:
+        with self._lock:
+            if generation != get_corpus_generation():
+                return
+
+            self._entries[key] = {'nodes': list(nodes), 'generation': generation}
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """
+        Write the current entries to `persist_path`, if persistence is enabled.
+        """
+        if not self.persist_path:
+            return
+
+        with self._lock:
+            generation = get_corpus_generation()
+            entries = {key: entry for key, entry in self._entries.items() if entry['generation'] == generation}
+
+        tmp_path = self.persist_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(entries, file)
+        os.replace(tmp_path, self.persist_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class QueryEmbedder:
+    """
+    Embeds questions through a small LRU keyed on the question text.
+
+    The answer cache's semantic tier and CachedRetriever both embed the same question during
+    one request; sharing this object makes that a single embedding call.
+    """
+
+    def __init__(self, embed_model: BaseEmbedding, max_entries: int):
+        self.embed_model = embed_model
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, query: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(query)
+            if embedding is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(query)
+            self.hits += 1
+            return embedding
+
+    def _put(self, query: str, embedding: List[float]) -> None:
+        with self._lock:
+            self._entries[query] = embedding
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def embed(self, query: str) -> List[float]:
+        embedding = self._get(query)
+        if embedding is None:
+            embedding = self.embed_model.get_query_embedding(query)
+            self._put(query, embedding)
+        return embedding
+
+    async def aembed(self, query: str) -> List[float]:
+        embedding = self._get(query)
+        if embedding is None:
+            embedding = await self.embed_model.aget_query_embedding(query)
+            self._put(query, embedding)
+        return embedding
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Wraps a vector retriever and serves repeated searches for the same query embedding from a RetrievalCache.
+
+    The query embedding is computed here (through the shared QueryEmbedder, so a question the
+    answer cache already embedded is not embedded again) and handed to the wrapped retriever,
+    so a miss costs no extra embedding call.
+    """
+
+    def __init__(
+        self,
+        retriever: BaseRetriever,
+        cache: RetrievalCache,
+        query_embedder: QueryEmbedder,
+        top_k: int,
+        namespace: str,
+        cutoff: float
+    ):
+        super().__init__()
+        self._retriever = retriever
+        self._cache = cache
+        self._query_embedder = query_embedder
+        self._top_k = top_k
+        self._namespace = namespace
+        self._cutoff = cutoff
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        if query_bundle.embedding is None:
+            if len(query_bundle.embedding_strs) == 1:
+                query_bundle.embedding = self._query_embedder.embed(query_bundle.embedding_strs[0])
+            else:
+                query_bundle.embedding = self._query_embedder.embed_model.get_agg_embedding_from_queries(query_bundle.embedding_strs)
+
+        key = RetrievalCache.key(query_bundle.embedding, self._top_k, self._namespace, self._cutoff)
+        nodes = self._cache.get(key)
+        if nodes is None:
+            generation = get_corpus_generation()
+            nodes = self._retriever.retrieve(query_bundle)
+            self._cache.put(key, nodes, generation)
+
+        return nodes
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        if query_bundle.embedding is None:
+            if len(query_bundle.embedding_strs) == 1:
+                query_bundle.embedding = await self._query_embedder.aembed(query_bundle.embedding_strs[0])
+            else:
+                query_bundle.embedding = await self._query_embedder.embed_model.aget_agg_embedding_from_queries(query_bundle.embedding_strs)
+
+        key = RetrievalCache.key(query_bundle.embedding, self._top_k, self._namespace, self._cutoff)
+        nodes = self._cache.get(key)
+        if nodes is None:
+            generation = get_corpus_generation()
+            nodes = await self._retriever.aretrieve(query_bundle)
+            self._cache.put(key, nodes, generation)
+
+        return nodes
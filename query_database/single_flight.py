@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+from query_database.answer_cache import normalize_query, history_fingerprint
+
+
+def request_key(query: str, chat_history: List) -> str:
+    """
+    Key identical chat requests: the normalised question plus a fingerprint of the whole history.
+    """
+    history = history_fingerprint(chat_history, len(chat_history))
+    return hashlib.sha256(f"{normalize_query(query)}\0{history}".encode('utf-8')).hexdigest()
+
+
+class _StreamBroadcast:
+    """
+    One in-flight streamed answer, read by any number of subscribers.
+
+    Tokens are buffered, so a subscriber that joins late first replays what was already produced.
+    The producer runs in its own task and is not tied to any one client connection.
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.started: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+        self._condition = asyncio.Condition()
+
+    async def run(self, start: Callable[[], Awaitable[AsyncGenerator[str, None]]]) -> None:
+        try:
+            tokens = await start()
+            self.started.set_result(None)
+
+            async for token in tokens:
+                async with self._condition:
+                    self.tokens.append(token)
+                    self._condition.notify_all()
+        except asyncio.CancelledError as e:
+            if not self.started.done():
+                self.started.cancel()
+            else:
+                self.error = e
+            raise
+        except Exception as e:
+            if not self.started.done():
+                self.started.set_exception(e)
+                # Mark the exception as retrieved; every subscriber re-raises it from `started`
+                self.started.exception()
+            else:
+                self.error = e
+        finally:
+            async with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        position = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: len(self.tokens) > position or self.done)
+                pending = self.tokens[position:]
+                finished = self.done
+
+            for token in pending:
+                yield token
+            position += len(pending)
+
+            if finished and position == len(self.tokens):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical requests into one computation.
+
+    The first request for a key (the leader) starts the work in a separate task; requests for
+    the same key that arrive while it is running await the same result instead of starting their
+    own. Streamed answers are fanned out token by token to every subscriber.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, _StreamBroadcast] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.stream_calls = 0
+        self.stream_coalesced = 0
+
+    def _forget(self, registry: Dict[str, Any], key: str, value: Any) -> None:
+        if registry.get(key) is value:
+            del registry[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` for `key`, or wait for the run that is already in flight.
+
+        The work is shielded, so a disconnecting client does not cancel it for the others.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(self._calls, key, task))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    async def stream(self, key: str, start: Callable[[], Awaitable[AsyncGenerator[str, None]]]) -> AsyncGenerator[str, None]:
+        """
+        Start a streamed answer for `key`, or subscribe to the one already in flight.
+
+        Returns once the stream has started, so errors raised while starting reach every caller.
+
+        Returns:
+            AsyncGenerator[str, None]: This caller's view of the token stream.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.stream_calls += 1
+            broadcast = _StreamBroadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(broadcast.run(start))
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+        else:
+            self.stream_coalesced += 1
+
+        await asyncio.shield(broadcast.started)
+        return broadcast.subscribe()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'in_flight': len(self._calls) + len(self._streams),
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'stream_calls': self.stream_calls,
+            'stream_coalesced': self.stream_coalesced
+        }
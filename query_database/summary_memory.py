@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, List
+from llama_index.core.llms import ChatMessage
+from llama_index.core.utils import get_tokenizer
+from constants.prompts import CHAT_SUMMARY_PROMPT, CHAT_SUMMARY_PREFIX
+
+
+def turn_fingerprint(turn: Dict[str, str]) -> str:
+    """
+    Identify one question/answer turn of the chat log by its content.
+    """
+    return hashlib.sha256(f"{turn.get('user', '')}\0{turn.get('assistant', '')}".encode('utf-8')).hexdigest()
+
+
+def turns_to_messages(turns: List[Dict[str, str]]) -> List[ChatMessage]:
+    messages = []
+    for turn in turns:
+        if "user" in turn:
+            messages.append(ChatMessage(role="user", content=turn["user"]))
+        if "assistant" in turn:
+            messages.append(ChatMessage(role="assistant", content=turn["assistant"]))
+    return messages
+
+
+class SummaryMemory:
+    """
+    Chat memory that folds older turns into a persisted running summary.
+
+    A request is sent the summary as a system message, followed by the turns that are not in the
+    summary yet and always the last `recent_turns` turns verbatim. Once the turns that are not in
+    the summary reach `fold_after_turns` turns or `fold_after_tokens` tokens, they are folded into
+    the summary in the background after the response, so requests carry one short summary instead
+    of every earlier answer while the summary costs one LLM call per few turns rather than per turn.
+
+    Args:
+        path (str): The JSON file the summary is kept in across restarts.
+        token_budget (int): The maximum size of the summary in tokens.
+        recent_turns (int): How many of the latest turns are always sent verbatim.
+        summarize (Callable[[str], Awaitable[str]]): Sends a prompt to the LLM and returns its completion.
+        fold_after_turns (int): Fold once this many turns are not in the summary; keep it below the
+            number of turns read from the log, so no turn scrolls out of the window unfolded.
+        fold_after_tokens (int): Fold earlier once the turns that are not in the summary hold this many tokens.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        token_budget: int,
+        recent_turns: int,
+        summarize: Callable[[str], Awaitable[str]],
+        fold_after_turns: int = 1,
+        fold_after_tokens: int = 0
+    ):
+        self.path = path
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summarize = summarize
+        self.fold_after_turns = fold_after_turns
+        self.fold_after_tokens = fold_after_tokens
+
+        self._tokenizer = get_tokenizer()
+        self._update_lock = asyncio.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.state = {'summary': '', 'last_turn': None, 'turns_folded': 0, 'updated_at': None}
+        self._load()
+
+        self._stats = {
+            'requests': 0,
+            'history_tokens_full': 0,
+            'history_tokens_sent': 0,
+            'summary_updates': 0,
+            'summary_deferred': 0,
+            'summary_failures': 0
+        }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.state.update(json.load(file))
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Ignoring unreadable chat summary {self.path}: {e}")
+
+    def save(self) -> None:
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._tokenizer(text))
+
+    def _count_messages(self, messages: List[ChatMessage]) -> int:
+        return sum(self.count_tokens(str(message.content)) for message in messages)
+
+    def _unfolded_start(self, turns: List[Dict[str, str]]) -> int:
+        # Index of the first turn after the last one in the summary; turns that scrolled out of
+        # the window before they were folded are lost either way, so start at 0 then
+        last_turn = self.state['last_turn']
+        if last_turn is not None:
+            for position in range(len(turns) - 1, -1, -1):
+                if turn_fingerprint(turns[position]) == last_turn:
+                    return position + 1
+        return 0
+
+    def build_history(self, turns: List[Dict[str, str]]) -> List[ChatMessage]:
+        """
+        Build the ChatMessage history for a request from the latest turns of the chat log.
+
+        Args:
+            turns (List[Dict[str, str]]): The latest turns of the chat log in chronological order.
+
+        Returns:
+            List[ChatMessage]: The summary, the turns not folded into it yet and the recent turns.
+        """
+        start = min(self._unfolded_start(turns), max(len(turns) - self.recent_turns, 0))
+
+        messages = []
+        if self.state['summary']:
+            messages.append(ChatMessage(role="system", content=CHAT_SUMMARY_PREFIX + self.state['summary']))
+        messages.extend(turns_to_messages(turns[start:]))
+
+        tokens_full = self._count_messages(turns_to_messages(turns))
+        tokens_sent = self._count_messages(messages)
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['history_tokens_full'] += tokens_full
+            self._stats['history_tokens_sent'] += tokens_sent
+
+        return messages
+
+    def _trim(self, summary: str) -> str:
+        tokens = self._tokenizer(summary)
+        if len(tokens) <= self.token_budget:
+            return summary
+
+        # The prompt asks for a short summary; cut it at a sentence if the LLM overshoots
+        trimmed = summary[:len(summary) * self.token_budget // len(tokens)]
+        sentence_end = trimmed.rfind('. ')
+        return trimmed[:sentence_end + 1] if sentence_end > 0 else trimmed
+
+    async def update(self, turns: List[Dict[str, str]]) -> None:
+        """
+        Fold the turns that are not in the summary yet into it and persist the result, once they
+        reach the turn or token threshold; below it they keep being sent verbatim.
+
+        Failures are logged and the turns are left unfolded, so they are sent verbatim and
+        folded by a later update.
+        """
+        async with self._update_lock:
+            pending = turns[self._unfolded_start(turns):]
+            if not pending:
+                return
+
+            conversation = "\n\n".join(
+                f"User: {turn.get('user', '')}\nAssistant: {turn.get('assistant', '')}" for turn in pending)
+            if len(pending) < self.fold_after_turns and not (
+                    self.fold_after_tokens and self.count_tokens(conversation) >= self.fold_after_tokens):
+                with self._stats_lock:
+                    self._stats['summary_deferred'] += 1
+                return
+
+            prompt = CHAT_SUMMARY_PROMPT.format(
+                max_words=self.token_budget * 3 // 4,
+                summary=self.state['summary'] or "(empty)",
+                turns=conversation)
+
+            try:
+                summary = self._trim((await self.summarize(prompt)).strip())
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats['summary_failures'] += 1
+                print(f"Failed to update the chat summary: {e}")
+                return
+
+            self.state = {
+                'summary': summary,
+                'last_turn': turn_fingerprint(pending[-1]),
+                'turns_folded': self.state['turns_folded'] + len(pending),
+                'updated_at': time.time()
+            }
+            await asyncio.to_thread(self.save)
+
+            with self._stats_lock:
+                self._stats['summary_updates'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        requests = stats['requests']
+        stats['history_tokens_saved'] = stats['history_tokens_full'] - stats['history_tokens_sent']
+        stats['avg_history_tokens_full'] = round(stats['history_tokens_full'] / requests, 1) if requests else 0.0
+        stats['avg_history_tokens_sent'] = round(stats['history_tokens_sent'] / requests, 1) if requests else 0.0
+        stats['summary_tokens'] = self.count_tokens(self.state['summary'])
+        stats['turns_folded'] = self.state['turns_folded']
+        stats['updating'] = self._update_lock.locked()
+        return stats
@@ -0,0 +1,118 @@
+import os
+import sys
+import uuid
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+sys.path.append('../')
+from constants.constants import (FASTAPI_URL, HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT_SECONDS,
+                       HTTP_READ_TIMEOUT_SECONDS, UPLOAD_CHUNK_SIZE)
+
+# (field name, (file name, file object, MIME type)), the format requests uses for `files=`
+FileField = Tuple[str, Tuple[str, IO, str]]
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Return the shared keep-alive session for calls to the FastAPI server.
+
+    Streamlit reruns the script but keeps imported modules, so every rerun reuses the same
+    pooled connections instead of opening a new TCP connection per call. Connection errors
+    are retried; nothing is retried once the request has been sent.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2, allowed_methods=None)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+
+            _session = requests.Session()
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+
+        return _session
+
+def request(method: str, path: str, timeout: Optional[Tuple[float, float]] = None, **kwargs) -> requests.Response:
+    """
+    Send a request to the FastAPI server over the shared session.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The path below FASTAPI_URL, e.g. '/crud/insert-documents'.
+        timeout (Optional[Tuple[float, float]]): (connect, read) timeouts; defaults to the configured ones.
+            For streamed responses the read timeout applies between chunks.
+        **kwargs: Passed on to requests, e.g. json, params, data, headers or stream.
+    """
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS)
+
+    return get_session().request(method, f"{FASTAPI_URL}{path}", timeout=timeout, **kwargs)
+
+def _file_size(file: IO) -> Optional[int]:
+    try:
+        position = file.tell()
+        file.seek(0, os.SEEK_END)
+        size = file.tell() - position
+        file.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+class MultipartBody:
+    """
+    A multipart/form-data body produced chunk by chunk from file objects, so large files are
+    streamed from disk instead of being read into memory.
+
+    requests takes the Content-Length from `len` when every file's size is known; otherwise
+    `len` is not set and the body is sent with chunked transfer encoding.
+    """
+
+    def __init__(self, files: List[FileField], chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+
+        self._parts = []
+        for field, (file_name, file, content_type) in files:
+            header = (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field}"; filename="{file_name.replace(chr(34), "%22")}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'
+            ).encode('utf-8')
+            self._parts.append((header, file))
+        self._closing = f'--{self.boundary}--\r\n'.encode('utf-8')
+
+        sizes = [_file_size(file) for _, file in self._parts]
+        if all(size is not None for size in sizes):
+            self.len = sum(len(header) + size + 2 for (header, _), size in zip(self._parts, sizes)) + len(self._closing)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for header, file in self._parts:
+            yield header
+            while chunk := file.read(self.chunk_size):
+                yield chunk
+            yield b'\r\n'
+        yield self._closing
+
+def multipart_body(files: List[FileField], chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[MultipartBody, Dict[str, str]]:
+    """
+    Encode files as a streamed multipart/form-data body.
+
+    Returns:
+        Tuple[MultipartBody, Dict[str, str]]: The body to pass as `data=` and the headers to send with it.
+            Content-Length or Transfer-Encoding is left to requests, which picks one from the body.
+    """
+    body = MultipartBody(files, chunk_size)
+    return body, {'Content-Type': body.content_type}
+
+def upload(path: str, files: List[FileField], **kwargs) -> requests.Response:
+    """
+    POST files to the FastAPI server as a streamed multipart body.
+    """
+    body, headers = multipart_body(files)
+    return request('POST', path, data=body, headers=headers, **kwargs)
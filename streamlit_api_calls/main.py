@@ -1,18 +1,37 @@
 import json
 import requests
 from typing import List, Tuple, IO
-from constants.constants import FASTAPI_URL
+from streamlit_api_calls.client import request, upload
 
 def response_from_model(user_prompt: str):
 
-    API = f"{FASTAPI_URL}/groq_api_generator_response_llamaindex"
-    response = requests.post(
+    API = "/groq_api_generator_response_llamaindex"
+    response = request(
+        'POST',
         API,
         json={"input": user_prompt},
     )
 
     return response
 
+def response_from_model_stream(user_prompt: str):
+    """
+    Calls the streaming chat endpoint.
+
+    :param user_prompt: The question to send to the model.
+    :return: The response object; iterate it with iter_content to read tokens as they arrive.
+    """
+
+    API = "/groq_api_generator_response_llamaindex/stream"
+    response = request(
+        'POST',
+        API,
+        json={"input": user_prompt},
+        stream=True,
+    )
+
+    return response
+
 def loading_files(files: List[Tuple[str, Tuple[str, IO, str]]]):
     """
     Uploads files to the specified API endpoint.
@@ -22,10 +41,10 @@ def loading_files(files: List[Tuple[str, Tuple[str, IO, str]]]):
     :return: The response object from the API request.
     """
 
-    API = f"{FASTAPI_URL}/loader/uploadfiles-without-filepath/"
+    API = "/loader/uploadfiles-without-filepath/"
     try:
-        # Send the POST request with files
-        response = requests.post(API, files=files)
+        # Stream the files in a multipart POST request
+        response = upload(API, files)
         
         # Return the response object
         return response
@@ -42,10 +61,10 @@ def load_files_with_images(files: List[Tuple[str, Tuple[str, IO, str]]]):
     :return: The response object from the API request.
     """
 
-    API = f"{FASTAPI_URL}/loader/loading-files/"
+    API = "/loader/loading-files/"
     try:
-        # Send the POST request with files
-        response = requests.post(API, files=files)
+        # Stream the files in a multipart POST request
+        response = upload(API, files)
         
         # Return the response object
         return response
@@ -53,15 +72,64 @@ def load_files_with_images(files: List[Tuple[str, Tuple[str, IO, str]]]):
         print(f"An error occurred: {e}")
         return None
     
+def submit_loading_job(files: List[Tuple[str, Tuple[str, IO, str]]], insert: bool = False):
+    """
+    Uploads files and queues their extraction (and, if insert is True, insertion) as a background job.
+
+    :param files: A list of tuples where each tuple contains (filename, file object, MIME type).
+    :param insert: Also insert the extracted documents into the database if True.
+    :return: The response object from the API request; its JSON holds the 'job_id'.
+    """
+
+    API = "/jobs/loading-files"
+    try:
+        response = upload(API, files, params={"insert": insert})
+        return response
+    except requests.RequestException as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def submit_insert_job():
+    """
+    Queues the insertion of the extracted documents into the database as a background job.
+
+    :return: The response object from the API request; its JSON holds the 'job_id'.
+    """
+
+    API = "/jobs/insert-documents"
+    try:
+        response = request('POST', API)
+        return response
+    except requests.RequestException as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def get_job(job_id: str):
+    """
+    Fetches the status, stages and result of a background job.
+
+    :param job_id: The id returned when the job was submitted.
+    :return: The job as a dict, or None if it could not be fetched.
+    """
+
+    API = f"/jobs/{job_id}"
+    try:
+        response = request('GET', API)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as e:
+        print(f"An error occurred: {e}")
+        return None
+
 def insert_documents_to_database():
     """
     Inserts the uploaded documents into the database by calling the specified API endpoint.
     """
-    API = f"{FASTAPI_URL}/crud/insert-documents"
+    API = "/crud/insert-documents"
     
     try:
-        # Send the POST request with files
-        response = requests.post(API)
+        # Send the POST request
+        response = request('POST', API)
         return response
     except requests.RequestException as e:
         return (f"An error occurred: {e}")
@@ -77,10 +145,11 @@ def delete_documents_from_database(file_names: List[str], keep_special_chars: bo
     :param delete_all: Boolean flag to delete all records in the namespace if True.
     :return: The response object from the API request.
     """
-    API = f"{FASTAPI_URL}/crud/delete-documents"
+    API = "/crud/delete-documents"
     
     try:
-        response = requests.post(
+        response = request(
+            'POST',
             API,
             data=json.dumps(file_names),
             params={"id": keep_special_chars, "deleteall": delete_all}
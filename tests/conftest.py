@@ -0,0 +1,21 @@
+import os
+import sys
+import pytest
+
+# The packages are imported from the repository root, as the API server and scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def bump_generation(monkeypatch, tmp_path):
+    """
+    Return a function that moves the corpus generation on, as an ingestion or delete would,
+    writing a CORPUS_GENERATION_FILE under tmp_path. The generation is restored after the test.
+    """
+    import vector_store.main as vector_store_main
+
+    monkeypatch.setattr(vector_store_main, '_corpus_generation', vector_store_main.get_corpus_generation())
+    monkeypatch.setattr(vector_store_main, '_corpus_generation_version', None)
+    monkeypatch.setattr(vector_store_main, 'CORPUS_GENERATION_FILE', str(tmp_path / 'corpus_generation.json'))
+
+    return vector_store_main.bump_corpus_generation
@@ -0,0 +1,202 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from query_database import admission
+from query_database.admission import LLMAdmission, Overloaded, TokenBucket, is_rate_limit_error, retry_after_from
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={'retry-after': retry_after} if retry_after is not None else {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def make_admission(**kwargs) -> LLMAdmission:
+    options = {
+        'max_concurrency': 1,
+        'max_queue': 1,
+        'queue_timeout': 0.2,
+        'requests_per_minute': 600,
+        'tokens_per_minute': 60000,
+        'max_retries': 2,
+        'backoff_seconds': 0.001
+    }
+    options.update(kwargs)
+    return LLMAdmission(**options)
+
+
+def test_rate_limit_errors_are_recognised():
+    assert is_rate_limit_error(RateLimitError())
+    assert not is_rate_limit_error(ValueError())
+    assert retry_after_from(RateLimitError('2.5')) == 2.5
+    assert retry_after_from(RateLimitError()) is None
+
+
+def test_bucket_rejects_what_would_not_refill_in_time(clock):
+    async def main():
+        bucket = TokenBucket(per_minute=60)
+        await bucket.acquire(60, max_wait=0)
+
+        with pytest.raises(Overloaded) as rejected:
+            await bucket.acquire(10, max_wait=5)
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after == pytest.approx(10)
+
+        # One unit per second flows back
+        clock[0] += 10
+        await bucket.acquire(10, max_wait=0)
+
+    asyncio.run(main())
+
+
+def test_bucket_burst_is_capped_at_capacity(clock):
+    async def main():
+        bucket = TokenBucket(per_minute=60, capacity=5)
+        clock[0] += 3600
+        await bucket.acquire(5, max_wait=0)
+
+        with pytest.raises(Overloaded):
+            await bucket.acquire(1, max_wait=0)
+
+    asyncio.run(main())
+
+
+def test_refund_gives_units_back_up_to_capacity(clock):
+    async def main():
+        bucket = TokenBucket(per_minute=60)
+        await bucket.acquire(60, max_wait=0)
+
+        bucket.refund(20)
+        assert bucket.available == pytest.approx(20)
+        bucket.refund(1000)
+        assert bucket.available == pytest.approx(60)
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected_with_503():
+    async def main():
+        llm = make_admission(max_concurrency=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def call():
+            async with llm.slot(10):
+                await release.wait()
+
+        running = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        assert llm.stats()['waiting'] == 1
+
+        with pytest.raises(Overloaded) as rejected:
+            async with llm.slot(10):
+                pass
+        assert rejected.value.status_code == 503
+
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert llm.stats()['admitted'] == 2
+        assert llm.stats()['rejected_queue_full'] == 1
+
+    asyncio.run(main())
+
+
+def test_waiting_longer_than_the_queue_timeout_is_rejected():
+    async def main():
+        llm = make_admission(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with llm.slot(10):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as rejected:
+            async with llm.slot(10):
+                pass
+        assert rejected.value.status_code == 503
+        assert llm.stats()['waiting'] == 0
+
+        release.set()
+        await holder
+
+    asyncio.run(main())
+
+
+def test_token_rejection_refunds_the_request_unit():
+    async def main():
+        llm = make_admission(max_concurrency=4, requests_per_minute=2, tokens_per_minute=100, queue_timeout=0.01)
+
+        with pytest.raises(Overloaded) as rejected:
+            async with llm.slot(100):
+                async with llm.slot(100):
+                    pass
+        assert rejected.value.status_code == 429
+
+        # The rejected call did not use up a request, so a small call still gets in
+        assert llm._requests.available == pytest.approx(1, abs=0.01)
+        assert llm.stats()['rejected_rate_limited'] == 1
+        assert llm.stats()['running'] == 0
+
+    asyncio.run(main())
+
+
+def test_provider_rate_limits_are_retried():
+    async def main():
+        llm = make_admission(max_retries=2)
+        attempts = 0
+
+        async def flaky():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise RateLimitError()
+            return "answer"
+
+        assert await llm.with_retries(flaky) == "answer"
+        assert llm.stats()['retries'] == 2
+
+    asyncio.run(main())
+
+
+def test_persistent_rate_limits_become_overloaded():
+    async def main():
+        llm = make_admission(max_retries=1)
+
+        async def limited():
+            raise RateLimitError()
+
+        with pytest.raises(Overloaded) as rejected:
+            await llm.with_retries(limited)
+        assert rejected.value.status_code == 429
+        assert isinstance(rejected.value.__cause__, RateLimitError)
+
+    asyncio.run(main())
+
+
+def test_other_errors_are_not_retried():
+    async def main():
+        llm = make_admission(max_retries=3)
+        attempts = 0
+
+        async def broken():
+            nonlocal attempts
+            attempts += 1
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await llm.with_retries(broken)
+        assert attempts == 1
+
+    asyncio.run(main())
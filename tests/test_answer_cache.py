@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+from llama_index.core.llms import ChatMessage
+from query_database import answer_cache
+from query_database.answer_cache import AnswerCache, normalize_query, history_fingerprint
+
+EMBEDDINGS: Dict[str, List[float]] = {
+    'what is bm25': [1.0, 0.0, 0.0],
+    'explain bm25': [0.99, 0.1, 0.0],
+    'who wrote the report': [0.0, 1.0, 0.0],
+}
+
+
+async def embed_query(query: str) -> List[float]:
+    return EMBEDDINGS[normalize_query(query)]
+
+
+def turn(question: str, answer: str) -> List[ChatMessage]:
+    return [ChatMessage(role='user', content=question), ChatMessage(role='assistant', content=answer)]
+
+
+def make_cache(**kwargs) -> AnswerCache:
+    options = {'max_entries': 8, 'ttl_seconds': 60, 'history_turns': 1}
+    options.update(kwargs)
+    return AnswerCache(**options)
+
+
+def ask(cache: AnswerCache, query: str, history: List[ChatMessage] = ()):
+    return asyncio.run(cache.lookup(query, list(history)))
+
+
+def answer(cache: AnswerCache, query: str, text: str, history: List[ChatMessage] = ()) -> None:
+    _, state = ask(cache, query, history)
+    cache.store(state, text)
+
+
+def test_normalize_query():
+    assert normalize_query("  What   is BM25?? ") == 'what is bm25'
+
+
+def test_history_fingerprint_covers_the_recent_turns_and_the_summary():
+    summary = ChatMessage(role='system', content='Summary: we talked about invoices.')
+    history = turn("q1", "a1") + turn("q2", "a2")
+
+    assert history_fingerprint(history, 0) == ''
+    # Only the last turn counts with turns=1
+    assert history_fingerprint(turn("other", "other") + turn("q2", "a2"), 1) == history_fingerprint(history, 1)
+    assert history_fingerprint(history, 2) != history_fingerprint(history, 1)
+    assert history_fingerprint([summary] + history, 1) != history_fingerprint(history, 1)
+
+
+def test_exact_hit_ignores_case_and_punctuation(bump_generation):
+    cache = make_cache()
+    answer(cache, "What is BM25?", "A ranking function.")
+
+    cached, _ = ask(cache, "what is bm25")
+
+    assert cached == "A ranking function."
+    assert cache.stats()['exact_hits'] == 1
+
+
+def test_follow_ups_in_another_conversation_are_not_reused(bump_generation):
+    cache = make_cache()
+    answer(cache, "Explain that more", "About invoices...", turn("Tell me about invoices", "Invoices are..."))
+
+    cached, _ = ask(cache, "Explain that more", turn("Tell me about BM25", "BM25 is..."))
+    assert cached is None
+
+    cached, _ = ask(cache, "Explain that more", turn("Tell me about invoices", "Invoices are..."))
+    assert cached == "About invoices..."
+
+
+def test_semantic_hit_for_a_similar_question(bump_generation):
+    cache = make_cache(semantic_threshold=0.95, embed_query=embed_query)
+    answer(cache, "what is bm25", "A ranking function.")
+
+    assert ask(cache, "explain bm25")[0] == "A ranking function."
+    assert ask(cache, "who wrote the report")[0] is None
+    assert cache.stats()['semantic_hits'] == 1
+
+
+def test_semantic_hits_need_the_same_history(bump_generation):
+    cache = make_cache(semantic_threshold=0.95, embed_query=embed_query)
+    answer(cache, "what is bm25", "A ranking function.", turn("hi", "hello"))
+
+    assert ask(cache, "explain bm25")[0] is None
+
+
+def test_entries_expire_after_the_ttl(monkeypatch, bump_generation):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    cache = make_cache(ttl_seconds=60)
+    answer(cache, "what is bm25", "A ranking function.")
+
+    now[0] += 59
+    assert ask(cache, "what is bm25")[0] == "A ranking function."
+    now[0] += 2
+    assert ask(cache, "what is bm25")[0] is None
+
+
+def test_least_recently_used_answer_is_evicted(bump_generation):
+    cache = make_cache(max_entries=2)
+    answer(cache, "q1", "a1")
+    answer(cache, "q2", "a2")
+    ask(cache, "q1")
+    answer(cache, "q3", "a3")
+
+    assert ask(cache, "q2")[0] is None
+    assert ask(cache, "q1")[0] == "a1"
+    assert ask(cache, "q3")[0] == "a3"
+
+
+def test_new_corpus_generation_drops_every_answer(bump_generation):
+    cache = make_cache()
+    answer(cache, "what is bm25", "A ranking function.")
+
+    bump_generation()
+
+    assert ask(cache, "what is bm25")[0] is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_answers_generated_while_the_corpus_changed_are_not_stored(bump_generation):
+    cache = make_cache()
+    _, state = ask(cache, "what is bm25")
+
+    bump_generation()
+    cache.store(state, "An answer from the old corpus.")
+
+    assert ask(cache, "what is bm25")[0] is None
@@ -0,0 +1,177 @@
+import asyncio
+from typing import List
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from vector_store.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+from query_database.hybrid_retriever import HybridRetriever
+
+
+def chunk(text: str, **metadata):
+    return {'text': text, 'file_name': 'doc.txt', **metadata}
+
+
+def make_index(tmp_path, **kwargs) -> BM25Index:
+    return BM25Index(str(tmp_path / 'bm25' / 'index.json'), **kwargs)
+
+
+def test_tokenize_keeps_identifier_parts():
+    assert tokenize("Error AB-123 in Module_X!") == ['error', 'ab', '123', 'in', 'module_x']
+
+
+def test_search_ranks_exact_identifier_first(tmp_path):
+    index = make_index(tmp_path)
+    index.add([
+        ('a', chunk("the invoice was paid in march")),
+        ('b', chunk("invoice INV-2041 is overdue")),
+        ('c', chunk("nothing relevant here")),
+    ])
+
+    results = index.search("INV-2041", top_k=2)
+
+    assert [doc_id for doc_id, _, _ in results] == ['b']
+    assert results[0][2]['text'] == "invoice INV-2041 is overdue"
+
+
+def test_readding_a_chunk_replaces_its_postings(tmp_path):
+    index = make_index(tmp_path)
+    index.add([('a', chunk("alpha beta"))])
+    index.add([('a', chunk("gamma delta"))])
+
+    assert index.search("alpha", top_k=5) == []
+    assert [doc_id for doc_id, _, _ in index.search("gamma", top_k=5)] == ['a']
+    assert len(index) == 1
+
+
+def test_remove_and_clear(tmp_path):
+    index = make_index(tmp_path)
+    index.add([('a', chunk("alpha")), ('b', chunk("alpha beta"))])
+
+    assert index.remove(['a', 'missing']) == 1
+    assert [doc_id for doc_id, _, _ in index.search("alpha", top_k=5)] == ['b']
+
+    index.clear()
+    assert len(index) == 0
+    assert index.search("alpha", top_k=5) == []
+
+
+def test_changes_survive_a_reload_through_the_log(tmp_path):
+    index = make_index(tmp_path)
+    index.add([('a', chunk("alpha")), ('b', chunk("beta"))])
+    index.save()
+    index.remove(['a'])
+    index.save()
+
+    reloaded = make_index(tmp_path)
+
+    assert len(reloaded) == 1
+    assert [doc_id for doc_id, _, _ in reloaded.search("beta", top_k=5)] == ['b']
+    assert reloaded.search("alpha", top_k=5) == []
+
+
+def test_log_is_compacted_into_a_snapshot(tmp_path):
+    index = make_index(tmp_path, min_compaction_entries=3)
+    index.add([(f'doc{i}', chunk(f"word{i} shared")) for i in range(3)])
+    index.save()
+    assert not (tmp_path / 'bm25' / 'index.json').exists()
+
+    # Re-indexing the same chunks grows the log but not the corpus
+    for i in range(5):
+        index.add([('doc0', chunk(f"word0 shared revision{i}"))])
+        index.save()
+
+    assert (tmp_path / 'bm25' / 'index.json').exists()
+    assert index._log_entries <= 3
+
+    reloaded = make_index(tmp_path)
+    assert len(reloaded) == 3
+    assert [doc_id for doc_id, _, _ in reloaded.search("revision4", top_k=1)] == ['doc0']
+    assert reloaded.search("revision3", top_k=1) == []
+
+
+def test_picks_up_changes_saved_by_another_process(tmp_path):
+    reader = make_index(tmp_path)
+    writer = make_index(tmp_path)
+
+    writer.add([('a', chunk("alpha"))])
+    writer.save()
+
+    assert [doc_id for doc_id, _, _ in reader.search("alpha", top_k=5)] == ['a']
+
+
+def use_vector_store(tmp_path, monkeypatch, vectors):
+    import vector_store.main as vector_store_main
+
+    backend = vector_store_main.LocalBackend(str(tmp_path / 'vectors'), 'test', 2)
+    backend.upsert(vectors)
+    monkeypatch.setattr(vector_store_main, '_backend', backend)
+    monkeypatch.setattr(vector_store_main, '_bm25_index', None)
+    monkeypatch.setattr(vector_store_main, 'BM25_INDEX_PATH', str(tmp_path / 'bm25' / 'index.json'))
+    return vector_store_main
+
+
+def test_empty_index_is_backfilled_from_the_vector_store(tmp_path, monkeypatch):
+    vector_store_main = use_vector_store(tmp_path, monkeypatch, [
+        {'id': 'a', 'values': [1.0, 0.0], 'metadata': chunk("invoice INV-2041 is overdue")},
+        {'id': 'b', 'values': [0.0, 1.0], 'metadata': chunk("the invoice was paid in march")}
+    ])
+
+    index = vector_store_main.get_bm25_index()
+
+    assert len(index) == 2
+    assert [doc_id for doc_id, _, _ in index.search("INV-2041", top_k=5)] == ['a']
+    # The backfill is saved, so the next process does not repeat it
+    assert len(make_index(tmp_path)) == 2
+
+
+def test_empty_vector_store_leaves_the_index_empty(tmp_path, monkeypatch):
+    vector_store_main = use_vector_store(tmp_path, monkeypatch, [])
+
+    assert len(vector_store_main.get_bm25_index()) == 0
+
+
+def test_reciprocal_rank_fusion_normalises_and_orders():
+    fused = dict(reciprocal_rank_fusion([['a', 'b', 'c'], ['a', 'c']], k=60))
+
+    assert fused['a'] == 1.0
+    # 'c' appears in both rankings, 'b' only in one
+    assert fused['c'] > fused['b']
+    assert list(fused) == ['a', 'c', 'b']
+
+
+def test_reciprocal_rank_fusion_of_nothing():
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+class FakeDenseRetriever(BaseRetriever):
+    def __init__(self, node_ids: List[str]):
+        super().__init__()
+        self.node_ids = node_ids
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return [NodeWithScore(node=TextNode(id_=node_id, text=f"dense {node_id}"), score=0.5) for node_id in self.node_ids]
+
+
+def test_hybrid_retriever_fuses_dense_and_keyword_results(tmp_path):
+    index = make_index(tmp_path)
+    index.add([('kw', chunk("error code ZX-9 explained", page=3)), ('d2', chunk("ZX-9"))])
+    retriever = HybridRetriever(FakeDenseRetriever(['d2', 'd1']), index, sparse_top_k=5, top_k=3)
+
+    for results in (retriever.retrieve("ZX-9"), asyncio.run(retriever.aretrieve("ZX-9"))):
+        ids = [result.node.node_id for result in results]
+        # Ranked first by both searches, so it leads the fused list with the top score
+        assert ids[0] == 'd2'
+        assert set(ids) == {'d1', 'd2', 'kw'}
+        assert results[0].score == 1.0
+
+        keyword_only = next(result.node for result in results if result.node.node_id == 'kw')
+        assert keyword_only.text == "error code ZX-9 explained"
+        assert keyword_only.metadata == {'file_name': 'doc.txt', 'page': 3}
+
+
+def test_hybrid_retriever_cuts_to_top_k(tmp_path):
+    index = make_index(tmp_path)
+    index.add([(f'kw{i}', chunk(f"needle {i}")) for i in range(5)])
+    retriever = HybridRetriever(FakeDenseRetriever(['d1', 'd2', 'd3']), index, sparse_top_k=5, top_k=4)
+
+    assert len(retriever.retrieve("needle")) == 4
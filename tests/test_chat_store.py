@@ -0,0 +1,85 @@
+import json
+import pytest
+from functions import chat_store
+from functions.chat_store import append_turn, chat_log_version, read_last_turns
+
+
+@pytest.fixture
+def chat_log(tmp_path, monkeypatch):
+    log_path = tmp_path / 'database.jsonl'
+    monkeypatch.setattr(chat_store, 'CHAT_LOG_FILE', str(log_path))
+    monkeypatch.setattr(chat_store, 'LEGACY_DATABASE_FILE', str(tmp_path / 'database.json'))
+    return log_path
+
+
+def append_turns(count: int, start: int = 0) -> None:
+    for i in range(start, start + count):
+        append_turn(f"question {i}", f"answer {i}")
+
+
+def test_empty_log(chat_log):
+    assert read_last_turns(5) == []
+    assert chat_log.exists()
+
+
+def test_last_turns_in_chronological_order(chat_log):
+    append_turns(10)
+
+    assert read_last_turns(3) == [
+        {'user': 'question 7', 'assistant': 'answer 7'},
+        {'user': 'question 8', 'assistant': 'answer 8'},
+        {'user': 'question 9', 'assistant': 'answer 9'},
+    ]
+    assert len(read_last_turns(50)) == 10
+    assert read_last_turns(0) == []
+
+
+def test_skip_pages_further_back(chat_log):
+    append_turns(10)
+
+    assert [turn['user'] for turn in read_last_turns(3, skip=3)] == ['question 4', 'question 5', 'question 6']
+    assert [turn['user'] for turn in read_last_turns(3, skip=8)] == ['question 0', 'question 1']
+    assert read_last_turns(3, skip=10) == []
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 64])
+def test_tail_reads_across_block_boundaries(chat_log, monkeypatch, block_size):
+    monkeypatch.setattr(chat_store, 'TAIL_BLOCK_SIZE', block_size)
+    for i in range(20):
+        append_turn(f"question {i} " + "é" * i, f"answer {i}")
+
+    turns = read_last_turns(4, skip=1)
+
+    assert [turn['assistant'] for turn in turns] == ['answer 15', 'answer 16', 'answer 17', 'answer 18']
+    assert turns[0]['user'] == "question 15 " + "é" * 15
+
+
+def test_torn_line_is_skipped(chat_log):
+    append_turns(2)
+    with open(chat_log, 'a', encoding='utf-8') as file:
+        file.write('{"user": "cut off')
+
+    assert [turn['user'] for turn in read_last_turns(5)] == ['question 0', 'question 1']
+
+
+def test_legacy_database_is_migrated_once(chat_log, tmp_path):
+    legacy = [{'user': 'old question', 'assistant': 'old answer'}]
+    (tmp_path / 'database.json').write_text(json.dumps(legacy), encoding='utf-8')
+
+    append_turn("new question", "new answer")
+
+    assert read_last_turns(5) == legacy + [{'user': 'new question', 'assistant': 'new answer'}]
+
+    # The legacy file is left in place but not imported again
+    append_turn("newer question", "newer answer")
+    assert [turn['user'] for turn in read_last_turns(5)] == ['old question', 'new question', 'newer question']
+    assert (tmp_path / 'database.json').exists()
+
+
+def test_version_changes_with_every_turn(chat_log):
+    append_turns(1)
+    before = chat_log_version()
+
+    append_turns(1, start=1)
+
+    assert chat_log_version() != before
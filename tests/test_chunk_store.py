@@ -0,0 +1,116 @@
+import json
+import numpy as np
+from text_and_embeddings.chunk_store import (write_chunk_metadata, iter_chunk_metadata, read_chunk_metadata,
+                                             write_embeddings, read_embeddings, embeddings_path_for,
+                                             clear_chunks, convert_legacy_metadata, ChunkStagingWriter)
+
+
+def entries(count: int):
+    return [{'id': f'A.Txt#chunk_{i}', 'metadata': {'text': f"chunk {i}", 'file_name': 'a.txt'}} for i in range(count)]
+
+
+def test_metadata_is_written_one_chunk_per_line(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    write_chunk_metadata(path, entries(3))
+
+    lines = (tmp_path / 'metadata.jsonl').read_text(encoding='utf-8').splitlines()
+
+    assert [json.loads(line)['id'] for line in lines] == ['A.Txt#chunk_0', 'A.Txt#chunk_1', 'A.Txt#chunk_2']
+    assert read_chunk_metadata(path) == entries(3)
+    assert list(iter_chunk_metadata(str(tmp_path / 'missing.jsonl'))) == []
+
+
+def test_embeddings_sidecar_is_a_memory_mapped_float32_matrix(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    write_chunk_metadata(path, entries(2))
+    assert read_embeddings(path) is None
+
+    write_embeddings(path, [[0.5, 1.0, 0.0], [0.0, 0.25, 1.0]], dimension=3)
+    matrix = read_embeddings(path)
+
+    assert embeddings_path_for(path) == str(tmp_path / 'metadata.npy')
+    assert isinstance(matrix, np.memmap)
+    assert matrix.dtype == np.float32
+    assert matrix.tolist() == [[0.5, 1.0, 0.0], [0.0, 0.25, 1.0]]
+
+
+def test_rewriting_metadata_drops_the_outdated_sidecar(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    write_chunk_metadata(path, entries(2))
+    write_embeddings(path, [[1.0], [2.0]], dimension=1)
+
+    write_chunk_metadata(path, entries(1))
+
+    assert read_embeddings(path) is None
+
+
+def test_clear_chunks(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    write_chunk_metadata(path, entries(2))
+    write_embeddings(path, [[1.0], [2.0]], dimension=1)
+
+    clear_chunks(path)
+
+    assert read_chunk_metadata(path) == []
+    assert read_embeddings(path) is None
+
+
+def test_legacy_metadata_json_is_converted(tmp_path):
+    legacy = [dict(entry, values=[float(i), 1.0]) for i, entry in enumerate(entries(2))]
+    (tmp_path / 'metadata.json').write_text(json.dumps(legacy, indent=4), encoding='utf-8')
+    path = str(tmp_path / 'metadata.jsonl')
+
+    assert convert_legacy_metadata(str(tmp_path / 'metadata.json'), path, dimension=2) == 2
+
+    # The values only live in the sidecar
+    assert read_chunk_metadata(path) == entries(2)
+    assert read_embeddings(path).tolist() == [[0.0, 1.0], [1.0, 1.0]]
+
+
+def test_legacy_metadata_without_embeddings_gets_no_sidecar(tmp_path):
+    (tmp_path / 'metadata.json').write_text(json.dumps(entries(2)), encoding='utf-8')
+    path = str(tmp_path / 'metadata.jsonl')
+
+    assert convert_legacy_metadata(str(tmp_path / 'metadata.json'), path, dimension=2) == 2
+    assert read_embeddings(path) is None
+
+
+def test_staging_writer_streams_batches_into_both_files(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    writer = ChunkStagingWriter(path, dimension=2)
+    writer.append(entries(2), [[0.0, 1.0], [1.0, 1.0]])
+    writer.append(entries(3)[2:], [[2.0, 1.0]])
+
+    # Nothing is visible before the commit
+    assert not (tmp_path / 'metadata.jsonl').exists()
+
+    writer.commit()
+
+    assert read_chunk_metadata(path) == entries(3)
+    assert read_embeddings(path).tolist() == [[0.0, 1.0], [1.0, 1.0], [2.0, 1.0]]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metadata.jsonl', 'metadata.npy']
+
+
+def test_staging_an_empty_run_leaves_empty_files(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    write_chunk_metadata(path, entries(1))
+    write_embeddings(path, [[1.0, 1.0]], dimension=2)
+
+    ChunkStagingWriter(path, dimension=2).commit()
+
+    assert read_chunk_metadata(path) == []
+    assert read_embeddings(path).shape == (0, 2)
+
+
+def test_discarded_staging_keeps_the_previous_files(tmp_path):
+    path = str(tmp_path / 'metadata.jsonl')
+    write_chunk_metadata(path, entries(1))
+    write_embeddings(path, [[1.0, 1.0]], dimension=2)
+
+    writer = ChunkStagingWriter(path, dimension=2)
+    writer.append(entries(2), [[0.0, 1.0], [1.0, 1.0]])
+    writer.discard()
+
+    assert read_chunk_metadata(path) == entries(1)
+    assert read_embeddings(path).tolist() == [[1.0, 1.0]]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metadata.jsonl', 'metadata.npy']
@@ -0,0 +1,103 @@
+import io
+import socket
+import threading
+import h11
+import pytest
+from streamlit_api_calls import client
+
+
+class UnsizedFile(io.RawIOBase):
+    """A readable stream whose size cannot be found out in advance, like a pipe."""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+    def tell(self) -> int:
+        raise OSError("not seekable")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """
+    Serve one request on a local socket, parse it with h11 and return what was received.
+    """
+    listener = socket.create_server(('127.0.0.1', 0))
+    received = {}
+
+    def serve():
+        connection, _ = listener.accept()
+        with connection:
+            parser = h11.Connection(h11.SERVER)
+            body = b''
+            while True:
+                event = parser.next_event()
+                if event is h11.NEED_DATA:
+                    parser.receive_data(connection.recv(65536))
+                elif isinstance(event, h11.Request):
+                    received['headers'] = {name.decode().lower(): value.decode() for name, value in event.headers}
+                elif isinstance(event, h11.Data):
+                    body += event.data
+                elif isinstance(event, h11.EndOfMessage):
+                    break
+            received['body'] = body
+            connection.sendall(parser.send(h11.Response(status_code=200, headers=[('Content-Length', '0')])) +
+                               parser.send(h11.EndOfMessage()))
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    monkeypatch.setattr(client, 'FASTAPI_URL', f"http://127.0.0.1:{listener.getsockname()[1]}")
+    # A fresh session, so the pooled connection does not outlive the server
+    monkeypatch.setattr(client, '_session', None)
+
+    yield received
+
+    thread.join(timeout=5)
+    listener.close()
+
+
+def expected_body(boundary: str, *parts) -> bytes:
+    body = b''
+    for file_name, content in parts:
+        body += (f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{file_name}"\r\n'
+                 f'Content-Type: text/plain\r\n\r\n').encode() + content + b'\r\n'
+    return body + f'--{boundary}--\r\n'.encode()
+
+
+def test_multipart_body_streams_every_file_in_chunks():
+    files = [('files', ('a.txt', io.BytesIO(b'alpha' * 3), 'text/plain')),
+             ('files', ('b "quoted".txt', io.BytesIO(b'beta'), 'text/plain'))]
+
+    body, headers = client.multipart_body(files, chunk_size=4)
+    chunks = list(body)
+
+    assert headers == {'Content-Type': f'multipart/form-data; boundary={body.boundary}'}
+    assert b''.join(chunks) == expected_body(body.boundary, ('a.txt', b'alpha' * 3), ('b %22quoted%22.txt', b'beta'))
+    assert body.len == len(b''.join(chunks))
+    # The file is read chunk_size bytes at a time
+    assert chunks[1:5] == [b'alph', b'aalp', b'haal', b'pha']
+
+
+def test_upload_with_known_sizes_sends_a_content_length(server):
+    response = client.upload('/loader/uploadfiles', [('files', ('a.txt', io.BytesIO(b'alpha'), 'text/plain'))])
+
+    assert response.status_code == 200
+    assert 'transfer-encoding' not in server['headers']
+    assert int(server['headers']['content-length']) == len(server['body'])
+    boundary = server['headers']['content-type'].split('boundary=')[1]
+    assert server['body'] == expected_body(boundary, ('a.txt', b'alpha'))
+
+
+def test_upload_of_unsized_files_is_chunked(server):
+    response = client.upload('/loader/uploadfiles', [('files', ('a.txt', UnsizedFile(b'alpha' * 1000), 'text/plain'))])
+
+    assert response.status_code == 200
+    assert server['headers']['transfer-encoding'] == 'chunked'
+    assert 'content-length' not in server['headers']
+    boundary = server['headers']['content-type'].split('boundary=')[1]
+    assert server['body'] == expected_body(boundary, ('a.txt', b'alpha' * 1000))
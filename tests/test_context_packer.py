@@ -0,0 +1,95 @@
+from llama_index.core.schema import NodeWithScore, TextNode
+from query_database.context_packer import ContextPacker, split_chunk_id, join_overlapping
+
+
+def result(node_id: str, text: str, score: float) -> NodeWithScore:
+    return NodeWithScore(node=TextNode(id_=node_id, text=text, metadata={'file_name': node_id.split('#')[0]}), score=score)
+
+
+def ids(results):
+    return [result.node.node_id for result in results]
+
+
+def test_split_chunk_id():
+    assert split_chunk_id('Report.Txt#chunk_12') == ('Report.Txt', 12)
+    assert split_chunk_id('some-node') == ('some-node', None)
+
+
+def test_join_overlapping_drops_the_repeated_text():
+    assert join_overlapping("the quick brown fox", "brown fox jumps", max_overlap=50) == "the quick brown fox jumps"
+    assert join_overlapping("alpha", "beta", max_overlap=50) == "alpha\nbeta"
+
+
+def test_adjacent_chunks_of_a_file_are_merged_into_runs():
+    packer = ContextPacker(token_budget=1000)
+    nodes = [
+        result('A.Txt#chunk_2', "cats sleep all day long", 0.4),
+        result('A.Txt#chunk_0', "invoices are due monthly", 0.9),
+        result('A.Txt#chunk_1', "due monthly unless agreed otherwise", 0.5),
+        result('B.Txt#chunk_1', "unrelated chapter about shipping", 0.6),
+    ]
+
+    packed = packer.postprocess_nodes(nodes)
+
+    # chunk_0-2 form one run scored by its best part; B's lone chunk stays as it is
+    assert ids(packed) == ['A.Txt#chunk_0-2', 'B.Txt#chunk_1']
+    assert packed[0].score == 0.9
+    assert packed[0].node.get_content() == (
+        "invoices are due monthly unless agreed otherwise\ncats sleep all day long"
+    )
+    assert packed[0].node.metadata == {'file_name': 'A.Txt'}
+
+
+def test_runs_break_at_gaps():
+    packer = ContextPacker(token_budget=1000)
+    nodes = [
+        result('A.Txt#chunk_0', "first topic words", 0.9),
+        result('A.Txt#chunk_1', "second topic terms", 0.8),
+        result('A.Txt#chunk_3', "fourth topic phrases", 0.7),
+    ]
+
+    assert ids(packer.postprocess_nodes(nodes)) == ['A.Txt#chunk_0-1', 'A.Txt#chunk_3']
+
+
+def test_near_duplicates_are_dropped():
+    packer = ContextPacker(token_budget=1000)
+    nodes = [
+        result('A.Txt#chunk_0', "the refund policy allows returns within thirty days", 0.9),
+        result('B.Txt#chunk_5', "refund policy allows returns within thirty days", 0.8),
+    ]
+
+    assert ids(packer.postprocess_nodes(nodes)) == ['A.Txt#chunk_0']
+
+
+def test_chunks_are_packed_by_score_within_the_token_budget():
+    texts = {
+        'A.Txt#chunk_0': "alpha " * 40,
+        'B.Txt#chunk_0': "beta " * 40,
+        'C.Txt#chunk_0': "gamma " * 10,
+    }
+    packer = ContextPacker(token_budget=0)
+    budget = packer.count_tokens(texts['A.Txt#chunk_0']) + packer.count_tokens(texts['C.Txt#chunk_0'])
+    packer = ContextPacker(token_budget=budget)
+
+    nodes = [result('B.Txt#chunk_0', texts['B.Txt#chunk_0'], 0.5),
+             result('A.Txt#chunk_0', texts['A.Txt#chunk_0'], 0.9),
+             result('C.Txt#chunk_0', texts['C.Txt#chunk_0'], 0.1)]
+    packed = packer.postprocess_nodes(nodes)
+
+    # B does not fit after A, but the smaller C still does
+    assert ids(packed) == ['A.Txt#chunk_0', 'C.Txt#chunk_0']
+
+    stats = packer.stats()
+    assert stats['chunks_in'] == 3
+    assert stats['chunks_out'] == 2
+    assert stats['tokens_out'] == budget
+    assert stats['tokens_saved'] == packer.count_tokens(texts['B.Txt#chunk_0'])
+
+
+def test_best_chunk_is_kept_even_over_the_budget():
+    packer = ContextPacker(token_budget=1)
+
+    packed = packer.postprocess_nodes([result('A.Txt#chunk_0', "a chunk well over one token", 0.9),
+                                       result('B.Txt#chunk_0', "another different chunk", 0.5)])
+
+    assert ids(packed) == ['A.Txt#chunk_0']
@@ -0,0 +1,40 @@
+import os
+import sys
+import subprocess
+import vector_store.main as vector_store_main
+from vector_store.main import get_corpus_generation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bumps the generation the way a CLI ingestion run would, from its own process
+BUMP_SCRIPT = """
+import sys
+import vector_store.main as vector_store_main
+vector_store_main.CORPUS_GENERATION_FILE = sys.argv[1]
+print(vector_store_main.bump_corpus_generation())
+"""
+
+
+def bump_in_another_process() -> int:
+    result = subprocess.run([sys.executable, '-c', BUMP_SCRIPT, vector_store_main.CORPUS_GENERATION_FILE],
+                            cwd=ROOT, check=True, capture_output=True, text=True)
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def test_bump_is_written_to_disk(bump_generation):
+    generation = bump_generation()
+
+    assert get_corpus_generation() == generation
+    assert vector_store_main._load_corpus_generation() == generation
+
+
+def test_bump_from_another_process_is_picked_up(bump_generation):
+    generation = bump_generation()
+
+    assert bump_in_another_process() == generation + 1
+    assert get_corpus_generation() == generation + 1
+
+    # A bump in this process continues from the other process's generation
+    assert bump_generation() == generation + 2
+    assert bump_in_another_process() == generation + 3
+    assert get_corpus_generation() == generation + 3
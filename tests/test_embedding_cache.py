@@ -0,0 +1,96 @@
+import asyncio
+import numpy as np
+from types import SimpleNamespace
+from text_and_embeddings import embeddings
+from text_and_embeddings.embedding_cache import EmbeddingCache
+
+
+def vec(i: int, dimension: int = 4):
+    return [float(i), 1.0, 0.0, 0.0][:dimension]
+
+
+def keys(*texts: str):
+    return [EmbeddingCache.key('model', text) for text in texts]
+
+
+def test_key_depends_on_model_and_text():
+    assert EmbeddingCache.key('model', 'text') == EmbeddingCache.key('model', 'text')
+    assert EmbeddingCache.key('model', 'text') != EmbeddingCache.key('other-model', 'text')
+    assert EmbeddingCache.key('model', 'text') != EmbeddingCache.key('model', 'text ')
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), 4, max_entries=10)
+    cache.put_many(keys('a', 'b'), [vec(1), vec(2)])
+
+    results = cache.get_many(keys('a', 'c', 'b'))
+
+    assert results[0] == vec(1)
+    assert results[1] is None
+    assert results[2] == vec(2)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_saved_vectors_survive_a_reopen(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), 4, max_entries=10)
+    cache.put_many(keys('a'), [vec(1)])
+    cache.save()
+
+    reopened = EmbeddingCache(str(tmp_path), 4, max_entries=10)
+
+    assert len(reopened) == 1
+    assert reopened.get_many(keys('a')) == [vec(1)]
+
+
+def test_index_of_another_dimension_is_ignored(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache'), 4, max_entries=10)
+    cache.put_many(keys('a'), [vec(1)])
+    cache.save()
+
+    assert len(EmbeddingCache(str(tmp_path / 'cache'), 8, max_entries=10)) == 0
+
+
+def test_least_recently_used_entries_are_evicted_and_rows_reused(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), 4, max_entries=10)
+    texts = [f't{i}' for i in range(10)]
+    for i, text in enumerate(texts):
+        cache.put_many(keys(text), [vec(i)])
+
+    # Touch t0, so t1 is now the least recently used entry
+    cache.get_many(keys('t0'))
+    cache.put_many(keys('new'), [vec(99)])
+
+    assert len(cache) == 10
+    assert cache.get_many(keys('t1')) == [None]
+    assert cache.get_many(keys('t0', 'new')) == [vec(0), vec(99)]
+    # The evicted row was reused instead of growing the matrix
+    rows = {row for row, _ in cache._entries.values()}
+    assert rows == set(range(10))
+
+
+def test_vectors_are_stored_as_float32(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), 4, max_entries=10)
+    cache.put_many(keys('a'), [[0.1, 0.2, 0.3, 0.4]])
+
+    assert cache.get_many(keys('a'))[0] == np.asarray([0.1, 0.2, 0.3, 0.4], dtype=np.float32).tolist()
+
+
+def test_embed_texts_returns_hits_and_misses(tmp_path, monkeypatch):
+    embedded = []
+
+    def embed_documents(texts):
+        embedded.extend(texts)
+        return [vec(len(text)) for text in texts]
+
+    monkeypatch.setattr(embeddings, '_embedding_cache', EmbeddingCache(str(tmp_path), 4, max_entries=10))
+    monkeypatch.setattr(embeddings, 'get_embedding_model', lambda: SimpleNamespace(embed_documents=embed_documents))
+
+    vectors, hits, misses = asyncio.run(embeddings.embed_texts(['a', 'bb', 'a'], save=False))
+    assert vectors == [vec(1), vec(2), vec(1)]
+    assert (hits, misses) == (0, 3)
+    assert embedded == ['a', 'bb']
+
+    vectors, hits, misses = asyncio.run(embeddings.embed_texts(['bb', 'ccc'], save=False))
+    assert vectors == [vec(2), vec(3)]
+    assert (hits, misses) == (1, 1)
+    assert embedded == ['a', 'bb', 'ccc']
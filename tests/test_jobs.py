@@ -0,0 +1,153 @@
+import asyncio
+import pytest
+from jobs.job_store import JobStore, QUEUED, RUNNING, SUCCEEDED, FAILED
+from jobs.main import JobQueue
+
+
+async def two_stages(job, on_stage):
+    on_stage('extract')
+    await asyncio.sleep(0)
+    on_stage('upsert')
+    return {'upserted': job['params'].get('count', 0)}
+
+async def broken(job, on_stage):
+    on_stage('extract')
+    raise RuntimeError("loader failed")
+
+RUNNERS = {'ingest': two_stages, 'broken': broken}
+
+
+async def wait_for(queue: JobQueue, job_id: str):
+    for _ in range(200):
+        job = queue.store.get(job_id)
+        if job['status'] in (SUCCEEDED, FAILED):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_its_stages_and_is_persisted(tmp_path):
+    path = str(tmp_path / 'jobs.json')
+
+    async def main():
+        queue = JobQueue(JobStore(path, history_limit=10), workers=1, runners=RUNNERS)
+        await queue.start()
+        submitted = await queue.submit('ingest', {'count': 3})
+        assert submitted['status'] == QUEUED
+
+        job = await wait_for(queue, submitted['id'])
+        await queue.stop()
+        return job
+
+    job = asyncio.run(main())
+
+    assert job['status'] == SUCCEEDED
+    assert job['result'] == {'upserted': 3}
+    assert job['attempts'] == 1
+    assert [stage['name'] for stage in job['stages']] == ['extract', 'upsert']
+    assert all(stage['status'] == SUCCEEDED for stage in job['stages'])
+
+    reopened = JobStore(path, history_limit=10)
+    assert reopened.get(job['id'])['status'] == SUCCEEDED
+
+
+def test_failed_runner_marks_the_job_and_its_stage_failed(tmp_path):
+    async def main():
+        queue = JobQueue(JobStore(str(tmp_path / 'jobs.json'), history_limit=10), workers=1, runners=RUNNERS)
+        await queue.start()
+        job = await wait_for(queue, (await queue.submit('broken'))['id'])
+        await queue.stop()
+        return job
+
+    job = asyncio.run(main())
+
+    assert job['status'] == FAILED
+    assert job['error'] == "loader failed"
+    assert job['stages'][-1]['status'] == FAILED
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    async def main():
+        queue = JobQueue(JobStore(str(tmp_path / 'jobs.json'), history_limit=10), workers=1, runners=RUNNERS)
+        await queue.start()
+        try:
+            with pytest.raises(ValueError):
+                await queue.submit('reindex')
+        finally:
+            await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_jobs_interrupted_by_a_restart_run_again(tmp_path):
+    path = str(tmp_path / 'jobs.json')
+    store = JobStore(path, history_limit=10)
+    interrupted = store.create('ingest', {'count': 1})
+    store.update(interrupted['id'], status=RUNNING, attempts=1)
+    store.start_stage(interrupted['id'], 'extract')
+    waiting = store.create('ingest', {'count': 2})
+    store.save()
+
+    async def main():
+        queue = JobQueue(JobStore(path, history_limit=10), workers=1, runners=RUNNERS)
+        await queue.start()
+        jobs = [await wait_for(queue, job['id']) for job in (interrupted, waiting)]
+        await queue.stop()
+        return jobs
+
+    resumed, queued = asyncio.run(main())
+
+    assert resumed['status'] == queued['status'] == SUCCEEDED
+    assert resumed['attempts'] == 2
+    # The stages of the interrupted attempt are not kept
+    assert [stage['name'] for stage in resumed['stages']] == ['extract', 'upsert']
+    assert queued['result'] == {'upserted': 2}
+
+
+def test_only_the_most_recent_finished_jobs_are_kept(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.json'), history_limit=2)
+    jobs = [store.create('ingest', {}) for _ in range(3)]
+    for job in jobs:
+        store.finish(job['id'], SUCCEEDED)
+
+    assert store.get(jobs[0]['id']) is None
+    assert {job['id'] for job in store.list()} == {jobs[1]['id'], jobs[2]['id']}
+
+
+def test_unreadable_state_file_starts_empty(tmp_path):
+    path = tmp_path / 'jobs.json'
+    path.write_text('{broken', encoding='utf-8')
+
+    assert JobStore(str(path), history_limit=2).list() == []
+
+
+def test_every_stage_is_persisted_while_the_job_runs(tmp_path):
+    path = str(tmp_path / 'jobs.json')
+
+    async def main():
+        in_upsert = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow(job, on_stage):
+            on_stage('extract')
+            on_stage('upsert')
+            in_upsert.set()
+            await release.wait()
+
+        queue = JobQueue(JobStore(path, history_limit=10), workers=1, runners={'ingest': slow})
+        await queue.start()
+        job = await queue.submit('ingest')
+        await in_upsert.wait()
+        await asyncio.gather(*queue._saves)
+
+        on_disk = JobStore(path, history_limit=10).get(job['id'])
+
+        release.set()
+        await wait_for(queue, job['id'])
+        await queue.stop()
+        return on_disk
+
+    on_disk = asyncio.run(main())
+
+    assert on_disk['status'] == RUNNING
+    assert [(stage['name'], stage['status']) for stage in on_disk['stages']] == [('extract', SUCCEEDED), ('upsert', RUNNING)]
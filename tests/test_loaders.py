@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+
+# The loaders import the LlamaParse and Gemini clients at module level
+pytest.importorskip('llama_parse')
+pytest.importorskip('google.generativeai')
+
+from loaders import main as loaders_main
+
+
+def test_failed_loader_fails_processing_after_the_others_finish(tmp_path, monkeypatch):
+    (tmp_path / 'input').mkdir()
+    for name in ('scan.pdf', 'notes.txt'):
+        (tmp_path / 'input' / name).write_text('x', encoding='utf-8')
+    finished = []
+
+    async def broken_pdf_loader(input_dir, output_dir):
+        raise ValueError("corrupt pdf")
+
+    async def text_loader(input_dir, output_dir):
+        await asyncio.sleep(0)
+        finished.append('text')
+
+    monkeypatch.setattr(loaders_main, 'input_dir', str(tmp_path / 'input'))
+    monkeypatch.setattr(loaders_main, 'output_dir', str(tmp_path / 'output'))
+    monkeypatch.setattr(loaders_main, 'pdfLoader', broken_pdf_loader)
+    monkeypatch.setattr(loaders_main, 'llamaparser', text_loader)
+
+    with pytest.raises(RuntimeError, match="1 of 2 loaders: pdf: corrupt pdf") as failed:
+        asyncio.run(loaders_main.process_files())
+
+    assert isinstance(failed.value.__cause__, ValueError)
+    assert finished == ['text']
@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+from vector_store.local_store import LocalVectorStore
+
+
+def vector(vector_id: str, values, **metadata):
+    return {'id': vector_id, 'values': list(values), 'metadata': {'text': vector_id, **metadata}}
+
+
+def basis(i: int, dimension: int = 4):
+    return [1.0 if j == i else 0.0 for j in range(dimension)]
+
+
+def best_match(store: LocalVectorStore, values) -> str:
+    return store.query(values, top_k=1)[0][0]
+
+
+def test_query_ranks_by_cosine_similarity(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a', [1, 0, 0, 0]), vector('b', [1, 1, 0, 0]), vector('c', [0, 0, 1, 0])])
+
+    results = store.query([2, 0, 0, 0], top_k=2)
+
+    assert [vector_id for vector_id, _, _ in results] == ['a', 'b']
+    assert results[0][1] == pytest.approx(1.0)
+    assert results[0][2] == {'text': 'a'}
+    assert store.query([1, 0, 0, 0], top_k=0) == []
+
+
+def test_upsert_overwrites_existing_ids(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a', basis(0))])
+    store.upsert([vector('a', basis(1), version=2)])
+
+    assert len(store) == 1
+    assert store.query(basis(1), top_k=1) == [('a', pytest.approx(1.0), {'text': 'a', 'version': 2})]
+
+
+def test_delete_moves_the_last_row_into_the_gap(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector(f'v{i}', basis(i)) for i in range(4)])
+
+    assert store.delete(ids=['v1', 'missing']) == 1
+
+    assert sorted(store.list_ids()) == ['v0', 'v2', 'v3']
+    # v3 now sits in v1's old row and still matches its own vector
+    for i in (0, 2, 3):
+        assert best_match(store, basis(i)) == f'v{i}'
+
+
+def test_delete_by_prefix_and_all(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a.txt#chunk_0', basis(0)), vector('a.txt#chunk_1', basis(1)), vector('b.txt#chunk_0', basis(2))])
+
+    assert store.delete(prefix='a.txt#') == 2
+    assert store.list_ids() == ['b.txt#chunk_0']
+    assert store.list_ids(prefix='a.txt#') == []
+
+    assert store.delete(delete_all=True) == 1
+    assert len(store) == 0
+
+
+def test_delete_by_ids_and_prefix_counts_each_vector_once(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a.txt#chunk_0', basis(0)), vector('a.txt#chunk_1', basis(1)), vector('b.txt#chunk_0', basis(2))])
+
+    assert store.delete(ids=['a.txt#chunk_0', 'b.txt#chunk_0', 'a.txt#chunk_0'], prefix='a.txt#') == 3
+    assert len(store) == 0
+
+
+def test_vectors_and_metadata_survive_a_reopen(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector(f'v{i}', basis(i)) for i in range(4)])
+    store.delete(ids=['v0'])
+
+    reopened = LocalVectorStore(str(tmp_path), 4)
+
+    assert sorted(reopened.list_ids()) == ['v1', 'v2', 'v3']
+    for i in (1, 2, 3):
+        assert best_match(reopened, basis(i)) == f'v{i}'
+
+
+def test_matrix_grows_past_its_initial_capacity(tmp_path):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(1500, 16))
+    store = LocalVectorStore(str(tmp_path), 16)
+    store.upsert([vector(f'v{i}', row) for i, row in enumerate(values)])
+
+    reopened = LocalVectorStore(str(tmp_path), 16)
+    assert len(reopened) == 1500
+    assert best_match(reopened, values[1499]) == 'v1499'
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a', basis(0))])
+
+    with pytest.raises(ValueError):
+        store.upsert([vector('b', [1.0, 0.0])])
+    with pytest.raises(ValueError):
+        LocalVectorStore(str(tmp_path), 8)
+
+
+def test_changes_are_replayed_from_the_log(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector(f'v{i}', basis(i)) for i in range(4)])
+    store.upsert([vector('v0', basis(0), version=2)])
+    store.delete(ids=['v1', 'v0'])
+
+    # Nothing was compacted; the table only exists as a log
+    assert not (tmp_path / 'table.json').exists()
+
+    reopened = LocalVectorStore(str(tmp_path), 4)
+    assert reopened.list_ids() == store.list_ids()
+    for i in (2, 3):
+        assert best_match(reopened, basis(i)) == f'v{i}'
+
+
+def test_log_is_compacted_into_a_snapshot(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4, min_compaction_rows=4)
+    store.upsert([vector(f'v{i}', basis(i)) for i in range(3)])
+    assert (tmp_path / 'table.log').exists()
+
+    # Rewriting the same rows grows the log past the table
+    store.upsert([vector('v0', basis(0), version=2), vector('v1', basis(1), version=2)])
+
+    assert (tmp_path / 'table.json').exists()
+    assert not (tmp_path / 'table.log').exists()
+
+    store.delete(ids=['v2'])
+    reopened = LocalVectorStore(str(tmp_path), 4, min_compaction_rows=4)
+    assert sorted(reopened.list_ids()) == ['v0', 'v1']
+    assert reopened.query(basis(0), top_k=1)[0][2] == {'text': 'v0', 'version': 2}
+
+
+def test_torn_last_log_line_is_ignored(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a', basis(0))])
+    with open(tmp_path / 'table.log', 'a', encoding='utf-8') as file:
+        file.write('{"op": "upsert", "entr')
+
+    assert LocalVectorStore(str(tmp_path), 4).list_ids() == ['a']
+
+
+def test_log_of_an_older_snapshot_is_not_replayed(tmp_path):
+    store = LocalVectorStore(str(tmp_path), 4)
+    store.upsert([vector('a', basis(0)), vector('b', basis(1))])
+    stale_log = (tmp_path / 'table.log').read_text(encoding='utf-8')
+
+    store.delete(delete_all=True)
+    # A compaction interrupted after the snapshot was written, before the old log was removed
+    (tmp_path / 'table.log').write_text(stale_log, encoding='utf-8')
+
+    assert LocalVectorStore(str(tmp_path), 4).list_ids() == []
@@ -0,0 +1,104 @@
+import os
+from text_and_embeddings.manifest import (MANIFEST_FILE_NAME, load_manifest, save_manifest, forget_files,
+                                          scan_directory, plan_ingestion, stale_chunk_ids)
+
+
+def write(directory, name: str, content: str, mtime: float = None) -> None:
+    path = directory / name
+    path.write_text(content, encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def ingest(directory, chunk_ids) -> None:
+    """Record a successful ingestion that produced `chunk_ids` (file name -> ids)."""
+    plan = plan_ingestion(str(directory))
+    for file_name in plan['changed_files']:
+        plan['manifest'][file_name]['chunk_ids'] = chunk_ids[file_name]
+    save_manifest(str(directory), plan['manifest'])
+
+
+def test_manifest_round_trip_and_broken_file(tmp_path):
+    assert load_manifest(str(tmp_path)) == {}
+
+    save_manifest(str(tmp_path), {'a.txt': {'chunk_ids': ['A.Txt#chunk_0']}})
+    assert load_manifest(str(tmp_path)) == {'a.txt': {'chunk_ids': ['A.Txt#chunk_0']}}
+
+    (tmp_path / MANIFEST_FILE_NAME).write_text('{not json', encoding='utf-8')
+    assert load_manifest(str(tmp_path)) == {}
+
+
+def test_scan_finds_new_files_and_ignores_other_extensions(tmp_path):
+    write(tmp_path, 'a.txt', 'alpha')
+    write(tmp_path, 'image.png', 'not text')
+
+    entries, changed, removed = scan_directory(str(tmp_path), {})
+
+    assert changed == ['a.txt']
+    assert removed == []
+    assert set(entries) == {'a.txt'}
+    assert entries['a.txt']['chunk_ids'] == []
+
+
+def test_unchanged_files_are_not_reingested(tmp_path):
+    write(tmp_path, 'a.txt', 'alpha')
+    ingest(tmp_path, {'a.txt': ['A.Txt#chunk_0']})
+
+    plan = plan_ingestion(str(tmp_path))
+
+    assert plan['changed_files'] == []
+    assert plan['manifest']['a.txt']['chunk_ids'] == ['A.Txt#chunk_0']
+
+
+def test_touched_file_with_the_same_content_keeps_its_chunks(tmp_path):
+    write(tmp_path, 'a.txt', 'alpha', mtime=1_000_000)
+    ingest(tmp_path, {'a.txt': ['A.Txt#chunk_0']})
+    write(tmp_path, 'a.txt', 'alpha', mtime=2_000_000)
+
+    plan = plan_ingestion(str(tmp_path))
+
+    assert plan['changed_files'] == []
+    assert plan['manifest']['a.txt']['chunk_ids'] == ['A.Txt#chunk_0']
+    assert plan['manifest']['a.txt']['mtime'] == 2_000_000
+
+
+def test_stale_chunks_of_shrunk_and_removed_files(tmp_path):
+    write(tmp_path, 'a.txt', 'long text', mtime=1_000_000)
+    write(tmp_path, 'b.txt', 'beta')
+    ingest(tmp_path, {'a.txt': ['A.Txt#chunk_0', 'A.Txt#chunk_1', 'A.Txt#chunk_2'], 'b.txt': ['B.Txt#chunk_0']})
+
+    write(tmp_path, 'a.txt', 'short', mtime=2_000_000)
+    os.remove(tmp_path / 'b.txt')
+    plan = plan_ingestion(str(tmp_path))
+
+    assert plan['changed_files'] == ['a.txt']
+    assert plan['removed_files'] == ['b.txt']
+    assert 'b.txt' not in plan['manifest']
+
+    # The pipeline fills in the chunk ids the changed file produces now
+    plan['manifest']['a.txt']['chunk_ids'] = ['A.Txt#chunk_0']
+    assert stale_chunk_ids(plan) == ['A.Txt#chunk_1', 'A.Txt#chunk_2', 'B.Txt#chunk_0']
+
+
+def test_new_files_have_no_stale_chunks(tmp_path):
+    write(tmp_path, 'a.txt', 'alpha')
+    plan = plan_ingestion(str(tmp_path))
+    plan['manifest']['a.txt']['chunk_ids'] = ['A.Txt#chunk_0']
+
+    assert stale_chunk_ids(plan) == []
+
+
+def test_forgotten_files_are_ingested_again(tmp_path):
+    write(tmp_path, 'a.txt', 'alpha')
+    write(tmp_path, 'b.txt', 'beta')
+    ingest(tmp_path, {'a.txt': ['A.Txt#chunk_0'], 'b.txt': ['B.Txt#chunk_0']})
+
+    forget_files(str(tmp_path), ['a.txt'])
+    assert plan_ingestion(str(tmp_path))['changed_files'] == ['a.txt']
+
+    forget_files(str(tmp_path))
+    assert plan_ingestion(str(tmp_path))['changed_files'] == ['a.txt', 'b.txt']
+
+
+def test_missing_directory_has_no_plan(tmp_path):
+    assert plan_ingestion(str(tmp_path / 'missing')) is None
@@ -0,0 +1,144 @@
+import asyncio
+from typing import List
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from vector_store.main import get_corpus_generation
+from query_database.retrieval_cache import RetrievalCache, QueryEmbedder, CachedRetriever
+
+
+def nodes(*node_ids: str) -> List[NodeWithScore]:
+    return [NodeWithScore(node=TextNode(id_=node_id, text=node_id), score=0.5) for node_id in node_ids]
+
+
+class FakeEmbedModel:
+    def __init__(self):
+        self.calls = 0
+
+    def get_query_embedding(self, query: str) -> List[float]:
+        self.calls += 1
+        return [float(len(query)), 1.0, 0.0]
+
+    async def aget_query_embedding(self, query: str) -> List[float]:
+        return self.get_query_embedding(query)
+
+
+class CountingRetriever(BaseRetriever):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.embeddings = []
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        self.calls += 1
+        self.embeddings.append(query_bundle.embedding)
+        return nodes(f"hit{self.calls}")
+
+
+def make_retriever(cache: RetrievalCache):
+    embed_model = FakeEmbedModel()
+    inner = CountingRetriever()
+    retriever = CachedRetriever(inner, cache, QueryEmbedder(embed_model, max_entries=8), top_k=5, namespace='ns', cutoff=0.0)
+    return retriever, inner, embed_model
+
+
+def test_key_depends_on_every_search_parameter():
+    key = RetrievalCache.key([0.1, 0.2], 5, 'ns', 0.0)
+
+    assert key == RetrievalCache.key([0.1, 0.2], 5, 'ns', 0.0)
+    assert key != RetrievalCache.key([0.1, 0.3], 5, 'ns', 0.0)
+    assert key != RetrievalCache.key([0.1, 0.2], 6, 'ns', 0.0)
+    assert key != RetrievalCache.key([0.1, 0.2], 5, 'other', 0.0)
+    assert key != RetrievalCache.key([0.1, 0.2], 5, 'ns', 0.5)
+
+
+def test_least_recently_used_entry_is_evicted(bump_generation):
+    cache = RetrievalCache(max_entries=2)
+    generation = get_corpus_generation()
+    cache.put('a', nodes('a'), generation)
+    cache.put('b', nodes('b'), generation)
+
+    cache.get('a')
+    cache.put('c', nodes('c'), generation)
+
+    assert cache.get('b') is None
+    assert [result.node.node_id for result in cache.get('a')] == ['a']
+    assert [result.node.node_id for result in cache.get('c')] == ['c']
+    assert cache.stats() == {'entries': 2, 'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+
+
+def test_callers_cannot_change_cached_scores(bump_generation):
+    cache = RetrievalCache(max_entries=2)
+    cache.put('a', nodes('a'), get_corpus_generation())
+
+    cache.get('a')[0].score = 0.0
+
+    assert cache.get('a')[0].score == 0.5
+
+
+def test_new_corpus_generation_invalidates_entries(bump_generation):
+    cache = RetrievalCache(max_entries=2)
+    cache.put('a', nodes('a'), get_corpus_generation())
+
+    bump_generation()
+
+    assert cache.get('a') is None
+
+
+def test_results_computed_under_an_old_generation_are_not_stored(bump_generation):
+    cache = RetrievalCache(max_entries=2)
+    stale = get_corpus_generation()
+    bump_generation()
+
+    cache.put('a', nodes('a'), stale)
+
+    assert cache.stats()['entries'] == 0
+
+
+def test_persisted_entries_of_the_current_generation_are_reloaded(tmp_path, bump_generation):
+    path = str(tmp_path / 'retrieval_cache.pkl')
+    cache = RetrievalCache(max_entries=4, persist_path=path)
+    cache.put('a', nodes('a'), get_corpus_generation())
+    cache.save()
+
+    assert [result.node.node_id for result in RetrievalCache(max_entries=4, persist_path=path).get('a')] == ['a']
+
+    bump_generation()
+    assert RetrievalCache(max_entries=4, persist_path=path).stats()['entries'] == 0
+
+
+def test_query_embedder_embeds_each_question_once():
+    embed_model = FakeEmbedModel()
+    embedder = QueryEmbedder(embed_model, max_entries=1)
+
+    first = embedder.embed("hello")
+    assert asyncio.run(embedder.aembed("hello")) == first
+    assert embed_model.calls == 1
+
+    embedder.embed("another question")
+    embedder.embed("hello")
+    assert embed_model.calls == 3
+    assert embedder.stats() == {'entries': 1, 'hits': 1, 'misses': 3}
+
+
+def test_cached_retriever_serves_repeated_queries_from_the_cache(bump_generation):
+    retriever, inner, embed_model = make_retriever(RetrievalCache(max_entries=8))
+
+    first = retriever.retrieve("what is bm25")
+    second = asyncio.run(retriever.aretrieve("what is bm25"))
+
+    assert [result.node.node_id for result in first] == [result.node.node_id for result in second] == ['hit1']
+    assert inner.calls == 1
+    assert embed_model.calls == 1
+    # The wrapped retriever gets the embedding instead of computing it again
+    assert inner.embeddings == [[12.0, 1.0, 0.0]]
+
+
+def test_cached_retriever_searches_again_after_the_corpus_changes(bump_generation):
+    retriever, inner, embed_model = make_retriever(RetrievalCache(max_entries=8))
+    retriever.retrieve("what is bm25")
+
+    bump_generation()
+
+    assert [result.node.node_id for result in retriever.retrieve("what is bm25")] == ['hit2']
+    assert inner.calls == 2
+    assert embed_model.calls == 1
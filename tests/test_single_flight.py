@@ -0,0 +1,156 @@
+import asyncio
+from typing import AsyncGenerator, List
+import pytest
+from llama_index.core.llms import ChatMessage
+from query_database.single_flight import SingleFlight, request_key
+
+
+async def collect(tokens: AsyncGenerator[str, None]) -> List[str]:
+    return [token async for token in tokens]
+
+
+def test_request_key_covers_question_and_whole_history():
+    history = [ChatMessage(role='user', content='q1'), ChatMessage(role='assistant', content='a1')]
+
+    assert request_key("What is BM25?", history) == request_key("what is bm25", history)
+    assert request_key("what is bm25", history) != request_key("what is bm25", [])
+
+
+def test_concurrent_calls_share_one_computation():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "answer"
+
+        waiters = [asyncio.create_task(flight.do('key', compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*waiters) == ["answer"] * 3
+        assert calls == 1
+        assert flight.stats() == {'in_flight': 0, 'calls': 1, 'coalesced': 2, 'stream_calls': 0, 'stream_coalesced': 0}
+
+        # Once finished, the next call computes again
+        assert await flight.do('key', compute) == "answer"
+        assert calls == 2
+
+    asyncio.run(main())
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_others():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "answer"
+
+        first = asyncio.create_task(flight.do('key', compute))
+        second = asyncio.create_task(flight.do('key', compute))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        release.set()
+
+        assert await second == "answer"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_waiter():
+    async def main():
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do('key', compute), flight.do('key', compute), return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError, ValueError]
+
+    asyncio.run(main())
+
+
+def test_late_stream_subscribers_replay_the_tokens_already_produced():
+    async def main():
+        flight = SingleFlight()
+        starts = 0
+        produced = asyncio.Event()
+        release = asyncio.Event()
+
+        async def tokens():
+            yield "Hel"
+            yield "lo"
+            produced.set()
+            await release.wait()
+            yield " world"
+
+        async def start():
+            nonlocal starts
+            starts += 1
+            return tokens()
+
+        first = await flight.stream('key', start)
+        first_tokens = asyncio.create_task(collect(first))
+        await produced.wait()
+
+        late = await flight.stream('key', start)
+        release.set()
+
+        assert await first_tokens == ["Hel", "lo", " world"]
+        assert await collect(late) == ["Hel", "lo", " world"]
+        assert starts == 1
+        assert flight.stats()['stream_coalesced'] == 1
+
+    asyncio.run(main())
+
+
+def test_stream_start_errors_reach_every_caller():
+    async def main():
+        flight = SingleFlight()
+
+        async def start():
+            await asyncio.sleep(0)
+            raise RuntimeError("overloaded")
+
+        results = await asyncio.gather(flight.stream('key', start), flight.stream('key', start), return_exceptions=True)
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+        # The failed stream is forgotten, so the next request starts a new one
+        await asyncio.sleep(0)
+        assert flight.stats()['in_flight'] == 0
+
+    asyncio.run(main())
+
+
+def test_errors_during_the_stream_reach_every_subscriber():
+    async def main():
+        flight = SingleFlight()
+
+        async def tokens():
+            yield "partial"
+            raise ValueError("connection lost")
+
+        async def start():
+            return tokens()
+
+        first = await flight.stream('key', start)
+        second = await flight.stream('key', start)
+
+        for subscriber in (first, second):
+            received = []
+            with pytest.raises(ValueError):
+                async for token in subscriber:
+                    received.append(token)
+            assert received == ["partial"]
+
+    asyncio.run(main())
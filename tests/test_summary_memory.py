@@ -0,0 +1,130 @@
+import asyncio
+from typing import List
+from constants.prompts import CHAT_SUMMARY_PREFIX
+from query_database.summary_memory import SummaryMemory
+
+
+class FakeLLM:
+    def __init__(self, fail: bool = False):
+        self.prompts: List[str] = []
+        self.fail = fail
+
+    async def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return f"summary {len(self.prompts)}"
+
+
+def turns(count: int, start: int = 0):
+    return [{'user': f"question {i}", 'assistant': f"answer {i}"} for i in range(start, start + count)]
+
+
+def make_memory(tmp_path, llm, **kwargs) -> SummaryMemory:
+    options = {'token_budget': 100, 'recent_turns': 1}
+    options.update(kwargs)
+    return SummaryMemory(str(tmp_path / 'summary.json'), summarize=llm, **options)
+
+
+def contents(messages):
+    return [message.content for message in messages]
+
+
+def test_without_a_summary_every_turn_is_sent(tmp_path):
+    memory = make_memory(tmp_path, FakeLLM())
+
+    history = memory.build_history(turns(2))
+
+    assert contents(history) == ["question 0", "answer 0", "question 1", "answer 1"]
+
+
+def test_folded_turns_are_replaced_by_the_summary(tmp_path):
+    llm = FakeLLM()
+    memory = make_memory(tmp_path, llm)
+    asyncio.run(memory.update(turns(2)))
+
+    history = memory.build_history(turns(3))
+
+    assert "question 1" in llm.prompts[0]
+    assert history[0].role == 'system'
+    assert contents(history) == [CHAT_SUMMARY_PREFIX + "summary 1", "question 2", "answer 2"]
+    assert memory.stats()['turns_folded'] == 2
+
+
+def test_recent_turns_are_sent_verbatim_even_when_folded(tmp_path):
+    memory = make_memory(tmp_path, FakeLLM(), recent_turns=2)
+    asyncio.run(memory.update(turns(3)))
+
+    history = memory.build_history(turns(3))
+
+    assert contents(history)[1:] == ["question 1", "answer 1", "question 2", "answer 2"]
+
+
+def test_only_new_turns_are_folded_into_the_existing_summary(tmp_path):
+    llm = FakeLLM()
+    memory = make_memory(tmp_path, llm)
+    asyncio.run(memory.update(turns(2)))
+    asyncio.run(memory.update(turns(3)))
+
+    assert "summary 1" in llm.prompts[1]
+    assert "question 2" in llm.prompts[1]
+    assert "question 1" not in llm.prompts[1]
+
+    # Nothing new to fold
+    asyncio.run(memory.update(turns(3)))
+    assert len(llm.prompts) == 2
+
+
+def test_failed_update_leaves_turns_unfolded(tmp_path):
+    memory = make_memory(tmp_path, FakeLLM(fail=True))
+    asyncio.run(memory.update(turns(2)))
+
+    assert contents(memory.build_history(turns(2))) == ["question 0", "answer 0", "question 1", "answer 1"]
+    assert memory.stats()['summary_failures'] == 1
+
+
+def test_summary_survives_a_restart(tmp_path):
+    asyncio.run(make_memory(tmp_path, FakeLLM()).update(turns(2)))
+
+    reopened = make_memory(tmp_path, FakeLLM())
+
+    assert contents(reopened.build_history(turns(3)))[0] == CHAT_SUMMARY_PREFIX + "summary 1"
+
+
+def test_summary_is_trimmed_to_the_token_budget(tmp_path):
+    async def verbose(prompt: str) -> str:
+        return "A long sentence about invoices. " * 50
+
+    memory = make_memory(tmp_path, verbose, token_budget=20)
+    asyncio.run(memory.update(turns(1)))
+
+    assert memory.count_tokens(memory.state['summary']) <= 20
+    assert memory.state['summary'].endswith('.')
+
+
+def test_turns_are_folded_only_once_the_turn_threshold_is_reached(tmp_path):
+    llm = FakeLLM()
+    memory = make_memory(tmp_path, llm, fold_after_turns=3)
+
+    asyncio.run(memory.update(turns(2)))
+    assert llm.prompts == []
+    assert memory.stats()['summary_deferred'] == 1
+    # Deferred turns keep being sent verbatim
+    assert len(memory.build_history(turns(2))) == 4
+
+    asyncio.run(memory.update(turns(3)))
+    assert len(llm.prompts) == 1
+    assert memory.stats()['turns_folded'] == 3
+
+
+def test_long_turns_are_folded_before_the_turn_threshold(tmp_path):
+    llm = FakeLLM()
+    memory = make_memory(tmp_path, llm, fold_after_turns=5, fold_after_tokens=50)
+
+    asyncio.run(memory.update(turns(1)))
+    assert llm.prompts == []
+
+    long_turn = [{'user': "question", 'assistant': "a detailed answer " * 20}]
+    asyncio.run(memory.update(turns(1) + long_turn))
+    assert len(llm.prompts) == 1
+    assert memory.stats()['turns_folded'] == 2
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import shutil
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional
+sys.path.append('../')
+
+# Chunk metadata is stored one JSON object per line; the embeddings live in a float32
+# .npy sidecar whose rows follow the same order.
+METADATA_FILE_NAME = 'metadata.jsonl'
+
+
+def embeddings_path_for(metadata_path: str) -> str:
+    """Return the path of the .npy sidecar belonging to a metadata file."""
+    return os.path.splitext(metadata_path)[0] + '.npy'
+
+
+def write_chunk_metadata(metadata_path: str, entries: List[Dict[str, Any]]) -> None:
+    """
+    Write chunk entries ({'id', 'metadata'}) to a JSONL file and drop the now outdated embeddings sidecar.
+    """
+    tmp_path = metadata_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        for entry in entries:
+            file.write(json.dumps({'id': entry['id'], 'metadata': entry['metadata']}, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, metadata_path)
+
+    embeddings_path = embeddings_path_for(metadata_path)
+    if os.path.exists(embeddings_path):
+        os.remove(embeddings_path)
+
+
+def iter_chunk_metadata(metadata_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield chunk entries from a JSONL metadata file one at a time.
+    """
+    if not os.path.exists(metadata_path):
+        return
+
+    with open(metadata_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_chunk_metadata(metadata_path: str) -> List[Dict[str, Any]]:
+    return list(iter_chunk_metadata(metadata_path))
+
+
+def write_embeddings(metadata_path: str, vectors: List[List[float]], dimension: int) -> None:
+    """
+    Write the embeddings of a metadata file as a float32 (n, dimension) matrix.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dimension)
+
+    embeddings_path = embeddings_path_for(metadata_path)
+    tmp_path = embeddings_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.save(file, matrix)
+    os.replace(tmp_path, embeddings_path)
+
+
+def read_embeddings(metadata_path: str) -> Optional[np.ndarray]:
+    """
+    Memory-map the embeddings of a metadata file without reading them into memory.
+
+    Returns:
+        Optional[np.ndarray]: The (n, dimension) float32 matrix, or None if no embeddings were written.
+    """
+    embeddings_path = embeddings_path_for(metadata_path)
+    if not os.path.exists(embeddings_path):
+        return None
+
+    return np.load(embeddings_path, mmap_mode='r')
+
+
+def clear_chunks(metadata_path: str) -> None:
+    """
+    Empty the metadata file and remove its embeddings.
+    """
+    write_chunk_metadata(metadata_path, [])
+
+
+class ChunkStagingWriter:
+    """
+    Write chunk entries and their embeddings in the format above one batch at a time, so a
+    streaming ingestion never holds all of them in memory.
+
+    Entries are appended to `<metadata_path>.tmp` and the raw float32 rows to a `.rows` file next
+    to the sidecar. `commit` prefixes the rows with an .npy header and moves both files into place;
+    until then readers keep seeing the previous metadata file and sidecar.
+
+    Args:
+        metadata_path (str): The JSONL file to write.
+        dimension (int): The embedding dimension.
+    """
+
+    def __init__(self, metadata_path: str, dimension: int):
+        self.metadata_path = metadata_path
+        self.dimension = dimension
+        self.count = 0
+
+        self._metadata_tmp_path = metadata_path + '.tmp'
+        self._rows_path = embeddings_path_for(metadata_path) + '.rows'
+        self._metadata_file = open(self._metadata_tmp_path, 'w', encoding='utf-8')
+        self._rows_file = open(self._rows_path, 'wb')
+
+    def append(self, entries: List[Dict[str, Any]], vectors: List[List[float]]) -> None:
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), self.dimension)
+        for entry in entries:
+            self._metadata_file.write(json.dumps({'id': entry['id'], 'metadata': entry['metadata']}, ensure_ascii=False) + '\n')
+        self._rows_file.write(matrix.tobytes())
+        self.count += len(entries)
+
+    def commit(self) -> None:
+        self._metadata_file.close()
+        self._rows_file.close()
+
+        embeddings_path = embeddings_path_for(self.metadata_path)
+        tmp_path = embeddings_path + '.tmp'
+        with open(tmp_path, 'wb') as file, open(self._rows_path, 'rb') as rows:
+            header = {'descr': np.lib.format.dtype_to_descr(np.dtype(np.float32)), 'fortran_order': False,
+                      'shape': (self.count, self.dimension)}
+            np.lib.format.write_array_header_1_0(file, header)
+            shutil.copyfileobj(rows, file)
+        os.remove(self._rows_path)
+
+        os.replace(self._metadata_tmp_path, self.metadata_path)
+        os.replace(tmp_path, embeddings_path)
+
+    def discard(self) -> None:
+        self._metadata_file.close()
+        self._rows_file.close()
+        for path in (self._metadata_tmp_path, self._rows_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def convert_legacy_metadata(json_path: str, metadata_path: str, dimension: int) -> int:
+    """
+    Convert an old `metadata.json` (pretty-printed entries with 'values' float lists) into
+    the JSONL metadata file plus .npy embeddings sidecar.
+
+    Args:
+        json_path (str): The legacy metadata.json file.
+        metadata_path (str): The JSONL file to write.
+        dimension (int): The embedding dimension.
+
+    Returns:
+        int: The number of converted entries.
+    """
+    with open(json_path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    write_chunk_metadata(metadata_path, data)
+
+    # Entries written before the embedding step have no values; only keep a sidecar when all do
+    if data and all(len(entry.get('values', [])) == dimension for entry in data):
+        write_embeddings(metadata_path, [entry['values'] for entry in data], dimension)
+
+    return len(data)
+
+
+if __name__ == "__main__":
+    from constants.constants import DIRECTORY_PATH, EMBEDDING_DIMENSION
+
+    extracted_output_path = os.path.join(DIRECTORY_PATH, 'extracted_output')
+    legacy_path = os.path.join(extracted_output_path, 'metadata.json')
+    converted = convert_legacy_metadata(legacy_path, os.path.join(extracted_output_path, METADATA_FILE_NAME), EMBEDDING_DIMENSION)
+    print(f"Converted {converted} entries from {legacy_path}.")
@@ -0,0 +1,127 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from vector_store.float_matrix import FloatMatrix
+
+
+class EmbeddingCache:
+    """
+    A persistent embedding cache keyed by (embedding model name, hash of the chunk text).
+
+    Vectors live in a memory-mapped float32 matrix; a small JSON index maps each key to its
+    row and a last-used tick. When the cache is full the least recently used entries are
+    evicted and their rows reused.
+    """
+
+    def __init__(self, directory: str, dimension: int, max_entries: int):
+        """
+        Open (or create) the cache in `directory`.
+
+        Args:
+            directory (str): The folder holding `vectors.f32` and `index.json`.
+            dimension (int): The embedding dimension.
+            max_entries (int): The maximum number of cached vectors.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+
+        # key -> [row, last used tick]
+        self._entries: Dict[str, List[int]] = {}
+        self._tick = 0
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+            if index.get('dimension') == dimension:
+                self._entries = index['entries']
+                self._tick = index['tick']
+
+        used_rows = {row for row, _ in self._entries.values()}
+        self._next_row = max(used_rows) + 1 if used_rows else 0
+        self._free_rows = [row for row in range(self._next_row) if row not in used_rows]
+
+        self._matrix = FloatMatrix(os.path.join(directory, 'vectors.f32'), dimension)
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors, counting hits and misses.
+
+        Returns:
+            List[Optional[List[float]]]: One vector per key, or None where the key is not cached.
+        """
+        results = []
+        with self._lock:
+            self._tick += 1
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+
+                self.hits += 1
+                entry[1] = self._tick
+                results.append(self._matrix[entry[0]].tolist())
+
+        return results
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        """
+        Store vectors for the given keys, evicting least recently used entries when full.
+        """
+        with self._lock:
+            self._tick += 1
+            for key, vector in zip(keys, vectors):
+                entry = self._entries.get(key)
+                if entry is None:
+                    if len(self._entries) >= self.max_entries:
+                        self._evict()
+                    entry = self._entries[key] = [self._allocate_row(), self._tick]
+
+                self._matrix[entry[0]] = vector
+                entry[1] = self._tick
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+
+        row = self._next_row
+        self._next_row += 1
+        self._matrix.reserve(self._next_row)
+        return row
+
+    def _evict(self) -> None:
+        # Evict a tenth of the cache at once so the sort is not repeated on every insert
+        count = max(1, self.max_entries // 10)
+        oldest = sorted(self._entries.items(), key=lambda item: item[1][1])[:count]
+        for key, (row, _) in oldest:
+            del self._entries[key]
+            self._free_rows.append(row)
+
+    def save(self) -> None:
+        """
+        Flush the vectors and write the index to disk.
+        """
+        with self._lock:
+            self._matrix.flush()
+
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'dimension': self.dimension, 'tick': self._tick, 'entries': self._entries}, file)
+            os.replace(tmp_path, self.index_path)
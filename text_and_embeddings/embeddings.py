@@ -1,53 +1,102 @@
 import os
 import sys
-import json
-import aiofiles
 import asyncio
+import threading
+from typing import List, Tuple
 sys.path.append('../')
-from constants.constants import EMBEDDING_MODEL
+from constants.constants import get_embedding_model, EMBEDDING_MODEL_NAME, EMBEDDING_DIMENSION, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES
+from text_and_embeddings.embedding_cache import EmbeddingCache
+from text_and_embeddings.chunk_store import METADATA_FILE_NAME, read_chunk_metadata, write_embeddings, embeddings_path_for
 
-# Adding the directory to the system path
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
 
-embeddings = EMBEDDING_MODEL
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Return the shared on-disk embedding cache, opening it on first use.
+    """
+    global _embedding_cache
+
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_DIMENSION, EMBEDDING_CACHE_MAX_ENTRIES)
+
+        return _embedding_cache
+
+async def embed_texts(texts: List[str], save: bool = True) -> Tuple[List[List[float]], int, int]:
+    """
+    Embed texts, reusing cached vectors and only sending new or modified texts to the model.
+
+    Args:
+        texts (List[str]): The chunk texts to embed.
+        save (bool): Write the cache to disk afterwards; callers embedding many batches save once at the end.
+
+    Returns:
+        Tuple[List[List[float]], int, int]: One embedding per text, in order, and the number of
+            texts served from the cache (hits) and sent to the model (misses).
+    """
+    cache = get_embedding_cache()
+
+    # Keyed on the configured model name, so a run served from the cache never loads the model
+    keys = [EmbeddingCache.key(EMBEDDING_MODEL_NAME, text) for text in texts]
+    vectors = cache.get_many(keys)
+
+    # Embed each distinct missing text once
+    missing = {}
+    for i, (key, vector) in enumerate(zip(keys, vectors)):
+        if vector is None:
+            missing.setdefault(key, []).append(i)
+
+    hits = len(texts) - sum(len(positions) for positions in missing.values())
+
+    if missing:
+        missing_keys = list(missing)
+        missing_texts = [texts[missing[key][0]] for key in missing_keys]
+        new_vectors = await asyncio.to_thread(lambda: get_embedding_model().embed_documents(missing_texts))
+
+        for key, vector in zip(missing_keys, new_vectors):
+            for i in missing[key]:
+                vectors[i] = vector
+
+        cache.put_many(missing_keys, new_vectors)
+        if save:
+            await asyncio.to_thread(cache.save)
+
+    return vectors, hits, len(texts) - hits
 
 async def generate_embeddings(metadata_path: str) -> None:
     """
-    Generate embeddings for text chunks and update the metadata JSON file with these embeddings.
+    Generate embeddings for text chunks and write them to the float32 .npy sidecar of the metadata file.
 
     Args:
-        metadata_path (str): The path to the JSON file containing the metadata and where embeddings will be added.
+        metadata_path (str): The path to the JSONL file containing the chunk metadata.
     """
     
     # Load the metadata
-    async with aiofiles.open(metadata_path, 'r', encoding='utf-8') as file:
-        metadata = json.loads(await file.read())
+    metadata = await asyncio.to_thread(read_chunk_metadata, metadata_path)
     
     # Prepare the texts for embedding
     texts = [entry['metadata']['text'] for entry in metadata]
     
-    # Generate embeddings for the texts
-    document_embeddings = await asyncio.to_thread(embeddings.embed_documents, texts)
-    
-    # Update the metadata with embeddings
-    for entry, embedding in zip(metadata, document_embeddings):
-        entry['values'] = embedding  # Assign the embedding to the values key
+    # Generate embeddings for the texts, reusing cached ones
+    document_embeddings, hits, misses = await embed_texts(texts)
+    print(f"Embedding cache: {hits} hits, {misses} misses.")
     
-    # Save the updated metadata with embeddings back to the same JSON file
-    async with aiofiles.open(metadata_path, 'w', encoding='utf-8') as file:
-        await file.write(json.dumps(metadata, ensure_ascii=False, indent=4))
+    # Save the embeddings next to the metadata, in the same order
+    await asyncio.to_thread(write_embeddings, metadata_path, document_embeddings, EMBEDDING_DIMENSION)
 
 # Example usage
 async def main():
     # Get the directory path of the current file
     current_dir = os.path.dirname(os.path.abspath(__file__))
     
-    # Define the path to the metadata JSON file relative to the current file's directory
-    metadata_json_path = os.path.join(current_dir, '../extracted_output/metadata.json')
+    # Define the path to the metadata JSONL file relative to the current file's directory
+    metadata_path = os.path.join(current_dir, '../extracted_output', METADATA_FILE_NAME)
     
-    # Generate embeddings and update the metadata
-    await generate_embeddings(metadata_json_path)
+    # Generate embeddings for the metadata
+    await generate_embeddings(metadata_path)
     
-    print(f"Metadata with embeddings has been updated in {metadata_json_path}.")
+    print(f"Embeddings have been written to {embeddings_path_for(metadata_path)}.")
 
 if __name__ == "__main__":
     # Run the async main function
@@ -1,26 +1,31 @@
 import os
 import sys
 import asyncio
+from typing import Any, Callable, Dict, Optional
 sys.path.append('../')
 from text_and_embeddings.textsplitter import process_metadata
 from text_and_embeddings.embeddings import generate_embeddings
+from text_and_embeddings.chunk_store import METADATA_FILE_NAME, embeddings_path_for
 
-async def Generate_TextAndEmbeddings(directory_path: str, json_path: str) -> None:
-    # Process metadata
-    await process_metadata(directory_path)
+async def Generate_TextAndEmbeddings(directory_path: str, metadata_path: str, on_stage: Optional[Callable[[str], None]] = None) -> Optional[Dict[str, Any]]:
+    # Process metadata of new or changed files
+    if on_stage is not None:
+        on_stage('split')
+    plan = await process_metadata(directory_path)
 
-    # Define the path to the metadata JSON file
-    metadata_json_path = json_path
+    # Generate embeddings into the sidecar of the metadata file
+    if on_stage is not None:
+        on_stage('embed')
+    await generate_embeddings(metadata_path)
 
-    # Generate embeddings and update the metadata
-    await generate_embeddings(metadata_json_path)
+    print(f"Embeddings have been written to {embeddings_path_for(metadata_path)}.")
 
-    print(f"Metadata with embeddings has been updated in {metadata_json_path}.")
+    return plan
 
 if __name__ == "__main__":
     # Define directory and JSON paths
     directory_path = '../extracted_output'
-    json_path = os.path.join(directory_path, 'metadata.json')
+    metadata_path = os.path.join(directory_path, METADATA_FILE_NAME)
 
     # Run the async function
-    asyncio.run(Generate_TextAndEmbeddings(directory_path, json_path))
+    asyncio.run(Generate_TextAndEmbeddings(directory_path, metadata_path))
@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+
+def manifest_path(directory_path: str) -> str:
+    return os.path.join(directory_path, MANIFEST_FILE_NAME)
+
+
+def load_manifest(directory_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the ingestion manifest of a directory.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: File name -> {'file_path', 'size', 'mtime', 'sha256', 'chunk_ids'}
+            for every file that has been upserted. Empty if there is no manifest yet.
+    """
+    path = manifest_path(directory_path)
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except json.JSONDecodeError:
+        # A broken manifest only costs a full re-ingest
+        return {}
+
+
+def save_manifest(directory_path: str, manifest: Dict[str, Dict[str, Any]]) -> None:
+    path = manifest_path(directory_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def forget_files(directory_path: str, file_names: Optional[List[str]] = None) -> None:
+    """
+    Drop files from the manifest so the next ingestion treats them as new.
+
+    Args:
+        directory_path (str): The directory holding the manifest.
+        file_names (Optional[List[str]]): The files to forget; None forgets every file.
+    """
+    if not os.path.exists(manifest_path(directory_path)):
+        return
+
+    manifest = load_manifest(directory_path)
+    for file_name in (list(manifest) if file_names is None else file_names):
+        manifest.pop(file_name, None)
+    save_manifest(directory_path, manifest)
+
+
+def file_hash(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while block := file.read(1 << 20):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def scan_directory(directory_path: str, manifest: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
+    """
+    Compare the .txt files in a directory against the manifest.
+
+    Files whose size and mtime match the manifest are assumed unchanged without being read;
+    otherwise the content hash decides.
+
+    Args:
+        directory_path (str): The directory holding the extracted .txt files.
+        manifest (Dict[str, Dict[str, Any]]): The manifest from the last successful ingestion.
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
+            - The file entries for the current directory contents (chunk ids carried over for unchanged files).
+            - The names of files that are new or changed.
+            - The names of files that disappeared.
+    """
+    entries = {}
+    changed = []
+
+    for filename in sorted(os.listdir(directory_path)):
+        file_path_full = os.path.join(directory_path, filename)
+        if not (os.path.isfile(file_path_full) and filename.endswith('.txt')):
+            continue
+
+        stat = os.stat(file_path_full)
+        previous = manifest.get(filename)
+
+        if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime:
+            entries[filename] = previous
+            continue
+
+        sha256 = file_hash(file_path_full)
+        entries[filename] = {
+            'file_path': file_path_full,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256,
+            'chunk_ids': previous['chunk_ids'] if previous and previous['sha256'] == sha256 else []
+        }
+
+        if not previous or previous['sha256'] != sha256:
+            changed.append(filename)
+
+    removed = [filename for filename in manifest if filename not in entries]
+
+    return entries, changed, removed
+
+
+def plan_ingestion(directory_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Compare a directory against the manifest of the last successful ingestion.
+
+    Returns:
+        Optional[Dict[str, Any]]: The ingestion plan, or None if the directory does not exist:
+            - 'manifest': The manifest to save once the new chunks are upserted.
+            - 'changed_files': Files that are new or changed and need to be ingested.
+            - 'removed_files': Files that disappeared since the last ingestion.
+            - 'previous_manifest': The manifest of the last ingestion, to find stale chunk ids.
+    """
+    if not os.path.isdir(directory_path):
+        print(f"The path {directory_path} is not a valid directory.")
+        return None
+
+    previous_manifest = load_manifest(directory_path)
+    manifest, changed_files, removed_files = scan_directory(directory_path, previous_manifest)
+    print(f"{len(changed_files)} new or changed, {len(removed_files)} removed, "
+          f"{len(manifest) - len(changed_files)} unchanged files.")
+
+    return {
+        'manifest': manifest,
+        'changed_files': changed_files,
+        'removed_files': removed_files,
+        'previous_manifest': previous_manifest
+    }
+
+
+def stale_chunk_ids(plan: Dict[str, Any]) -> List[str]:
+    """
+    Return the chunk ids of removed files and the ids changed files no longer produce.
+
+    Only valid once the pipeline has filled in the new chunk ids of the changed files.
+    """
+    manifest, previous_manifest = plan['manifest'], plan['previous_manifest']
+
+    stale_ids = []
+    for file_name in plan['changed_files']:
+        if file_name in previous_manifest:
+            new_ids = set(manifest[file_name]['chunk_ids'])
+            stale_ids.extend(chunk_id for chunk_id in previous_manifest[file_name]['chunk_ids'] if chunk_id not in new_ids)
+    for file_name in plan['removed_files']:
+        stale_ids.extend(previous_manifest[file_name]['chunk_ids'])
+
+    return stale_ids
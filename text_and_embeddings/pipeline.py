@@ -0,0 +1,265 @@
+import os
+import sys
+import time
+import asyncio
+import aiofiles
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+sys.path.append('../')
+from text_and_embeddings.textsplitter import filter_filename
+from text_and_embeddings.embeddings import embed_texts, get_embedding_cache
+from text_and_embeddings.chunk_store import ChunkStagingWriter
+from vector_store.batching import batch_vectors, upsert_with_retries
+
+# Marks the end of a queue
+_DONE = None
+
+
+class StageStats:
+    """
+    Throughput of one pipeline stage.
+
+    Busy time only counts the stage's own work, not the time it waits on its queues (the busy
+    time of concurrent upserts adds up), so the stage with the highest busy time is the bottleneck.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, items: int, seconds: float) -> None:
+        self.items += items
+        self.batches += 1
+        self.busy_seconds += seconds
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            'items': self.items,
+            'batches': self.batches,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+            'items_per_busy_second': round(self.items / self.busy_seconds, 1) if self.busy_seconds > 0 else 0.0
+        }
+
+
+class IngestionPipeline:
+    """
+    Streaming ingestion: split -> embed -> upsert, with all three stages running concurrently.
+
+    Changed files are read one at a time and their chunks flow through bounded queues into
+    batched embedding and then batched upserts, so memory is bounded by the queue depth
+    instead of the corpus size. A full queue makes the stage before it wait.
+
+    Args:
+        vector_store: The backend returned by get_vector_store().
+        bm25_index: The keyword index that is kept in step with the vector store.
+        queue_size (int): The maximum number of chunks (and of embedded batches) waiting between two stages.
+        embed_batch_size (int): The number of chunks embedded at once.
+        upsert_batch_size (int): The maximum number of vectors per upsert.
+        upsert_max_batch_bytes (int): The maximum estimated payload size per upsert.
+        upsert_concurrency (int): The maximum number of upserts in flight.
+        upsert_max_retries (int): How many times a failed upsert is retried.
+        chunk_size (int): The chunk size of the text splitter.
+        chunk_overlap (int): The overlap between chunks.
+        staging (Optional[ChunkStagingWriter]): If given, every embedded batch is also written to it,
+            and it is committed once the run succeeds or discarded if it fails.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        bm25_index,
+        queue_size: int,
+        embed_batch_size: int,
+        upsert_batch_size: int,
+        upsert_max_batch_bytes: int,
+        upsert_concurrency: int,
+        upsert_max_retries: int,
+        chunk_size: int = 1500,
+        chunk_overlap: int = 100,
+        staging: Optional[ChunkStagingWriter] = None
+    ):
+        self.vector_store = vector_store
+        self.bm25_index = bm25_index
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_max_batch_bytes = upsert_max_batch_bytes
+        self.upsert_concurrency = upsert_concurrency
+        self.upsert_max_retries = upsert_max_retries
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.staging = staging
+
+        self.chunks: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.embedded: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size // embed_batch_size))
+
+        self.stats = {name: StageStats(name) for name in ('split', 'embed', 'upsert')}
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._upsert_error: Optional[BaseException] = None
+
+    async def _split(self, directory_path: str, file_names: List[str], manifest: Dict[str, Dict[str, Any]]) -> None:
+        stats = self.stats['split']
+        for file_name in file_names:
+            file_path_full = os.path.join(directory_path, file_name)
+
+            start = time.perf_counter()
+            async with aiofiles.open(file_path_full, 'r', encoding='utf-8') as file:
+                content = await file.read()
+            texts = await asyncio.to_thread(self.text_splitter.split_text, content)
+            del content
+
+            file_metadata = {
+                'creation_date': datetime.fromtimestamp(os.path.getctime(file_path_full)).strftime('%Y-%m-%d'),
+                'file_name': file_name,
+                'file_path': file_path_full,
+                'file_size': os.path.getsize(file_path_full),
+                'last_modified_date': datetime.fromtimestamp(os.path.getmtime(file_path_full)).strftime('%Y-%m-%d')
+            }
+            chunk_ids = [filter_filename(f"{file_name}#chunk_{i}", id=True) for i in range(len(texts))]
+            manifest[file_name]['chunk_ids'] = chunk_ids
+            stats.record(len(texts), time.perf_counter() - start)
+
+            for chunk_id, text in zip(chunk_ids, texts):
+                await self.chunks.put({'id': chunk_id, 'metadata': {'text': text, **file_metadata}})
+
+        stats.finished = time.perf_counter()
+        await self.chunks.put(_DONE)
+
+    async def _embed_batch(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        embeddings, hits, misses = await embed_texts([chunk['metadata']['text'] for chunk in batch], save=False)
+        self.cache_hits += hits
+        self.cache_misses += misses
+        vectors = [
+            {"id": chunk['id'], "values": [float(value) for value in values], "metadata": chunk['metadata']}
+            for chunk, values in zip(batch, embeddings)
+        ]
+        if self.staging is not None:
+            await asyncio.to_thread(self.staging.append, batch, embeddings)
+        self.stats['embed'].record(len(batch), time.perf_counter() - start)
+
+        await self.embedded.put(vectors)
+
+    async def _embed(self) -> None:
+        batch = []
+        while (chunk := await self.chunks.get()) is not _DONE:
+            batch.append(chunk)
+            if len(batch) >= self.embed_batch_size:
+                await self._embed_batch(batch)
+                batch = []
+
+        if batch:
+            await self._embed_batch(batch)
+
+        self.stats['embed'].finished = time.perf_counter()
+        await self.embedded.put(_DONE)
+
+    async def _upsert_batch(self, batch: List[Dict[str, Any]], semaphore: asyncio.Semaphore) -> None:
+        try:
+            start = time.perf_counter()
+            self.retries += await upsert_with_retries(self.vector_store, batch, self.upsert_max_retries)
+            self.stats['upsert'].record(len(batch), time.perf_counter() - start)
+            await asyncio.to_thread(self.bm25_index.add, [(vector["id"], vector["metadata"]) for vector in batch])
+        except Exception as e:
+            if self._upsert_error is None:
+                self._upsert_error = e
+        finally:
+            semaphore.release()
+
+    async def _upsert(self) -> None:
+        semaphore = asyncio.Semaphore(self.upsert_concurrency)
+        in_flight = set()
+
+        async def submit(vectors: List[Dict[str, Any]], flush: bool) -> List[Dict[str, Any]]:
+            batches = batch_vectors(vectors, self.upsert_batch_size, self.upsert_max_batch_bytes)
+            # A partly filled last batch waits for more vectors unless this is the end of the stream
+            leftover = [] if flush or len(batches[-1]) >= self.upsert_batch_size else batches.pop()
+            for batch in batches:
+                # Waiting for a free slot here is what bounds the vectors held by this stage
+                await semaphore.acquire()
+                if self._upsert_error is not None:
+                    # Fail fast instead of embedding the rest of the corpus for nothing
+                    semaphore.release()
+                    raise self._upsert_error
+
+                task = asyncio.create_task(self._upsert_batch(batch, semaphore))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            return leftover
+
+        try:
+            pending: List[Dict[str, Any]] = []
+            while (vectors := await self.embedded.get()) is not _DONE:
+                pending = await submit(pending + vectors, flush=False)
+            if pending:
+                await submit(pending, flush=True)
+
+            await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in list(in_flight):
+                task.cancel()
+            raise
+
+        if self._upsert_error is not None:
+            raise self._upsert_error
+        self.stats['upsert'].finished = time.perf_counter()
+
+    async def run(self, directory_path: str, file_names: List[str], manifest: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Split, embed and upsert the given files, filling in their chunk ids in `manifest`, and
+        stage their chunks and embeddings if the pipeline has a staging writer.
+
+        Returns:
+            Dict[str, Any]: The upsert summary ('vectors_written', 'batches', 'retries', 'elapsed_seconds',
+                'vectors_per_second'), the embedding cache hits and misses of the run under
+                'embedding_cache' and the throughput of every stage under 'stages'.
+
+        Raises:
+            Exception: The first error of any stage; the other stages are cancelled.
+        """
+        start = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self._split(directory_path, file_names, manifest)),
+            asyncio.create_task(self._embed()),
+            asyncio.create_task(self._upsert())
+        ]
+        try:
+            await asyncio.gather(*tasks)
+            if self.staging is not None:
+                await asyncio.to_thread(self.staging.commit)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.staging is not None:
+                await asyncio.to_thread(self.staging.discard)
+            raise
+        finally:
+            # Keep what was embedded so far, even if the run failed
+            await asyncio.to_thread(get_embedding_cache().save)
+
+        elapsed = time.perf_counter() - start
+        written = self.stats['upsert'].items
+        return {
+            'vectors_written': written,
+            'batches': self.stats['upsert'].batches,
+            'retries': self.retries,
+            'elapsed_seconds': round(elapsed, 3),
+            'vectors_per_second': round(written / elapsed, 1) if elapsed > 0 else 0.0,
+            'embedding_cache': {'hits': self.cache_hits, 'misses': self.cache_misses},
+            'stages': {name: stats.report() for name, stats in self.stats.items()}
+        }
+
+
+def format_stage_report(stages: Dict[str, Dict[str, Any]]) -> str:
+    return ", ".join(
+        f"{name}: {report['items']} in {report['busy_seconds']}s busy ({report['items_per_busy_second']}/s)"
+        for name, report in stages.items())
@@ -1,11 +1,11 @@
 import re
 import os
-import json
 import aiofiles
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from text_and_embeddings.manifest import plan_ingestion, stale_chunk_ids
+from text_and_embeddings.chunk_store import METADATA_FILE_NAME, write_chunk_metadata
 
 def filter_filename(filename: str, id: bool) -> str:
     """
@@ -39,12 +39,13 @@ def filter_filename(filename: str, id: bool) -> str:
     
     return filtered_filename
 
-async def ReadFiles(folder_path: str) -> Dict[str, Dict[str, str]]:
+async def ReadFiles(folder_path: str, file_names: Optional[List[str]] = None) -> Dict[str, Dict[str, str]]:
     """
     Reads all text files in the specified folder and returns their contents along with metadata.
 
     Args:
         folder_path (str): The path to the folder containing text files.
+        file_names (Optional[List[str]]): If given, only these files are read.
 
     Returns:
         Dict[str, Dict[str, str]]: A dictionary where keys are file names and values are dictionaries containing:
@@ -55,7 +56,7 @@ async def ReadFiles(folder_path: str) -> Dict[str, Dict[str, str]]:
             - 'file_size': The file size in bytes.
     """
     file_contents = {}
-    for filename in os.listdir(folder_path):
+    for filename in (os.listdir(folder_path) if file_names is None else file_names):
         file_path_full = os.path.join(folder_path, filename)
         if os.path.isfile(file_path_full) and filename.endswith('.txt'):
             creation_date = datetime.fromtimestamp(os.path.getctime(file_path_full)).strftime('%Y-%m-%d')
@@ -101,6 +102,9 @@ async def TextSplitter(file_contents: Dict[str, Dict[str, str]], chunk_size: int
     """
     metadata = {}
     
+    # Imported here so filter_filename can be used without the langchain dependency
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     # Initialize RecursiveCharacterTextSplitter with chunk size and overlap
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     
@@ -125,20 +129,20 @@ async def TextSplitter(file_contents: Dict[str, Dict[str, str]], chunk_size: int
     
     return metadata
 
-async def WriteMetadataToJson(metadata: Dict[str, Dict[str, Any]], output_path: str) -> None:
+async def WriteMetadataToJsonl(metadata: Dict[str, Dict[str, Any]], output_path: str) -> None:
     """
-    Writes the metadata to a JSON file with a new structure.
+    Writes the metadata to a JSONL file, one chunk per line. Embeddings are written
+    separately to the .npy sidecar by generate_embeddings.
 
     Args:
-        metadata (Dict[str, Dict[str, Any]]): The metadata dictionary to be written to the JSON file.
-        output_path (str): The path where the JSON file will be saved.
+        metadata (Dict[str, Dict[str, Any]]): The metadata dictionary to be written to the JSONL file.
+        output_path (str): The path where the JSONL file will be saved.
     """
     # Reformat the metadata to the new structure
     reformatted_data = []
     for chunk_id, chunk_metadata in metadata.items():
         reformatted_data.append({
             "id": filter_filename(chunk_id, id=True),
-            "values": chunk_metadata.get('embedding', []),  # Include embeddings if available
             "metadata": {
                 "text": chunk_metadata['text'],  # Include the text content in the metadata
                 "creation_date": chunk_metadata['creation_date'],
@@ -149,39 +153,57 @@ async def WriteMetadataToJson(metadata: Dict[str, Dict[str, Any]], output_path:
             }
         })
     
-    # Write the reformatted data to the JSON file
-    async with aiofiles.open(output_path, 'w', encoding='utf-8') as json_file:
-        await json_file.write(json.dumps(reformatted_data, ensure_ascii=False, indent=4))
+    # Write the reformatted data to the JSONL file
+    await asyncio.to_thread(write_chunk_metadata, output_path, reformatted_data)
 
-async def process_metadata(directory_path: str) -> None:
+async def process_metadata(directory_path: str) -> Optional[Dict[str, Any]]:
     """
-    Processes files in the specified directory to create metadata and write it to a JSON file.
+    Processes new or changed files in the specified directory to create metadata and write it to a JSONL file.
+
+    Files are compared against the manifest of the last successful ingestion, so unchanged files
+    are neither read nor split again.
 
     Args:
         directory_path (str): The path to the directory containing files to process.
+
+    Returns:
+        Optional[Dict[str, Any]]: The ingestion plan, or None if the directory does not exist:
+            - 'manifest': The manifest to save once the new chunks are upserted.
+            - 'changed_files': Files that were split and written to the metadata file.
+            - 'removed_files': Files that disappeared since the last ingestion.
+            - 'previous_manifest': The manifest of the last ingestion.
+            - 'stale_ids': Chunk ids that are no longer produced and should be deleted.
     """
-    # Construct the path to the extracted_output folder in the specified base path
-    extracted_output_path = directory_path
+    # Find the files that changed since the last ingestion
+    plan = await asyncio.to_thread(plan_ingestion, directory_path)
+    if plan is None:
+        return None
 
-    # Ensure that the path exists and is a directory
-    if os.path.isdir(extracted_output_path):
-        print(f"Processing files in the directory: {extracted_output_path}")
-        
-        # Read all files in the extracted_output folder
-        file_contents = await ReadFiles(extracted_output_path)
+    print(f"Processing files in the directory: {directory_path}")
 
-        # Split the text and create metadata
-        metadata = await TextSplitter(file_contents)
+    # Read only the new or changed files
+    file_contents = await ReadFiles(directory_path, plan['changed_files'])
 
-        # Define the path for the JSON output file
-        json_output_path = os.path.join(extracted_output_path, 'metadata.json')
+    # Split the text and create metadata
+    metadata = await TextSplitter(file_contents)
 
-        # Write the metadata to the JSON file
-        await WriteMetadataToJson(metadata, json_output_path)
+    # Record the chunk ids each changed file produces now
+    for file_name in plan['changed_files']:
+        plan['manifest'][file_name]['chunk_ids'] = []
+    for chunk_id, chunk_metadata in metadata.items():
+        plan['manifest'][chunk_metadata['file_name']]['chunk_ids'].append(filter_filename(chunk_id, id=True))
 
-        print(f"Metadata has been written to {json_output_path}.")
-    else:
-        print(f"The path {extracted_output_path} is not a valid directory.")
+    plan['stale_ids'] = stale_chunk_ids(plan)
+
+    # Define the path for the JSONL output file
+    metadata_output_path = os.path.join(directory_path, METADATA_FILE_NAME)
+
+    # Write the metadata to the JSONL file
+    await WriteMetadataToJsonl(metadata, metadata_output_path)
+
+    print(f"Metadata has been written to {metadata_output_path}.")
+
+    return plan
     
 if __name__ == "__main__":
     # Run the async process_metadata function
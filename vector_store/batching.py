@@ -0,0 +1,52 @@
+import json
+import random
+import asyncio
+from typing import Any, Dict, List
+
+
+def batch_vectors(vectors: List[Dict[str, Any]], max_count: int, max_bytes: int) -> List[List[Dict[str, Any]]]:
+    """
+    Split vectors into batches bounded both by count and by (approximate) JSON payload size.
+
+    Args:
+        vectors (List[Dict[str, Any]]): The vectors to upsert.
+        max_count (int): The maximum number of vectors per batch.
+        max_bytes (int): The maximum estimated payload size per batch.
+
+    Returns:
+        List[List[Dict[str, Any]]]: The batches, in order. A single vector larger than
+            `max_bytes` still gets a batch of its own.
+    """
+    batches = []
+    batch, batch_bytes = [], 0
+
+    for vector in vectors:
+        size = len(json.dumps(vector, ensure_ascii=False).encode('utf-8'))
+        if batch and (len(batch) >= max_count or batch_bytes + size > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+
+        batch.append(vector)
+        batch_bytes += size
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+async def upsert_with_retries(vector_store, batch: List[Dict[str, Any]], max_retries: int, backoff_seconds: float = 0.5) -> int:
+    """
+    Upsert one batch, retrying it with jittered exponential backoff.
+
+    Returns:
+        int: The number of retries it took.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            await vector_store.aupsert(batch)
+            return attempt
+        except Exception:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(backoff_seconds * (2 ** attempt) * (1 + random.random()))
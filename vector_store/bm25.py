@@ -0,0 +1,280 @@
+import os
+import re
+import json
+import math
+import heapq
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens; numbers and identifiers such as 'ab-123' keep their parts.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    A BM25 inverted index over chunk texts, persisted as a snapshot plus an append-only change log.
+
+    Documents are added and removed one chunk at a time, so ingestion and deletion only touch
+    the postings of the affected chunks. Document frequencies and the average length are kept
+    up to date incrementally instead of being recomputed per query.
+
+    `save` only appends the changes made since the last save to `<path>.log`, so persisting a
+    batch costs O(batch) rather than O(corpus). Once the log outgrows the corpus it is folded
+    into a new snapshot at `path`. Postings are not stored; they are rebuilt from the chunk
+    texts when the index is loaded.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75, min_compaction_entries: int = 1000):
+        self.path = path
+        self.log_path = path + '.log'
+        self.k1 = k1
+        self.b = b
+        self.min_compaction_entries = min_compaction_entries
+        self._lock = threading.RLock()
+        # Serialises writers to the snapshot and the log; searches never wait for it
+        self._save_lock = threading.Lock()
+
+        # term -> {doc id: term frequency}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # doc id -> {'length', 'metadata'} (metadata includes the chunk 'text')
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        # Changes not written to the log yet, and the number of entries already in it
+        self._pending: List[Dict[str, Any]] = []
+        self._log_entries = 0
+        self._loaded_version = None
+        self._saving = False
+
+        self._load()
+
+    def _file_version(self) -> Tuple[Optional[float], Optional[int]]:
+        snapshot_mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else None
+        return snapshot_mtime, log_size
+
+    def _apply(self, change: Dict[str, Any]) -> None:
+        if change['op'] == 'add':
+            self._index(change['id'], change['metadata'])
+        elif change['op'] == 'remove':
+            for doc_id in change['ids']:
+                self._remove(doc_id)
+        elif change['op'] == 'clear':
+            self._reset()
+
+    def _reset(self) -> None:
+        self._postings = {}
+        self._documents = {}
+        self._total_length = 0
+
+    def _load(self) -> None:
+        self._reset()
+        self._pending = []
+        self._log_entries = 0
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            for doc_id, document in data['documents'].items():
+                self._index(doc_id, document['metadata'])
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        self._apply(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted save; the changes before it are kept
+                        continue
+                    self._log_entries += 1
+
+        self._loaded_version = self._file_version()
+
+    def _reload_if_changed(self) -> None:
+        # Another process (a CLI ingestion run) may have written to the snapshot or the log;
+        # our own save in progress is not a change, and unsaved changes survive the reload
+        if self._saving or self._file_version() == self._loaded_version:
+            return
+
+        pending = self._pending
+        self._load()
+        for change in pending:
+            self._apply(change)
+        self._pending = pending
+
+    def _index(self, doc_id: str, metadata: Dict[str, Any]) -> None:
+        self._remove(doc_id)
+
+        tokens = tokenize(metadata.get('text', ''))
+        for term, frequency in Counter(tokens).items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+
+        self._documents[doc_id] = {'length': len(tokens), 'metadata': metadata}
+        self._total_length += len(tokens)
+
+    def _remove(self, doc_id: str) -> bool:
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return False
+
+        for term in set(tokenize(document['metadata'].get('text', ''))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+        self._total_length -= document['length']
+        return True
+
+    def add(self, documents: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Index (or re-index) chunks.
+
+        Args:
+            documents (Iterable[Tuple[str, Dict[str, Any]]]): (chunk id, metadata) pairs; the text is read from metadata['text'].
+
+        Returns:
+            int: The number of chunks indexed.
+        """
+        count = 0
+        with self._lock:
+            self._reload_if_changed()
+            for doc_id, metadata in documents:
+                self._index(doc_id, metadata)
+                self._pending.append({'op': 'add', 'id': doc_id, 'metadata': metadata})
+                count += 1
+
+        return count
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """
+        Remove chunks from the index.
+
+        Returns:
+            int: The number of chunks that were indexed and are now removed.
+        """
+        ids = list(ids)
+        with self._lock:
+            self._reload_if_changed()
+            removed = sum(self._remove(doc_id) for doc_id in ids)
+            if removed:
+                self._pending.append({'op': 'remove', 'ids': ids})
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self._pending.append({'op': 'clear'})
+
+    def save(self) -> None:
+        """
+        Persist the changes made since the last save.
+
+        The changes are serialised and written outside the index lock, so searches keep running
+        while an ingestion saves.
+        """
+        with self._save_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                compact = self._log_entries + len(pending) > max(self.min_compaction_entries, len(self._documents))
+                if not pending and not compact:
+                    return
+
+                # A shallow copy; the metadata of a chunk is never modified once it is indexed
+                documents = dict(self._documents) if compact else None
+                self._saving = True
+            try:
+                self._write(pending, documents)
+            finally:
+                with self._lock:
+                    self._saving = False
+
+    def _write(self, pending: List[Dict[str, Any]], documents: Optional[Dict[str, Dict[str, Any]]]) -> None:
+        compact = documents is not None
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        if compact:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'documents': documents}, file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            # Replaying the log over a snapshot that already contains it gives the same
+            # index, so a crash between these two steps loses nothing
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+            log_entries = 0
+        else:
+            with open(self.log_path, 'a', encoding='utf-8') as file:
+                file.write(''.join(json.dumps(change, ensure_ascii=False) + '\n' for change in pending))
+            log_entries = self._log_entries + len(pending)
+
+        with self._lock:
+            self._log_entries = log_entries
+            self._loaded_version = self._file_version()
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Score the indexed chunks against a query with Okapi BM25.
+
+        Args:
+            query (str): The query text.
+            top_k (int): The number of results to return.
+
+        Returns:
+            List[Tuple[str, float, Dict[str, Any]]]: (chunk id, score, metadata) tuples, best first.
+        """
+        with self._lock:
+            self._reload_if_changed()
+
+            document_count = len(self._documents)
+            if not document_count or top_k <= 0:
+                return []
+
+            average_length = self._total_length / document_count
+            scores: Dict[str, float] = {}
+
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length_norm = 1 - self.b + self.b * self._documents[doc_id]['length'] / average_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+            best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+            return [(doc_id, score, self._documents[doc_id]['metadata']) for doc_id, score in best]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of ids with reciprocal rank fusion.
+
+    Scores are normalised so an id ranked first by every ranking scores 1.0.
+
+    Args:
+        rankings (List[List[str]]): The ranked id lists, best first.
+        k (int): The RRF constant; higher values flatten the contribution of top ranks.
+
+    Returns:
+        List[Tuple[str, float]]: (id, fused score) pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+
+    max_score = len(rankings) / (k + 1) if rankings else 1.0
+    return sorted(((doc_id, score / max_score) for doc_id, score in scores.items()), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+
+
+class FloatMatrix:
+    """
+    A row-major float32 matrix stored in a memory-mapped file that grows on demand.
+
+    Only the raw values are kept in the file; callers track how many rows are in use.
+    """
+
+    def __init__(self, path: str, dimension: int, initial_capacity: int = 1024):
+        """
+        Open the matrix file at `path`, creating it if it does not exist.
+
+        Args:
+            path (str): The path to the backing file.
+            dimension (int): The number of columns of every row.
+            initial_capacity (int): The number of rows to allocate for a new file.
+        """
+        self.path = path
+        self.dimension = dimension
+
+        row_bytes = 4 * dimension
+        if not os.path.exists(path) or os.path.getsize(path) < row_bytes:
+            with open(path, 'wb') as file:
+                file.truncate(max(initial_capacity, 1) * row_bytes)
+
+        self._open(os.path.getsize(path) // row_bytes)
+
+    def _open(self, capacity: int) -> None:
+        self._map = np.memmap(self.path, dtype=np.float32, mode='r+', shape=(capacity, self.dimension))
+
+    @property
+    def capacity(self) -> int:
+        return self._map.shape[0]
+
+    def reserve(self, rows: int) -> None:
+        """
+        Make sure the file can hold at least `rows` rows, doubling its size when it has to grow.
+
+        Args:
+            rows (int): The number of rows that must fit.
+        """
+        if rows <= self.capacity:
+            return
+
+        new_capacity = max(rows, self.capacity * 2)
+        self._map.flush()
+        del self._map
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(new_capacity * 4 * self.dimension)
+
+        self._open(new_capacity)
+
+    def rows(self, count: int) -> np.ndarray:
+        """Return a view over the first `count` rows."""
+        return self._map[:count]
+
+    def __getitem__(self, key):
+        return self._map[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._map[key] = value
+
+    def flush(self) -> None:
+        self._map.flush()
@@ -0,0 +1,37 @@
+import sys
+import asyncio
+import functools
+import threading
+from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('../')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool that runs blocking vector store calls, creating it on first use.
+
+    It is separate from the default executor, so a large ingestion cannot starve the
+    `asyncio.to_thread` calls of chat requests (and the other way round).
+
+    Returns:
+        ThreadPoolExecutor: The shared pool with VECTOR_STORE_IO_WORKERS threads.
+    """
+    global _executor
+
+    from constants.constants import VECTOR_STORE_IO_WORKERS
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=VECTOR_STORE_IO_WORKERS, thread_name_prefix='vector-store-io')
+
+        return _executor
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking vector store call on the I/O executor without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(fn, *args, **kwargs))
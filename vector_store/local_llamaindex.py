@@ -0,0 +1,62 @@
+from typing import Any, List, Sequence
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode, TextNode
+from llama_index.core.vector_stores.types import BasePydanticVectorStore, VectorStoreQuery, VectorStoreQueryResult
+from vector_store.local_store import LocalVectorStore
+from vector_store.io_executor import run_io
+
+
+class LocalLlamaIndexVectorStore(BasePydanticVectorStore):
+    """
+    LlamaIndex wrapper around LocalVectorStore.
+
+    Records are read the same way PineconeVectorStore reads ours: the chunk text lives
+    in metadata['text'] and the remaining metadata is attached to the node.
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = True
+
+    _store: LocalVectorStore = PrivateAttr()
+
+    def __init__(self, store: LocalVectorStore, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._store = store
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalLlamaIndexVectorStore"
+
+    @property
+    def client(self) -> LocalVectorStore:
+        return self._store
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        vectors = [
+            {
+                "id": node.node_id,
+                "values": node.get_embedding(),
+                "metadata": {"text": node.get_content(), **node.metadata}
+            }
+            for node in nodes
+        ]
+        self._store.upsert(vectors)
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._store.delete(ids=[ref_doc_id])
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        matches = self._store.query(query.query_embedding, query.similarity_top_k)
+
+        nodes, similarities, ids = [], [], []
+        for vector_id, score, metadata in matches:
+            node_metadata = {key: value for key, value in metadata.items() if key != 'text'}
+            nodes.append(TextNode(id_=vector_id, text=metadata.get('text', ''), metadata=node_metadata))
+            similarities.append(score)
+            ids.append(vector_id)
+
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
+
+    async def aquery(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        return await run_io(self.query, query, **kwargs)
@@ -0,0 +1,265 @@
+import os
+import json
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from vector_store.float_matrix import FloatMatrix
+
+
+class LocalVectorStore:
+    """
+    An on-disk vector store: normalised float32 vectors in a memory-mapped matrix
+    plus a JSON table mapping each row to its id and metadata.
+
+    Vectors are normalised on write, so cosine similarity is a single matrix-vector product.
+
+    The table is persisted as a snapshot plus an append-only change log, so an upsert or delete
+    only writes the rows it touched. Once the log holds more rows than the table it is folded
+    into a new snapshot.
+    """
+
+    def __init__(self, directory: str, dimension: int, min_compaction_rows: int = 1000):
+        """
+        Open (or create) the store in `directory`.
+
+        Args:
+            directory (str): The folder holding `vectors.f32`, `table.json` and `table.log`.
+            dimension (int): The dimension of the stored vectors.
+            min_compaction_rows (int): The log is never compacted before it holds this many rows.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.dimension = dimension
+        self.min_compaction_rows = min_compaction_rows
+        self.table_path = os.path.join(directory, 'table.json')
+        self.log_path = os.path.join(directory, 'table.log')
+        self._lock = threading.RLock()
+
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        # Every snapshot gets a new generation; a log is only replayed onto the snapshot it extends
+        self._generation = 0
+        self._log_rows = 0
+
+        self._load()
+        self._matrix = FloatMatrix(os.path.join(directory, 'vectors.f32'), dimension)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self) -> None:
+        if os.path.exists(self.table_path):
+            with open(self.table_path, 'r', encoding='utf-8') as file:
+                table = json.load(file)
+
+            self._check_dimension(table['dimension'])
+            self._ids = table['ids']
+            self._metadata = table['metadata']
+            self._generation = table.get('generation', 0)
+
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+
+        if not os.path.exists(self.log_path):
+            return
+
+        with open(self.log_path, 'r', encoding='utf-8') as file:
+            lines = iter(file)
+            header = json.loads(next(lines, '{}') or '{}')
+            # A log left behind by a compaction that was interrupted is already in the snapshot
+            if header.get('generation') != self._generation:
+                return
+            self._check_dimension(header.get('dimension', self.dimension))
+
+            for line in lines:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted write; the changes before it are kept
+                    continue
+                self._log_rows += self._apply(change)
+
+    def _check_dimension(self, dimension: int) -> None:
+        if dimension != self.dimension:
+            raise ValueError(f"Local vector store at {self.directory} has dimension {dimension}, expected {self.dimension}")
+
+    def _apply(self, change: Dict[str, Any]) -> int:
+        # Replays a logged change on the table only; the matrix already holds its result
+        if change['op'] == 'upsert':
+            for vector_id, metadata in change['entries']:
+                self._set_row(vector_id, metadata)
+            return len(change['entries'])
+        for vector_id in change['ids']:
+            self._remove_row(vector_id, move_vector=False)
+        return len(change['ids'])
+
+    def _set_row(self, vector_id: str, metadata: Dict[str, Any]) -> int:
+        row = self._rows.get(vector_id)
+        if row is None:
+            row = len(self._ids)
+            self._rows[vector_id] = row
+            self._ids.append(vector_id)
+            self._metadata.append({})
+
+        self._metadata[row] = metadata
+        return row
+
+    def _remove_row(self, vector_id: str, move_vector: bool = True) -> bool:
+        # The last row fills the gap so the matrix stays dense
+        row = self._rows.pop(vector_id, None)
+        if row is None:
+            return False
+
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            if move_vector:
+                self._matrix[row] = self._matrix[last]
+            self._ids[row] = moved_id
+            self._metadata[row] = self._metadata[last]
+            self._rows[moved_id] = row
+
+        self._ids.pop()
+        self._metadata.pop()
+        return True
+
+    def _save_snapshot(self) -> None:
+        tmp_path = self.table_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'dimension': self.dimension, 'generation': self._generation + 1,
+                       'ids': self._ids, 'metadata': self._metadata}, file, ensure_ascii=False)
+        os.replace(tmp_path, self.table_path)
+
+        self._generation += 1
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._log_rows = 0
+
+    def _save_change(self, change: Dict[str, Any], rows: int) -> None:
+        # Vectors are written to the matrix before the change that refers to them is logged
+        self._matrix.flush()
+
+        if self._log_rows + rows > max(self.min_compaction_rows, len(self._ids)):
+            self._save_snapshot()
+            return
+
+        with open(self.log_path, 'a', encoding='utf-8') as file:
+            if file.tell() == 0:
+                file.write(json.dumps({'generation': self._generation, 'dimension': self.dimension}) + '\n')
+            file.write(json.dumps(change, ensure_ascii=False) + '\n')
+        self._log_rows += rows
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        """
+        Insert or overwrite vectors.
+
+        Args:
+            vectors (List[Dict[str, Any]]): Entries with 'id', 'values' and optional 'metadata' keys,
+                the same shape that is sent to Pinecone.
+
+        Returns:
+            int: The number of vectors written.
+        """
+        if not vectors:
+            return 0
+
+        values = np.asarray([vector['values'] for vector in vectors], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got shape {values.shape}")
+
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values = values / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._matrix.reserve(len(self._ids) + len(vectors))
+
+            entries = []
+            for vector, normalised in zip(vectors, values):
+                metadata = vector.get('metadata', {})
+                row = self._set_row(vector['id'], metadata)
+                self._matrix[row] = normalised
+                entries.append([vector['id'], metadata])
+
+            self._save_change({'op': 'upsert', 'entries': entries}, len(entries))
+
+        return len(vectors)
+
+    def delete(self, ids: Optional[List[str]] = None, prefix: Optional[str] = None, delete_all: bool = False) -> int:
+        """
+        Delete vectors by id, by id prefix, or all of them.
+
+        Deleted rows are filled with the last row so the matrix stays dense.
+
+        Args:
+            ids (Optional[List[str]]): The ids to delete.
+            prefix (Optional[str]): Delete every id starting with this prefix.
+            delete_all (bool): If True, delete every vector.
+
+        Returns:
+            int: The number of vectors removed.
+        """
+        with self._lock:
+            if delete_all:
+                removed = len(self._ids)
+                self._ids, self._metadata, self._rows = [], [], {}
+                self._save_snapshot()
+                return removed
+
+            targets = list(dict.fromkeys(ids or []))
+            if prefix is not None:
+                seen = set(targets)
+                targets.extend(vector_id for vector_id in self._ids if vector_id.startswith(prefix) and vector_id not in seen)
+
+            # Logged in the order they were removed, so replaying the log moves the same rows
+            removed = [vector_id for vector_id in targets if self._remove_row(vector_id)]
+            if removed:
+                self._save_change({'op': 'delete', 'ids': removed}, len(removed))
+
+            return len(removed)
+
+    def list_ids(self, prefix: Optional[str] = None) -> List[str]:
+        """
+        List stored ids, optionally only those starting with `prefix`.
+        """
+        with self._lock:
+            if prefix is None:
+                return list(self._ids)
+            return [vector_id for vector_id in self._ids if vector_id.startswith(prefix)]
+
+    def list_metadata(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        List (id, metadata) pairs of every stored vector.
+        """
+        with self._lock:
+            return list(zip(self._ids, self._metadata))
+
+    def query(self, vector: List[float], top_k: int) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Return the `top_k` most similar vectors by cosine similarity.
+
+        Args:
+            vector (List[float]): The query vector.
+            top_k (int): The number of matches to return.
+
+        Returns:
+            List[Tuple[str, float, Dict[str, Any]]]: (id, score, metadata) tuples, best match first.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or top_k <= 0:
+                return []
+
+            scores = self._matrix.rows(count) @ query
+            k = min(top_k, count)
+
+            # argpartition is O(n); only the k winners get sorted
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            return [(self._ids[row], float(scores[row]), self._metadata[row]) for row in top]
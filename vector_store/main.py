@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+sys.path.append('../')
+from constants.constants import (VECTOR_STORE_BACKEND, EMBEDDING_DIMENSION,
+                       get_pinecone_client, PINECONE_INDEX_NAME, PINECONE_NAMESPACE,
+                       LOCAL_VECTOR_STORE_DIR, CORPUS_GENERATION_FILE, BM25_INDEX_PATH)
+from vector_store.io_executor import run_io
+
+
+class AsyncBackendMixin:
+    """
+    Non-blocking variants of the backend methods, run on the vector store I/O executor.
+
+    Code on the event loop (the API routes, ingestion) should use these instead of the blocking
+    methods, which would freeze every other request for the duration of the call.
+    """
+
+    async def aensure_index(self) -> bool:
+        return await run_io(self.ensure_index)
+
+    async def aupsert(self, vectors: List[Dict[str, Any]]) -> int:
+        return await run_io(self.upsert, vectors)
+
+    async def adelete(self, ids: List[str]) -> int:
+        return await run_io(self.delete, ids)
+
+    async def adelete_all(self) -> None:
+        await run_io(self.delete_all)
+
+    async def alist_ids(self, prefix: Optional[str] = None) -> List[str]:
+        return await run_io(self.list_ids, prefix)
+
+    async def aping(self) -> Dict[str, Any]:
+        return await run_io(self.ping)
+
+
+class PineconeBackend(AsyncBackendMixin):
+    """
+    Vector store backend that talks to the Pinecone index configured in constants.py.
+
+    The index handle (and its gRPC channel) is created once and reused, and the index is
+    only looked up with `list_indexes` until it is known to exist.
+    """
+
+    name = 'pinecone'
+
+    def __init__(self, client, index_name: str, namespace: str, dimension: int):
+        self.client = client
+        self.index_name = index_name
+        self.namespace = namespace
+        self.dimension = dimension
+
+        self._index = None
+        self._index_exists = False
+        self._lock = threading.Lock()
+
+    def ensure_index(self) -> bool:
+        """
+        Create the Pinecone index if it does not exist yet.
+
+        Returns:
+            bool: True if the index was created by this call.
+        """
+        from pinecone import ServerlessSpec
+
+        if self._index_exists:
+            return False
+
+        if self.index_name not in self.client.list_indexes().names():
+            self.client.create_index(
+                name=self.index_name,
+                dimension=self.dimension,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud='aws',
+                    region='us-east-1'
+                )
+            )
+            print("INDEX CREATED SUCCESSFULLY")
+            self._index_exists = True
+            _bump_index_version()
+            return True
+
+        print("INDEX ALREADY EXISTS")
+        self._index_exists = True
+        return False
+
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = self.client.Index(self.index_name)
+
+            return self._index
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        self.index().upsert(vectors=vectors, namespace=self.namespace)
+        return len(vectors)
+
+    def delete(self, ids: List[str]) -> int:
+        self.index().delete(ids=ids, namespace=self.namespace)
+        return len(ids)
+
+    def delete_all(self) -> None:
+        self.index().delete(namespace=self.namespace, delete_all=True)
+
+    def list_ids(self, prefix: Optional[str] = None) -> List[str]:
+        """
+        List ids in the namespace, following every page of results.
+        """
+        ids = []
+        for page in self.index().list(prefix=prefix, namespace=self.namespace):
+            ids.extend(page)
+        return ids
+
+    def iter_metadata(self) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Yield the (id, metadata) pairs in the namespace, one page of ids at a time.
+        """
+        for page in self.index().list(namespace=self.namespace):
+            response = self.index().fetch(ids=list(page), namespace=self.namespace)
+            yield [(vector_id, dict(vector.metadata or {})) for vector_id, vector in response.vectors.items()]
+
+    def ping(self) -> Dict[str, Any]:
+        """
+        Open the connection to the index (if needed) and return its vector count.
+        """
+        stats = self.index().describe_index_stats()
+        namespace = stats.namespaces.get(self.namespace)
+        return {'vectors': namespace.vector_count if namespace is not None else 0}
+
+    def llamaindex_vector_store(self):
+        from vector_store.pinecone_llamaindex import NonBlockingPineconeVectorStore
+
+        return NonBlockingPineconeVectorStore(pinecone_index=self.index(), namespace=self.namespace,)
+
+
+class LocalBackend(AsyncBackendMixin):
+    """
+    Vector store backend backed by a LocalVectorStore on disk, for offline runs and benchmarks.
+    """
+
+    name = 'local'
+
+    def __init__(self, directory: str, namespace: str, dimension: int):
+        from vector_store.local_store import LocalVectorStore
+
+        self.namespace = namespace
+        self.dimension = dimension
+        self.store = LocalVectorStore(os.path.join(directory, namespace), dimension)
+
+    def ensure_index(self) -> bool:
+        return False
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        return self.store.upsert(vectors)
+
+    def delete(self, ids: List[str]) -> int:
+        return self.store.delete(ids=ids)
+
+    def delete_all(self) -> None:
+        self.store.delete(delete_all=True)
+
+    def list_ids(self, prefix: Optional[str] = None) -> List[str]:
+        return self.store.list_ids(prefix)
+
+    def iter_metadata(self) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+        yield self.store.list_metadata()
+
+    def ping(self) -> Dict[str, Any]:
+        return {'vectors': len(self.store)}
+
+    def llamaindex_vector_store(self):
+        from vector_store.local_llamaindex import LocalLlamaIndexVectorStore
+
+        return LocalLlamaIndexVectorStore(self.store)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# Bumped whenever the backend is replaced or its index is (re)created, so long-lived
+# objects built on top of it (the chat pipeline) know they are stale.
+_index_version = 0
+
+def _bump_index_version() -> None:
+    global _index_version
+    _index_version += 1
+
+def get_index_version() -> int:
+    return _index_version
+
+# Bumped by every insert or delete, so caches of answers and retrieval results can tell
+# that the corpus they were computed from has changed. It is kept on disk so results
+# persisted by one process are not trusted by the next after the corpus changed, and
+# re-read whenever the file changes, so a long-running API server notices the bumps of
+# another process (a CLI ingestion run).
+def _corpus_generation_file_version() -> Optional[Tuple[int, int]]:
+    # Every write replaces the file, so a new inode or mtime means a new generation
+    try:
+        stat = os.stat(CORPUS_GENERATION_FILE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino
+
+def _load_corpus_generation() -> int:
+    try:
+        with open(CORPUS_GENERATION_FILE, 'r', encoding='utf-8') as file:
+            return int(json.load(file)['generation'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+
+_corpus_generation_version = _corpus_generation_file_version()
+_corpus_generation = _load_corpus_generation()
+_corpus_generation_lock = threading.Lock()
+
+def _reload_corpus_generation_if_changed() -> None:
+    global _corpus_generation, _corpus_generation_version
+
+    version = _corpus_generation_file_version()
+    if version is None or version == _corpus_generation_version:
+        return
+
+    _corpus_generation = _load_corpus_generation()
+    _corpus_generation_version = version
+
+def bump_corpus_generation() -> int:
+    global _corpus_generation, _corpus_generation_version
+
+    with _corpus_generation_lock:
+        # Continue from the latest generation, which may have been written by another process
+        _reload_corpus_generation_if_changed()
+        _corpus_generation += 1
+
+        tmp_path = CORPUS_GENERATION_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'generation': _corpus_generation}, file)
+        os.replace(tmp_path, CORPUS_GENERATION_FILE)
+        _corpus_generation_version = _corpus_generation_file_version()
+
+        return _corpus_generation
+
+def get_corpus_generation() -> int:
+    with _corpus_generation_lock:
+        _reload_corpus_generation_if_changed()
+        return _corpus_generation
+
+def get_vector_store():
+    """
+    Return the vector store backend selected by VECTOR_STORE_BACKEND, creating it on first use.
+
+    Returns:
+        PineconeBackend | LocalBackend: The shared backend instance.
+    """
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            if VECTOR_STORE_BACKEND == 'pinecone':
+                _backend = PineconeBackend(get_pinecone_client(), PINECONE_INDEX_NAME, PINECONE_NAMESPACE, EMBEDDING_DIMENSION)
+            elif VECTOR_STORE_BACKEND == 'local':
+                _backend = LocalBackend(LOCAL_VECTOR_STORE_DIR, PINECONE_NAMESPACE, EMBEDDING_DIMENSION)
+            else:
+                raise ValueError(f"Unknown VECTOR_STORE_BACKEND '{VECTOR_STORE_BACKEND}', expected 'pinecone' or 'local'")
+
+        return _backend
+
+def reset_vector_store() -> None:
+    """
+    Drop the shared backend so the next get_vector_store() call creates it again.
+    """
+    global _backend
+
+    with _backend_lock:
+        _backend = None
+        _bump_index_version()
+
+_bm25_index = None
+_bm25_index_lock = threading.Lock()
+
+def _backfill_bm25_index(bm25_index) -> int:
+    # The BM25 index is only filled by ingestion, so chunks that were upserted before it existed
+    # would never be found by keyword; read them back from the vector store's metadata instead
+    try:
+        vector_store = get_vector_store()
+        if vector_store.ping()['vectors'] == 0:
+            return 0
+
+        count = 0
+        for documents in vector_store.iter_metadata():
+            count += bm25_index.add(documents)
+        bm25_index.save()
+    except Exception as e:
+        print(f"WARNING: The BM25 index is empty and could not be backfilled from the vector store: {e}")
+        return 0
+
+    print(f"Backfilled the BM25 index with {count} chunks from the '{vector_store.name}' vector store.")
+    return count
+
+def get_bm25_index():
+    """
+    Return the BM25 keyword index kept next to the vector store, loading it on first use.
+
+    If the index is empty but the vector store is not, it is backfilled from the metadata of
+    the stored vectors first.
+
+    Returns:
+        BM25Index: The shared index, updated by every insert and delete.
+    """
+    global _bm25_index
+
+    from vector_store.bm25 import BM25Index
+
+    with _bm25_index_lock:
+        if _bm25_index is None:
+            bm25_index = BM25Index(BM25_INDEX_PATH)
+            if len(bm25_index) == 0:
+                _backfill_bm25_index(bm25_index)
+            _bm25_index = bm25_index
+
+        return _bm25_index
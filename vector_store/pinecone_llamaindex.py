@@ -0,0 +1,25 @@
+from typing import Any, List, Sequence
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryResult
+from llama_index.vector_stores.pinecone import PineconeVectorStore
+from vector_store.io_executor import run_io
+
+
+class NonBlockingPineconeVectorStore(PineconeVectorStore):
+    """
+    PineconeVectorStore whose async methods run the blocking gRPC calls on the vector store
+    I/O executor; the base class falls back to calling them on the event loop.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NonBlockingPineconeVectorStore"
+
+    async def aquery(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        return await run_io(self.query, query, **kwargs)
+
+    async def async_add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        return await run_io(self.add, nodes, **add_kwargs)
+
+    async def adelete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        await run_io(self.delete, ref_doc_id, **delete_kwargs)